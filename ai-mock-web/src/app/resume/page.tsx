@@ -23,6 +23,7 @@ export default function ResumeUploadPage() {
         total_estimated_minutes: number;
         is_ai_generated: boolean;
         generation_source: string;
+        plan_id?: string | null;
       }
     | null
   >(null);
@@ -153,6 +154,8 @@ export default function ResumeUploadPage() {
     formData.append("yearsOfExperience", String(yearsOfExperience));
     formData.append("jobRole", jobRole);
     formData.append("companyName", companyName);
+    // Start with the exact plan shown in the preview
+    if (planPreview?.plan_id) formData.append("planId", planPreview.plan_id);
 
     try {
       const response = await fetch(`${API_BASE}/api/start-interview`, {
@@ -5,6 +5,10 @@ import { motion, AnimatePresence } from "framer-motion";
 import { Eye, AlertCircle, CheckCircle } from "lucide-react";
 
 const API_BASE = process.env.NEXT_PUBLIC_API_BASE || "http://localhost:8000";
+const WS_BASE = API_BASE.replace(/^http/, "ws");
+// With a session, frames are streamed over a WebSocket at this interval; HTTP uploads stay at one per second
+const STREAM_INTERVAL_MS = 250;
+const HTTP_INTERVAL_MS = 1000;
 
 interface BehaviorFeedback {
   presence: boolean;
@@ -43,6 +47,9 @@ export default function BehaviorMonitor({
   const [isInitializing, setIsInitializing] = useState(true);
   const intervalRef = useRef<NodeJS.Timeout | null>(null);
   const isAnalyzingRef = useRef(false); // Use ref instead of state to avoid closure issues
+  const binaryUploadRef = useRef(true); // Raw JPEG uploads; falls back to JSON/base64 on older backends
+  const socketRef = useRef<WebSocket | null>(null);
+  const lastHttpUploadRef = useRef(0);
 
   // Force initialization to complete after 3 seconds
   useEffect(() => {
@@ -117,6 +124,45 @@ export default function BehaviorMonitor({
 
     console.log("[BehaviorMonitor] ✓ Starting analysis interval NOW!");
 
+    const applyFeedback = (data: BehaviorFeedback) => {
+      console.log("Received feedback:", data);
+      
+      // Validate response has required fields
+      if (data && typeof data.confidence_score === 'number') {
+        console.log("✅ Setting feedback state with valid data");
+        setFeedback(data);
+        setError(null);
+      } else {
+        console.error("❌ Invalid feedback format:", data);
+        setError("Invalid response format");
+      }
+      
+      if (onFeedbackUpdate) {
+        onFeedbackUpdate(data);
+      }
+    };
+
+    // Stream frames over one connection when we have a session; the server analyzes the newest frame,
+    // drops stale ones and stores the metrics. Until it opens (or if it fails) frames go over HTTP.
+    if (sessionId && typeof WebSocket !== "undefined") {
+      const socket = new WebSocket(`${WS_BASE}/ws/behavior/${encodeURIComponent(sessionId)}`);
+      socket.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+        if (data.error) {
+          setError(`Analysis error: ${data.error}`);
+          return;
+        }
+        applyFeedback(data);
+      };
+      socket.onclose = () => {
+        console.log("[BehaviorMonitor] Behavior stream closed, using HTTP uploads");
+        if (socketRef.current === socket) {
+          socketRef.current = null;
+        }
+      };
+      socketRef.current = socket;
+    }
+
     const analyzeFrame = async () => {
       console.log("[BehaviorMonitor] analyzeFrame called, isAnalyzingRef.current:", isAnalyzingRef.current);
       if (isAnalyzingRef.current || !videoRef.current || !canvasRef.current) {
@@ -153,20 +199,61 @@ export default function BehaviorMonitor({
         }
         
         ctx.drawImage(video, 0, 0);
-        const imageData = canvas.toDataURL("image/jpeg", 0.8);
-        
-        console.log("Sending frame for analysis, size:", imageData.length);
-
-        const response = await fetch(`${API_BASE}/api/analyze-behavior`, {
-          method: "POST",
-          headers: {
-            "Content-Type": "application/json",
-          },
-          body: JSON.stringify({
-            image: imageData,
-            sessionId: sessionId
-          }),
-        });
+
+        const socket = socketRef.current;
+        if (socket && socket.readyState === WebSocket.OPEN) {
+          // Skip this frame while the previous one is still being sent
+          if (socket.bufferedAmount === 0) {
+            const blob = await new Promise<Blob | null>((resolve) => canvas.toBlob(resolve, "image/jpeg", 0.8));
+            if (blob) {
+              socket.send(blob);
+            }
+          }
+          return;
+        }
+
+        if (Date.now() - lastHttpUploadRef.current < HTTP_INTERVAL_MS) {
+          return;
+        }
+        lastHttpUploadRef.current = Date.now();
+
+        let response: Response | null = null;
+        if (binaryUploadRef.current) {
+          // Raw JPEG body: ~25% smaller than a base64 data URL and decoded server-side without JSON/base64 parsing
+          const blob = await new Promise<Blob | null>((resolve) => canvas.toBlob(resolve, "image/jpeg", 0.8));
+          if (blob) {
+            console.log("Sending frame for analysis, size:", blob.size);
+            const query = sessionId ? `?sessionId=${encodeURIComponent(sessionId)}` : "";
+            response = await fetch(`${API_BASE}/api/analyze-behavior/frame${query}`, {
+              method: "POST",
+              headers: {
+                "Content-Type": "image/jpeg",
+              },
+              body: blob,
+            });
+            if (response.status === 404 || response.status === 415) {
+              console.log("[BehaviorMonitor] Binary frame endpoint unavailable, using JSON uploads");
+              binaryUploadRef.current = false;
+              response = null;
+            }
+          }
+        }
+
+        if (!response) {
+          const imageData = canvas.toDataURL("image/jpeg", 0.8);
+          console.log("Sending frame for analysis, size:", imageData.length);
+
+          response = await fetch(`${API_BASE}/api/analyze-behavior`, {
+            method: "POST",
+            headers: {
+              "Content-Type": "application/json",
+            },
+            body: JSON.stringify({
+              image: imageData,
+              sessionId: sessionId
+            }),
+          });
+        }
 
         if (!response.ok) {
           const errorText = await response.text();
@@ -175,21 +262,7 @@ export default function BehaviorMonitor({
         }
 
         const data: BehaviorFeedback = await response.json();
-        console.log("Received feedback:", data);
-        
-        // Validate response has required fields
-        if (data && typeof data.confidence_score === 'number') {
-          console.log("✅ Setting feedback state with valid data");
-          setFeedback(data);
-          setError(null);
-        } else {
-          console.error("❌ Invalid feedback format:", data);
-          setError("Invalid response format");
-        }
-        
-        if (onFeedbackUpdate) {
-          onFeedbackUpdate(data);
-        }
+        applyFeedback(data);
       } catch (err) {
         console.error("Error analyzing frame:", err);
         setError(`Analysis error: ${err instanceof Error ? err.message : 'Unknown error'}`);
@@ -204,12 +277,16 @@ export default function BehaviorMonitor({
       analyzeFrame();
     }, 500); // Wait 0.5 seconds for video to load
     
-    // Then analyze every 1 second for more dynamic updates
-    intervalRef.current = setInterval(analyzeFrame, 1000);
+    // Then analyze every second over HTTP, or several times a second when streaming
+    intervalRef.current = setInterval(analyzeFrame, sessionId ? STREAM_INTERVAL_MS : HTTP_INTERVAL_MS);
 
     return () => {
       console.log("[BehaviorMonitor] Cleanup - clearing interval and timer");
       clearTimeout(startTimer);
+      if (socketRef.current) {
+        socketRef.current.close();
+        socketRef.current = null;
+      }
       if (intervalRef.current) {
         clearInterval(intervalRef.current);
         intervalRef.current = null; // IMPORTANT: Reset to null
@@ -2,6 +2,7 @@ import os
 import sys
 import uuid
 import shutil
+import time
 from typing import Optional
 from pathlib import Path
 
@@ -49,7 +50,8 @@ class AvatarService:
             print("📝 Falling back to sample video mode")
             self.initialized = False
     
-    def generate_video(self, text: str, voice: str = "en_male", emotion: str = "neutral") -> Optional[str]:
+    def generate_video(self, text: str, voice: str = "en_male", emotion: str = "neutral",
+                       timeout: Optional[float] = None) -> Optional[str]:
         """
         Generate a lip-synced avatar video for the given text.
         Returns the absolute path to the generated video on success, otherwise None.
@@ -58,10 +60,16 @@ class AvatarService:
             text: Text to be spoken by the avatar
             voice: Voice type (en_male, en_female, etc.)
             emotion: Emotion style (neutral, happy, sad, etc.)
+            timeout: Seconds available (e.g. the request's remaining budget); the sample
+                video is used when it runs out before synthesis. None means no limit.
         
         Returns:
             Path to generated video file or None on failure
         """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        if deadline is not None and timeout <= 0:
+            return self._use_sample_video()
+
         # Try to initialize if not already done
         if not self.initialized:
             self._lazy_init()
@@ -85,7 +93,14 @@ class AvatarService:
             selected_voice = voice_map.get(voice, "en-US-GuyNeural")
             
             # Run async TTS
-            self.asyncio.run(self._generate_audio(text, selected_voice, audio_path))
+            audio = self._generate_audio(text, selected_voice, audio_path)
+            if deadline is not None:
+                audio = self.asyncio.wait_for(audio, timeout=max(0.0, deadline - time.monotonic()))
+            self.asyncio.run(audio)
+
+            if deadline is not None and time.monotonic() >= deadline:
+                print("⏱️  Out of time before video synthesis, using sample fallback")
+                return self._use_sample_video()
             
             # Step 2: Check if avatar image exists
             if not os.path.exists(AVATAR_IMAGE):
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Interview load test - drives full simulated interviews through the FastAPI app in-process against the
+stub LLM provider (no GOOGLE_API_KEY or quota needed) and reports per-endpoint latency percentiles,
+throughput, event-loop lag and memory growth.
+
+    python benchmark_interview.py --interviews 100 --concurrency 20 --output baseline.json
+    python benchmark_interview.py --interviews 100 --concurrency 20 --compare baseline.json
+
+With --compare the run exits with status 1 if p95/p99 latency or throughput regressed beyond --tolerance.
+"""
+
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from metrics import percentile
+
+# Must be set before main.py is imported
+os.environ.setdefault("LLM_PROVIDER", "stub")
+os.environ.setdefault("LLM_RATE_LIMIT_PER_MINUTE", "0")
+os.environ.setdefault("QUESTION_BANK_PATH", os.path.join(tempfile.gettempdir(), "benchmark_question_bank.json"))
+
+COMPANIES = ["Google", "Amazon", "Meta", "Microsoft", "Stripe"]
+ROLES = ["Software Engineer", "Backend Engineer", "Data Engineer"]
+ANSWER = ("In my last role there was a time when our deploys took an hour. I owned the pipeline rewrite, "
+          "split the test suite and added caching; as a result deploy time decreased to 12 minutes.")
+CODE_ANSWER = "def solve(nums):\n    seen = {}\n    for i, n in enumerate(nums):\n        seen[n] = i\n    return seen"
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples),
+        "mean": round(sum(samples) / len(samples), 2) if samples else 0.0,
+        "p50": round(percentile(samples, 50) or 0.0, 2),
+        "p95": round(percentile(samples, 95) or 0.0, 2),
+        "p99": round(percentile(samples, 99) or 0.0, 2),
+        "max": round(max(samples), 2) if samples else 0.0,
+    }
+
+
+def current_rss_mb() -> float:
+    """Resident set size; /proc on Linux, peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+class LoopLagMonitor:
+    """Sleeps in short intervals and records how late the event loop wakes up."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, (loop.time() - start - self.interval) * 1000))
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+class InterviewRunner:
+    # Shared by every runner (warmup included): main.py derives the session id from company + role, so
+    # simulated candidates must not share a pair or they overwrite each other's session
+    _candidates = itertools.count()
+    session_ids: List[str] = []
+
+    def __init__(self, client, max_answers: int, hints_per_question: int, grading_mode: str):
+        self.client = client
+        self.max_answers = max_answers
+        self.hints_per_question = hints_per_question
+        self.grading_mode = grading_mode
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.requests = 0
+
+    @classmethod
+    def next_profile(cls) -> Dict[str, str]:
+        """A unique (company, role): the 15 real pairs first, then numbered teams of the same companies."""
+        index = next(cls._candidates)
+        company = COMPANIES[index % len(COMPANIES)]
+        role = ROLES[(index // len(COMPANIES)) % len(ROLES)]
+        team = index // (len(COMPANIES) * len(ROLES))
+        return {
+            "yearsOfExperience": str(random.randint(1, 8)),
+            "jobRole": role,
+            "companyName": f"{company} Team {team}" if team else company,
+        }
+
+    async def request(self, name: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except Exception:
+            self.errors[name] += 1
+            raise
+        finally:
+            self.timings[name].append((time.perf_counter() - start) * 1000)
+            self.requests += 1
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            raise RuntimeError(f"{name} returned {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+    @staticmethod
+    def answer_for(question_data: Dict[str, Any]) -> str:
+        if question_data.get("options"):
+            return random.choice(question_data["options"])
+        if question_data.get("initial_code"):
+            return CODE_ANSWER
+        return ANSWER
+
+    async def run(self) -> bool:
+        profile = self.next_profile()
+        try:
+            preview = await self.request("POST /api/preview-plan", "POST", "/api/preview-plan", data=profile)
+            start_form = {**profile, "planId": preview.get("plan_id") or ""}
+            if self.grading_mode:
+                start_form["gradingMode"] = self.grading_mode
+            started = await self.request("POST /api/start-interview", "POST", "/api/start-interview", data=start_form)
+            session_id = started["sessionId"]
+            self.session_ids.append(session_id)
+            question_data = started["questionData"]
+
+            for _ in range(self.max_answers):
+                for _ in range(self.hints_per_question):
+                    await self.request("POST /api/get-hint", "POST", "/api/get-hint",
+                                       json={"sessionId": session_id, "currentAnswer": ""})
+                submitted = await self.request("POST /api/submit-answer", "POST", "/api/submit-answer",
+                                               json={"sessionId": session_id, "userAnswer": self.answer_for(question_data)})
+                if submitted.get("isComplete"):
+                    break
+                question_data = submitted.get("questionData") or {}
+
+            await self.request("GET /api/interview-summary/{id}", "GET", f"/api/interview-summary/{session_id}")
+            await self.request("GET /api/behavior-summary/{id}", "GET", f"/api/behavior-summary/{session_id}")
+            return True
+        except Exception as e:
+            print(f"Interview failed: {e}", file=sys.stderr)
+            return False
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    import httpx
+    import main
+
+    random.seed(args.seed)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+        warmup = InterviewRunner(client, args.max_answers, args.hints, args.grading_mode)
+        for _ in range(args.warmup):
+            await warmup.run()
+
+        gc.collect()
+        rss_before = current_rss_mb()
+        sessions_before = len(main.sessions)
+        ids_before = len(InterviewRunner.session_ids)
+        upstream_before = main.metrics.count("llm.upstream_calls")
+
+        runner = InterviewRunner(client, args.max_answers, args.hints, args.grading_mode)
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def one_interview():
+            async with semaphore:
+                return await runner.run()
+
+        monitor = LoopLagMonitor()
+        monitor.start()
+        started_at = time.perf_counter()
+        results = await asyncio.gather(*(one_interview() for _ in range(args.interviews)))
+        elapsed = time.perf_counter() - started_at
+        await monitor.stop()
+
+        gc.collect()
+        rss_after = current_rss_mb()
+        sessions_added = len(main.sessions) - sessions_before
+        main.question_bank.cancel_refills()
+
+    completed = sum(1 for ok in results if ok)
+    # Ids the measured interviews got that another interview (measured or warmup) also got
+    all_ids = InterviewRunner.session_ids
+    measured_ids = all_ids[ids_before:]
+    duplicate_session_ids = sum(1 for i, sid in enumerate(measured_ids) if sid in all_ids[:ids_before + i])
+    return {
+        "config": {
+            "interviews": args.interviews,
+            "concurrency": args.concurrency,
+            "max_answers": args.max_answers,
+            "hints_per_question": args.hints,
+            "grading_mode": args.grading_mode or main.GRADING_MODE,
+            "llm_provider": main.llm_client.provider.name,
+            "stub_latency_scale": float(os.getenv("LLM_STUB_LATENCY_SCALE", "1.0")),
+            "stub_error_rate": float(os.getenv("LLM_STUB_ERROR_RATE", "0")),
+            "seed": args.seed,
+            "python": platform.python_version(),
+        },
+        "endpoints": {
+            name: {**summarize(samples), "errors": runner.errors.get(name, 0)}
+            for name, samples in sorted(runner.timings.items())
+        },
+        "throughput": {
+            "elapsed_seconds": round(elapsed, 3),
+            "interviews_completed": completed,
+            "interviews_failed": args.interviews - completed,
+            "interviews_per_second": round(completed / elapsed, 3) if elapsed else 0.0,
+            "requests_per_second": round(runner.requests / elapsed, 2) if elapsed else 0.0,
+        },
+        "event_loop_lag_ms": summarize(monitor.samples),
+        "memory": {
+            "rss_before_mb": round(rss_before, 1),
+            "rss_after_mb": round(rss_after, 1),
+            "rss_growth_mb": round(rss_after - rss_before, 1),
+            "growth_per_session_kb": round((rss_after - rss_before) * 1024 / sessions_added, 1) if sessions_added else 0.0,
+            "sessions_retained": sessions_added,
+        },
+        "sessions": {
+            "started": len(measured_ids),
+            "unique": len(set(measured_ids)),
+            "duplicate_session_ids": duplicate_session_ids,
+        },
+        "llm": {
+            "upstream_calls": main.metrics.count("llm.upstream_calls") - upstream_before,
+        },
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n{'endpoint':36} {'count':>6} {'err':>4} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  (ms)")
+    for name, stats in report["endpoints"].items():
+        print(f"{name:36} {stats['count']:>6} {stats['errors']:>4} {stats['p50']:>9.1f} {stats['p95']:>9.1f} {stats['p99']:>9.1f} {stats['max']:>9.1f}")
+    throughput = report["throughput"]
+    lag = report["event_loop_lag_ms"]
+    memory = report["memory"]
+    print(f"\nthroughput: {throughput['interviews_per_second']} interviews/s, {throughput['requests_per_second']} req/s "
+          f"({throughput['interviews_completed']} completed, {throughput['interviews_failed']} failed in {throughput['elapsed_seconds']}s)")
+    print(f"event loop lag: p50 {lag['p50']}ms, p99 {lag['p99']}ms, max {lag['max']}ms")
+    print(f"memory: {memory['rss_before_mb']} -> {memory['rss_after_mb']} MB RSS "
+          f"(+{memory['rss_growth_mb']} MB, {memory['growth_per_session_kb']} KB/session)")
+    print(f"llm upstream calls: {report['llm']['upstream_calls']}")
+    sessions = report["sessions"]
+    if sessions["duplicate_session_ids"]:
+        print(f"WARNING: {sessions['duplicate_session_ids']} of {sessions['started']} interviews reused another "
+              f"interview's session id; latency and memory figures don't reflect independent sessions")
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, min_delta_ms: float) -> List[str]:
+    """Returns a list of regressions vs. the baseline (latency up or throughput down by more than tolerance)."""
+    regressions = []
+    for name, base in baseline.get("endpoints", {}).items():
+        current = report["endpoints"].get(name)
+        if current is None:
+            regressions.append(f"{name}: missing from this run")
+            continue
+        for key in ["p95", "p99"]:
+            if current[key] > base[key] * (1 + tolerance) and current[key] - base[key] > min_delta_ms:
+                regressions.append(f"{name} {key}: {base[key]:.1f}ms -> {current[key]:.1f}ms")
+        if current["errors"] > base.get("errors", 0):
+            regressions.append(f"{name} errors: {base.get('errors', 0)} -> {current['errors']}")
+
+    base_rate = baseline.get("throughput", {}).get("interviews_per_second", 0)
+    rate = report["throughput"]["interviews_per_second"]
+    if base_rate and rate < base_rate * (1 - tolerance):
+        regressions.append(f"throughput: {base_rate} -> {rate} interviews/s")
+
+    base_lag = baseline.get("event_loop_lag_ms", {}).get("p99", 0)
+    lag = report["event_loop_lag_ms"]["p99"]
+    if lag > base_lag * (1 + tolerance) and lag - base_lag > min_delta_ms:
+        regressions.append(f"event loop lag p99: {base_lag}ms -> {lag}ms")
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Load-test full interviews against the stub LLM provider")
+    parser.add_argument("--interviews", type=int, default=50, help="Interviews to run")
+    parser.add_argument("--concurrency", type=int, default=10, help="Interviews in flight at once")
+    parser.add_argument("--max-answers", type=int, default=30, help="Cap on answers per interview")
+    parser.add_argument("--hints", type=int, default=1, help="Hints requested before each answer")
+    parser.add_argument("--grading-mode", choices=["", "immediate", "batched"], default="", help="Override GRADING_MODE")
+    parser.add_argument("--latency-scale", type=float, help="LLM_STUB_LATENCY_SCALE (1.0 = realistic Gemini latency)")
+    parser.add_argument("--error-rate", type=float, help="LLM_STUB_ERROR_RATE")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed interviews before measuring")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the report as a JSON baseline")
+    parser.add_argument("--compare", help="Baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="Ignore latency regressions smaller than this")
+    args = parser.parse_args()
+
+    if args.latency_scale is not None:
+        os.environ["LLM_STUB_LATENCY_SCALE"] = str(args.latency_scale)
+    else:
+        os.environ.setdefault("LLM_STUB_LATENCY_SCALE", "0.1")
+    if args.error_rate is not None:
+        os.environ["LLM_STUB_ERROR_RATE"] = str(args.error_rate)
+    os.environ.setdefault("LLM_STUB_SEED", str(args.seed))
+
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\nRegressions vs {args.compare}:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print(f"\nNo regressions vs {args.compare} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Behavior-frame ingestion benchmark - compares the JSON/base64 upload (/api/analyze-behavior) with the raw
+JPEG upload (/api/analyze-behavior/frame): bytes on the wire, CPU time and peak allocations per frame to get
+from request body to a decoded BGR frame, and optionally the full endpoints in-process (including analysis).
+
+    python benchmark_vision_ingest.py --frames 500
+    python benchmark_vision_ingest.py --frames 200 --endpoint --output vision_ingest.json
+    python benchmark_vision_ingest.py --image webcam_frame.jpg
+    python benchmark_vision_ingest.py --frames 100 --sessions 4      # tracker pool throughput, 1 vs 4 sessions
+    python benchmark_vision_ingest.py --frames 200 --analysis        # metrics-only vs annotated analysis
+    python benchmark_vision_ingest.py --frames 120 --profiles full,face_pose,lite --widths 0,320 --image face.jpg
+
+Without --image a synthetic 640x480 frame is encoded at JPEG quality 80 (what BehaviorMonitor sends).
+Results are recorded in VISION_PERFORMANCE.md.
+"""
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+import cv2
+import numpy as np
+
+from metrics import percentile
+
+# Must be set before main.py is imported (--endpoint)
+os.environ.setdefault("LLM_PROVIDER", "stub")
+os.environ.setdefault("LLM_RATE_LIMIT_PER_MINUTE", "0")
+os.environ.setdefault("QUESTION_BANK_PATH", os.path.join(tempfile.gettempdir(), "benchmark_question_bank.json"))
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples),
+        "mean": round(sum(samples) / len(samples), 3) if samples else 0.0,
+        "p50": round(percentile(samples, 50) or 0.0, 3),
+        "p95": round(percentile(samples, 95) or 0.0, 3),
+    }
+
+
+def synthetic_frame(width: int = 640, height: int = 480, seed: int = 1) -> np.ndarray:
+    """Webcam-like frame: lit background gradient, a head-and-shoulders silhouette and sensor noise."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    frame = np.zeros((height, width, 3), np.float32)
+    frame[..., 0] = 90 + 60 * x / width
+    frame[..., 1] = 110 + 50 * y / height
+    frame[..., 2] = 140 + 40 * (x + y) / (width + height)
+    cv2.ellipse(frame, (width // 2, height * 2 // 5), (70, 95), 0, 0, 360, (120, 150, 200), -1)
+    cv2.ellipse(frame, (width // 2, height + 40), (200, 160), 0, 180, 360, (60, 60, 90), -1)
+    frame += rng.normal(0, 6, frame.shape)
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def encode_jpeg(frame: np.ndarray, quality: int = 80) -> bytes:
+    ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise RuntimeError("JPEG encoding failed")
+    return encoded.tobytes()
+
+
+def decode_json_body(body: bytes) -> np.ndarray:
+    """What /api/analyze-behavior does before analysis: JSON parse, strip the data URL prefix, base64 decode, imdecode."""
+    image = json.loads(body)["image"]
+    if "base64," in image:
+        image = image.split("base64,")[1]
+    return cv2.imdecode(np.frombuffer(base64.b64decode(image), np.uint8), cv2.IMREAD_COLOR)
+
+
+def decode_binary_body(body: bytes) -> np.ndarray:
+    """What /api/analyze-behavior/frame does: imdecode straight from the request body."""
+    return cv2.imdecode(np.frombuffer(body, np.uint8), cv2.IMREAD_COLOR)
+
+
+def measure_decode(decode: Callable[[bytes], np.ndarray], body: bytes, frames: int) -> Dict[str, Any]:
+    for _ in range(min(20, frames)):
+        decode(body)
+    cpu_ms: List[float] = []
+    for _ in range(frames):
+        started = time.process_time()
+        frame = decode(body)
+        cpu_ms.append((time.process_time() - started) * 1000)
+        assert frame is not None
+    tracemalloc.start()
+    decode(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"cpu_ms": summarize(cpu_ms), "peak_alloc_kb": round(peak / 1024, 1)}
+
+
+async def measure_endpoints(jpeg: bytes, frames: int) -> Dict[str, Any]:
+    import httpx
+    import main
+
+    if main.vision_pool is None:
+        return {"error": "Vision service unavailable (mediapipe not installed?)"}
+    data_url = "data:image/jpeg;base64," + base64.b64encode(jpeg).decode("ascii")
+    transport = httpx.ASGITransport(app=main.app)
+    report: Dict[str, Any] = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        modes = {
+            "json": lambda: client.post("/api/analyze-behavior", json={"image": data_url}),
+            "binary": lambda: client.post("/api/analyze-behavior/frame", content=jpeg, headers={"Content-Type": "image/jpeg"}),
+        }
+        for name, send in modes.items():
+            for _ in range(min(5, frames)):
+                (await send()).raise_for_status()
+            wall_ms, cpu_ms = [], []
+            for _ in range(frames):
+                wall_started, cpu_started = time.perf_counter(), time.process_time()
+                (await send()).raise_for_status()
+                wall_ms.append((time.perf_counter() - wall_started) * 1000)
+                cpu_ms.append((time.process_time() - cpu_started) * 1000)
+            report[name] = {"wall_ms": summarize(wall_ms), "cpu_ms": summarize(cpu_ms)}
+    return report
+
+
+def measure_analysis(jpeg: bytes, frames: int) -> Dict[str, Any]:
+    """Per-frame wall/CPU time and peak allocation of VisionService.analyze_frame vs analyze_frame_with_visualization."""
+    from vision_service import VisionService
+
+    decoded = decode_binary_body(jpeg)
+    report: Dict[str, Any] = {}
+    for name in ("metrics_only", "annotated"):
+        service = VisionService()
+        analyze = service.analyze_frame if name == "metrics_only" else (lambda frame: service.analyze_frame_with_visualization(frame)[1])
+        wall_ms, cpu_ms = [], []
+        # the annotated mode prints a line per frame, as it did on the API path
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for i in range(frames + 5):
+                frame = decoded.copy()  # the annotated mode draws on its input
+                wall_started, cpu_started = time.perf_counter(), time.process_time()
+                analyze(frame)
+                if i >= 5:
+                    wall_ms.append((time.perf_counter() - wall_started) * 1000)
+                    cpu_ms.append((time.process_time() - cpu_started) * 1000)
+            frame = decoded.copy()
+            tracemalloc.start()
+            analyze(frame)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        report[name] = {"wall_ms": summarize(wall_ms), "cpu_ms": summarize(cpu_ms), "peak_alloc_kb": round(peak / 1024, 1)}
+        if name == "annotated":
+            # The drawing step alone, which the metrics-only mode skips
+            results = service._detect(decoded)
+            metrics = service._compute_metrics(results, decoded.shape[1], decoded.shape[0])
+            draw_ms = []
+            for i in range(frames + 5):
+                frame = decoded.copy()
+                started = time.perf_counter()
+                service.draw_annotations(frame, results, metrics)
+                if i >= 5:
+                    draw_ms.append((time.perf_counter() - started) * 1000)
+            frame = decoded.copy()
+            tracemalloc.start()
+            service.draw_annotations(frame, results, metrics)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            report["drawing_only"] = {"wall_ms": summarize(draw_ms), "peak_alloc_kb": round(peak / 1024, 1)}
+        service.close()
+    return report
+
+
+def jittered_clip(frame: np.ndarray, count: int, quality: int, seed: int = 1) -> List[bytes]:
+    """JPEG frames of `frame` with small random rotations, shifts and exposure changes (a candidate moving)."""
+    rng = np.random.default_rng(seed)
+    height, width = frame.shape[:2]
+    clip = []
+    for _ in range(count):
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), rng.uniform(-8, 8), 1.0)
+        matrix[:, 2] += rng.uniform(-20, 20, 2)
+        moved = cv2.warpAffine(frame, matrix, (width, height), borderMode=cv2.BORDER_REPLICATE)
+        clip.append(encode_jpeg(cv2.convertScaleAbs(moved, alpha=rng.uniform(0.85, 1.15)), quality))
+    return clip
+
+
+def measure_profiles(frame: np.ndarray, profiles: List[str], widths: List[int], frames: int, quality: int,
+                     rounds: int = 5) -> Dict[str, Any]:
+    """
+    Frames per CPU-second (= fps per core) of each pipeline profile and inference width over the same clip,
+    and agreement of its metrics with the first configuration (the reference, normally full at native size).
+    Configurations take turns for `rounds` passes and the median pass is reported, so background load
+    affects them all alike.
+    """
+    from vision_service import VisionService
+
+    clip = jittered_clip(frame, frames, quality)
+    report: Dict[str, Any] = {"frames": frames, "rounds": rounds}
+    services: Dict[str, VisionService] = {}
+    for profile in profiles:
+        for width in widths:
+            name = f"{profile}@{width or 'native'}"
+            try:
+                services[name] = VisionService(profile=profile, inference_width=width)
+            except Exception as e:
+                report[name] = {"error": str(e)}
+
+    fps: Dict[str, List[float]] = {name: [] for name in services}
+    first_pass: Dict[str, List[Dict[str, Any]]] = {}
+    for _ in range(rounds):
+        for name, service in services.items():
+            cpu_started = time.process_time()
+            results = [service.process_encoded_frame(encoded) for encoded in clip]
+            fps[name].append(frames / (time.process_time() - cpu_started))
+            first_pass.setdefault(name, results)
+
+    reference = next(iter(first_pass.values()), [])
+    for name, service in services.items():
+        service.close()
+        results = first_pass[name]
+        entry: Dict[str, Any] = {
+            "fps_per_core": round(percentile(fps[name], 50) or 0.0, 1),
+            "face_detected_pct": round(100 * sum(r.get("presence", False) for r in results) / frames, 1),
+        }
+        if results is not reference:
+            entry["agreement"] = metric_agreement(reference, results)
+        report[name] = entry
+    return report
+
+
+def metric_agreement(reference: List[Dict[str, Any]], results: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Share of frames where each metric matches the reference, plus mean absolute angle/score differences."""
+    pairs = [(a, b) for a, b in zip(reference, results) if "error" not in a and "error" not in b]
+    both_present = [(a, b) for a, b in pairs if a["presence"] and b["presence"]]
+
+    def share(matches: int, total: int) -> float:
+        return round(100 * matches / total, 1) if total else 0.0
+
+    def mean_abs(values: List[float]) -> float:
+        return round(sum(values) / len(values), 2) if values else 0.0
+
+    return {
+        "presence_pct": share(sum(a["presence"] == b["presence"] for a, b in pairs), len(pairs)),
+        "eye_contact_pct": share(sum(a["eye_contact"] == b["eye_contact"] for a, b in pairs), len(pairs)),
+        "posture_pct": share(sum(a["posture"]["is_good"] == b["posture"]["is_good"] for a, b in pairs), len(pairs)),
+        "confidence_score_pct": share(sum(a["confidence_score"] == b["confidence_score"] for a, b in pairs), len(pairs)),
+        "yaw_mae_deg": mean_abs([abs(a["head_pose"]["yaw"] - b["head_pose"]["yaw"]) for a, b in both_present]),
+        "pitch_mae_deg": mean_abs([abs(a["head_pose"]["pitch"] - b["head_pose"]["pitch"]) for a, b in both_present]),
+    }
+
+
+async def measure_pool(jpeg: bytes, sessions: int, frames: int) -> Dict[str, Any]:
+    """Frames/second through a VisionTrackerPool with `sessions` sessions sending frames concurrently."""
+    from vision_pool import VisionTrackerPool
+
+    pool = VisionTrackerPool(max_trackers=sessions)
+    try:
+        async def run_session(session_id: str, count: int) -> None:
+            for _ in range(count):
+                await pool.analyze(session_id, lambda service: service.process_encoded_frame(jpeg))
+
+        await asyncio.gather(*(run_session(f"warmup-{i}", 3) for i in range(sessions)))
+        report: Dict[str, Any] = {"workers": pool.workers}
+        for concurrent in sorted({1, sessions}):
+            started = time.perf_counter()
+            await asyncio.gather(*(run_session(f"warmup-{i}", frames) for i in range(concurrent)))
+            elapsed = time.perf_counter() - started
+            report[f"{concurrent}_sessions"] = {"frames": concurrent * frames, "fps": round(concurrent * frames / elapsed, 1)}
+        return report
+    finally:
+        pool.close()
+
+
+def main_cli() -> int:
+    parser = argparse.ArgumentParser(description="Compare JSON/base64 and raw JPEG behavior-frame uploads")
+    parser.add_argument("--frames", type=int, default=300, help="Frames per measurement")
+    parser.add_argument("--image", help="Encoded frame to use instead of the synthetic 640x480 one")
+    parser.add_argument("--quality", type=int, default=80, help="JPEG quality of the synthetic frame")
+    parser.add_argument("--endpoint", action="store_true", help="Also time both endpoints in-process, analysis included")
+    parser.add_argument("--analysis", action="store_true", help="Also time metrics-only vs annotated analysis of one decoded frame")
+    parser.add_argument("--profiles", help="Comma-separated pipeline profiles to compare (first = reference), e.g. full,face_pose,lite")
+    parser.add_argument("--widths", default="0", help="Comma-separated inference widths for --profiles (0 = native)")
+    parser.add_argument("--rounds", type=int, default=5, help="Interleaved passes per profile (median reported)")
+    parser.add_argument("--sessions", type=int, default=0, help="Also measure tracker-pool throughput with this many concurrent sessions")
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    if args.image:
+        with open(args.image, "rb") as f:
+            jpeg = f.read()
+    else:
+        jpeg = encode_jpeg(synthetic_frame(), args.quality)
+    json_body = json.dumps({"image": "data:image/jpeg;base64," + base64.b64encode(jpeg).decode("ascii"), "sessionId": "00000000-0000-0000-0000-000000000000"}).encode("utf-8")
+
+    report: Dict[str, Any] = {
+        "platform": f"{platform.python_implementation()} {platform.python_version()} / {platform.machine()}",
+        "opencv": cv2.__version__,
+        "payload_bytes": {"json": len(json_body), "binary": len(jpeg), "saved_pct": round(100 * (1 - len(jpeg) / len(json_body)), 1)},
+        "decode": {
+            "json": measure_decode(decode_json_body, json_body, args.frames),
+            "binary": measure_decode(decode_binary_body, jpeg, args.frames),
+        },
+    }
+    if args.endpoint:
+        report["endpoint"] = asyncio.run(measure_endpoints(jpeg, args.frames))
+    if args.analysis:
+        report["analysis"] = measure_analysis(jpeg, args.frames)
+    if args.profiles:
+        frame = decode_binary_body(jpeg)
+        widths = [int(w) for w in args.widths.split(",")]
+        report["profiles"] = measure_profiles(frame, args.profiles.split(","), widths, args.frames, args.quality, args.rounds)
+    if args.sessions:
+        report["pool"] = asyncio.run(measure_pool(jpeg, args.sessions, args.frames))
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
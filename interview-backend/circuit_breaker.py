@@ -0,0 +1,167 @@
+"""
+Circuit breaker and token-bucket rate limiter for upstream LLM calls
+When Gemini is out of quota or failing, calls are rejected instantly so the existing fallbacks are served
+without a full failing round trip; a single half-open probe decides when to close again.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit is open."""
+
+
+class RateLimitedError(Exception):
+    """Raised when the token bucket has no capacity within the allowed wait."""
+
+
+def is_quota_error(error: BaseException) -> bool:
+    text = f"{type(error).__name__} {error}".lower()
+    return "429" in text or "quota" in text or "resourceexhausted" in text or "resource exhausted" in text or "rate limit" in text
+
+
+class TokenBucket:
+    """Classic token bucket: `rate_per_second` refill up to `capacity` tokens."""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def time_until_available(self, tokens: float = 1.0) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens or self.rate_per_second <= 0:
+                return 0.0 if self._tokens >= tokens else float("inf")
+            return (tokens - self._tokens) / self.rate_per_second
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "rate_per_minute": round(self.rate_per_second * 60, 1),
+                "capacity": self.capacity,
+                "available_tokens": round(self._tokens, 2),
+            }
+
+
+class CircuitBreaker:
+    """
+    closed -> open when `quota_threshold` quota errors (429 / quota exceeded) or `failure_threshold`
+    errors of any kind happen within `window_seconds`.
+    open -> half_open after `open_seconds`; exactly one probe request is let through.
+    half_open -> closed on probe success, back to open (with doubled open time, capped) on failure.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: Optional[int] = None, quota_threshold: Optional[int] = None,
+                 window_seconds: Optional[float] = None, open_seconds: Optional[float] = None,
+                 max_open_seconds: Optional[float] = None):
+        self.failure_threshold = failure_threshold or int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+        self.quota_threshold = quota_threshold or int(os.getenv("LLM_BREAKER_QUOTA_THRESHOLD", "2"))
+        self.window_seconds = window_seconds or float(os.getenv("LLM_BREAKER_WINDOW_SECONDS", "30"))
+        self.base_open_seconds = open_seconds or float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30"))
+        self.max_open_seconds = max_open_seconds or float(os.getenv("LLM_BREAKER_MAX_OPEN_SECONDS", "300"))
+
+        self.state = self.CLOSED
+        self.open_seconds = self.base_open_seconds
+        self.opened_at = 0.0
+        self.last_error: Optional[str] = None
+        self._failures: Deque[float] = deque()
+        self._quota_failures: Deque[float] = deque()
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """True if a request may go upstream now. In half-open state only the single probe is allowed."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self.opened_at >= self.open_seconds:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.CLOSED
+                self.open_seconds = self.base_open_seconds
+                self._probe_in_flight = False
+            self._failures.clear()
+            self._quota_failures.clear()
+
+    def release(self) -> None:
+        """Frees the half-open probe slot when the probe ended without a verdict (e.g. it was cancelled)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self, error: BaseException) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.last_error = f"{type(error).__name__}: {error}"[:300]
+            if self.state == self.HALF_OPEN:
+                # Failed probe - back off for longer before the next one
+                self._open(now, min(self.open_seconds * 2, self.max_open_seconds))
+                return
+            self._failures.append(now)
+            if is_quota_error(error):
+                self._quota_failures.append(now)
+            for window in (self._failures, self._quota_failures):
+                while window and now - window[0] > self.window_seconds:
+                    window.popleft()
+            if self.state == self.CLOSED and (
+                len(self._quota_failures) >= self.quota_threshold or len(self._failures) >= self.failure_threshold
+            ):
+                self._open(now, self.base_open_seconds)
+
+    def _open(self, now: float, open_seconds: float) -> None:
+        self.state = self.OPEN
+        self.opened_at = now
+        self.open_seconds = open_seconds
+        self._probe_in_flight = False
+        self._failures.clear()
+        self._quota_failures.clear()
+        self.times_opened += 1
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = max(0.0, self.open_seconds - (time.monotonic() - self.opened_at)) if self.state == self.OPEN else 0.0
+            return {
+                "state": self.state,
+                "retry_in_seconds": round(retry_in, 1),
+                "recent_failures": len(self._failures),
+                "recent_quota_failures": len(self._quota_failures),
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+                "last_error": self.last_error,
+            }
@@ -0,0 +1,119 @@
+"""
+Request Deadlines - a per-request time budget that every upstream call made for the request draws from
+DeadlineMiddleware starts the clock from the endpoint's budget; LLMClient, TTS and avatar calls clamp their
+timeouts to what is left, so a stalled upstream turns into the endpoint's fallback instead of an open request
+"""
+
+import asyncio
+import contextlib
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, Iterator, Optional, Tuple
+
+from metrics import metrics
+
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "30"))
+# Upstream calls aren't started with less than this left - the fallback is served straight away instead
+MIN_CALL_SECONDS = float(os.getenv("DEADLINE_MIN_CALL_SECONDS", "0.25"))
+
+# Budget (seconds) per endpoint path prefix, longest match wins; override with DEADLINE_SECONDS_<NAME>,
+# e.g. DEADLINE_SECONDS_SUBMIT_ANSWER_STREAM=40 (0 disables the deadline for that endpoint)
+ENDPOINT_DEADLINES: Dict[str, float] = {
+    "/api/preview-plan": 20.0,
+    "/api/start-interview": 20.0,
+    "/api/submit-answer": 20.0,
+    "/api/submit-answer/stream": 40.0,
+    "/api/get-hint": 8.0,
+    "/api/interview-summary": 30.0,
+    "/api/ats-review": 45.0,
+    "/api/tts": 10.0,
+    "/generate_avatar": 60.0,
+}
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when the request's time budget is (nearly) used up."""
+
+
+def _env_name(path: str) -> str:
+    name = path[len("/api/"):] if path.startswith("/api/") else path.lstrip("/")
+    return name.replace("-", "_").replace("/", "_").upper()
+
+
+def endpoint_budget(path: str) -> Optional[float]:
+    """Seconds allowed for a request to `path`, or None for no deadline."""
+    matches = [prefix for prefix in ENDPOINT_DEADLINES if path == prefix or path.startswith(prefix + "/")]
+    prefix = max(matches, key=len) if matches else None
+    seconds = ENDPOINT_DEADLINES[prefix] if prefix else DEFAULT_DEADLINE_SECONDS
+    if prefix:
+        seconds = float(os.getenv(f"DEADLINE_SECONDS_{_env_name(prefix)}", seconds))
+    return seconds if seconds > 0 else None
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current request's budget (None outside a request or in detached work)."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def clamp(timeout: float, task: str = "call") -> Tuple[float, bool]:
+    """
+    (timeout to use, whether the request deadline is the binding limit). Raises DeadlineExceededError
+    without starting anything when less than MIN_CALL_SECONDS is left.
+    """
+    left = remaining()
+    if left is None or left >= timeout:
+        return timeout, False
+    if left < MIN_CALL_SECONDS:
+        metrics.increment(f"deadline.skipped.{task}")
+        raise DeadlineExceededError(f"Request deadline reached before '{task}' could start")
+    return left, True
+
+
+async def bounded(awaitable: Awaitable[Any], share: float = 1.0, task: str = "call") -> Any:
+    """
+    Awaits `awaitable` for at most `share` of the remaining budget (unbounded outside a request).
+    Raises DeadlineExceededError on expiry; wrap shared tasks in asyncio.shield to keep them running.
+    """
+    left = remaining()
+    if left is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout=max(0.0, left * share))
+    except asyncio.TimeoutError:
+        metrics.increment(f"deadline.exceeded.{task}")
+        raise DeadlineExceededError(f"Request deadline reached while waiting for '{task}'")
+
+
+@contextlib.contextmanager
+def detached() -> Iterator[None]:
+    """
+    Background work (prefetch, bank refills, hint pre-generation, batch grading) is started inside this
+    block so its tasks don't inherit the request's deadline; they keep their own per-call timeouts.
+    """
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class DeadlineMiddleware:
+    """ASGI middleware that sets the request deadline from endpoint_budget() for every HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        budget = endpoint_budget(scope["path"]) if scope["type"] == "http" else None
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+        token = _deadline.set(time.monotonic() + budget)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _deadline.reset(token)
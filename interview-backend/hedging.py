@@ -0,0 +1,72 @@
+"""
+Hedged Requests - a second identical upstream call for interactive tasks that are slower than usual
+Off by default (LLM_HEDGING=1 to enable). The hedge fires once a call has run longer than the task's tracked
+p90 and whichever call answers first wins; a global budget keeps hedges to a small share of upstream calls
+"""
+
+import os
+from typing import Any, Dict, Optional, Set
+
+from metrics import metrics
+
+# Interactive tasks a candidate is waiting on; summary, ATS review, plan and batch grading are never hedged
+DEFAULT_HEDGE_TASKS = "question,coding_question,mcq,feedback,hint"
+
+
+class HedgePolicy:
+    """
+    Decides whether and when to hedge. Every eligible call earns `budget` of a hedge (LLM_HEDGE_BUDGET, e.g.
+    0.05 = at most ~5% extra calls), banked up to LLM_HEDGE_BURST; a hedge spends one whole unit.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, tasks: Optional[Set[str]] = None, budget: Optional[float] = None):
+        if enabled is None:
+            enabled = os.getenv("LLM_HEDGING", "0").lower() in ["1", "true", "yes"]
+        self.enabled = enabled
+        self.tasks = tasks if tasks is not None else {t.strip() for t in os.getenv("LLM_HEDGE_TASKS", DEFAULT_HEDGE_TASKS).split(",") if t.strip()}
+        self.budget = budget if budget is not None else float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))
+        self.burst = float(os.getenv("LLM_HEDGE_BURST", "5"))
+        self.percentile = float(os.getenv("LLM_HEDGE_PERCENTILE", "90"))
+        self.min_samples = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+        self.min_delay_ms = float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "50"))
+
+        self._allowance = 0.0
+        self.eligible_calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def applies_to(self, task: str) -> bool:
+        return self.enabled and task in self.tasks
+
+    def earn(self) -> None:
+        """Call once per eligible primary call."""
+        self.eligible_calls += 1
+        self._allowance = min(self.burst, self._allowance + self.budget)
+
+    def has_budget(self, task: str) -> bool:
+        """Whether a hedge can be afforded; checked before any other resource is taken for it."""
+        if self._allowance < 1.0:
+            metrics.increment(f"llm.hedges_over_budget.{task}")
+            return False
+        return True
+
+    def spend(self, task: str) -> None:
+        self._allowance -= 1.0
+        self.hedges += 1
+        metrics.increment(f"llm.hedges.{task}")
+
+    def record_win(self, task: str) -> None:
+        self.hedge_wins += 1
+        metrics.increment(f"llm.hedge_wins.{task}")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "tasks": sorted(self.tasks),
+            "budget": self.budget,
+            "eligible_calls": self.eligible_calls,
+            "hedges": self.hedges,
+            "hedge_rate": self.hedges / self.eligible_calls if self.eligible_calls else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "win_rate": self.hedge_wins / self.hedges if self.hedges else 0.0,
+        }
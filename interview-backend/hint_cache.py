@@ -0,0 +1,127 @@
+"""
+Hint Cache - reuses the empty-answer hint for the same question
+The empty-answer hint is identical for every candidate who gets a question, so it is pre-generated in the
+background as soon as the question is served and the first click is answered from memory. Hints for an answer
+in progress are written around that candidate's answer text and are never cached or shared
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+HintKey = Tuple[str, str]
+# generate() -> hint text, or None when the model was unavailable (nothing is cached)
+HintGenerator = Callable[[], Awaitable[Optional[str]]]
+
+
+class HintCache:
+    """
+    LRU cache of empty-answer hint texts keyed on (question hash, question type), up to
+    HINT_CACHE_MAX_ENTRIES entries that expire after HINT_CACHE_TTL_MINUTES. Concurrent lookups for a key
+    share one generation, so a click that lands while the pre-generation is still running waits for it
+    instead of starting a second call.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries or int(os.getenv("HINT_CACHE_MAX_ENTRIES", "2048"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("HINT_CACHE_TTL_MINUTES", "360")) * 60
+
+        # key -> (created_at, hint text)
+        self._entries: "OrderedDict[HintKey, Tuple[float, str]]" = OrderedDict()
+        self._inflight: Dict[HintKey, asyncio.Task] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.prewarmed = 0
+
+    @staticmethod
+    def cacheable(answer: str) -> bool:
+        """Only the empty-answer hint is shared; a started answer gets a hint written around its own text."""
+        return not (answer or "").strip()
+
+    @staticmethod
+    def make_key(question_text: str, question_type: str, context: str = "") -> HintKey:
+        """`context` (e.g. the job role) is hashed together with the normalized question text."""
+        normalized = " ".join(f"{context}\n{question_text}".lower().split())
+        question_hash = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+        return question_hash, question_type or "behavioral"
+
+    def _lookup(self, key: HintKey) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[0] >= self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def get(self, key: HintKey, generate: HintGenerator) -> Optional[str]:
+        """Cached hint for the key, joining an in-flight generation or starting one. Errors propagate."""
+        cached = self._lookup(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = self._start(key, generate)
+        return await asyncio.shield(task)
+
+    def prewarm(self, key: HintKey, generate: HintGenerator) -> None:
+        """Starts a background generation for the key unless it is cached or already being generated."""
+        if key in self._inflight or self._lookup(key) is not None:
+            return
+        self.prewarmed += 1
+        self._start(key, generate).add_done_callback(self._log_prewarm_failure)
+
+    def _start(self, key: HintKey, generate: HintGenerator) -> asyncio.Task:
+        task = asyncio.ensure_future(self._generate(key, generate))
+        task.add_done_callback(self._retrieve_exception)
+        self._inflight[key] = task
+        return task
+
+    async def _generate(self, key: HintKey, generate: HintGenerator) -> Optional[str]:
+        try:
+            hint = await generate()
+        finally:
+            self._inflight.pop(key, None)
+        if hint:
+            self._entries[key] = (time.time(), hint)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return hint
+
+    @staticmethod
+    def _retrieve_exception(task: asyncio.Task) -> None:
+        # Waiters may have given up (request deadline); the exception is theirs to handle, not the loop's
+        if not task.cancelled():
+            task.exception()
+
+    @staticmethod
+    def _log_prewarm_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            metrics.increment("hint_cache.prewarm_failed")
+            logger.warning(f"Hint pre-generation failed: {task.exception()}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "prewarmed": self.prewarmed,
+        }
@@ -0,0 +1,99 @@
+"""
+Incremental JSON parsing for streamed LLM output
+Closes a truncated JSON document (open strings, objects, arrays) so partial values can be read while tokens arrive
+"""
+
+import json
+from typing import Any, Optional
+
+
+def complete_partial_json(text: str) -> Optional[Any]:
+    """
+    Best-effort parse of a JSON prefix. Open strings and containers are closed; a dangling key
+    (no value yet) and trailing commas are dropped. Returns None if the prefix can't be made valid
+    yet, e.g. when it ends inside a literal like `tru`.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return None
+    text = text[min(starts):]
+
+    # stack entries: [bracket, state]; object states: key / colon / value / comma, array: value / comma
+    stack = []
+    in_string = False
+    escape = False
+    string_is_key = False
+    string_start = 0
+    last_key_start = 0
+
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+                if stack:
+                    stack[-1][1] = "colon" if string_is_key else "comma"
+            continue
+
+        if ch == '"':
+            in_string = True
+            string_start = i
+            string_is_key = bool(stack) and stack[-1][0] == "{" and stack[-1][1] == "key"
+            if string_is_key:
+                last_key_start = i
+        elif ch in "{[":
+            stack.append([ch, "key" if ch == "{" else "value"])
+        elif ch in "}]":
+            if not stack:
+                break
+            stack.pop()
+            if stack:
+                stack[-1][1] = "comma"
+            else:
+                text = text[:i + 1]
+                break
+        elif ch == ":" and stack:
+            stack[-1][1] = "value"
+        elif ch == "," and stack:
+            stack[-1][1] = "key" if stack[-1][0] == "{" else "value"
+
+    if in_string:
+        if string_is_key:
+            text = text[:string_start]
+        else:
+            if escape:
+                text = text[:-1]
+            text += '"'
+    elif stack and stack[-1][0] == "{" and stack[-1][1] in ["colon", "value"]:
+        # Key without a value yet (a started scalar value is kept as-is)
+        tail = text[last_key_start:]
+        if stack[-1][1] == "colon" or tail.rstrip().endswith(":"):
+            text = text[:last_key_start]
+
+    text = text.rstrip()
+    while text.endswith(","):
+        text = text[:-1].rstrip()
+    text += "".join("}" if bracket == "{" else "]" for bracket, _ in reversed(stack))
+
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+class IncrementalJSONParser:
+    """Accumulates streamed chunks and returns the most complete parse seen so far."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.value: Optional[Any] = None
+
+    def feed(self, chunk: str) -> Optional[Any]:
+        self.buffer += chunk
+        parsed = complete_partial_json(self.buffer)
+        if parsed is not None:
+            self.value = parsed
+        return self.value
@@ -0,0 +1,339 @@
+"""
+Async LLM Client - runs LLM provider calls off the event loop
+Bounded concurrency and per-call timeouts so one slow generation can't stall other interviews,
+plus single-flight coalescing of identical concurrent requests, a quota circuit breaker,
+per-task model routing (model_router.py) and opt-in hedging of slow interactive calls (hedging.py)
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+import deadlines
+from circuit_breaker import CircuitBreaker, CircuitOpenError, RateLimitedError, TokenBucket
+from deadlines import DeadlineExceededError
+from hedging import HedgePolicy
+from llm_providers import LLMProvider
+from metrics import metrics
+from model_router import ModelRouter
+
+logger = logging.getLogger(__name__)
+
+
+class LLMTimeoutError(TimeoutError):
+    """Raised when an LLM call does not finish within its timeout."""
+
+
+_background: ContextVar[bool] = ContextVar("llm_background", default=False)
+
+
+def in_background() -> bool:
+    return _background.get()
+
+
+@contextlib.contextmanager
+def background() -> Iterator[None]:
+    """
+    LLM calls made in this block (and in tasks started in it) are speculative background work, e.g. question
+    bank refills. They draw from their own token bucket instead of the interactive one, are refused rather than
+    queued, and don't move the circuit breaker, so they can't throttle or trip it for live candidates.
+    """
+    token = _background.set(True)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+class LLMClient:
+    """
+    Shared async wrapper around an LLMProvider (Gemini or the local stub, see llm_providers.py).
+    A semaphore caps in-flight calls (LLM_MAX_CONCURRENCY) and every call is wrapped in a per-task timeout.
+    The ModelRouter picks each task's model tier and max_output_tokens and is fed upstream latencies.
+    Identical concurrent requests (same normalized prompt and generation config) share one
+    upstream call unless the caller opts out with coalesce=False.
+    Upstream calls pass a token bucket (LLM_RATE_LIMIT_PER_MINUTE) and a circuit breaker; while the
+    breaker is open calls raise CircuitOpenError immediately so callers serve their fallbacks.
+    Inside a request, timeouts are clamped to the request's remaining budget (deadlines.py); running out
+    of budget raises DeadlineExceededError and doesn't count against the breaker or the task's latency SLO.
+    With LLM_HEDGING on, interactive calls still running after their task's p90 get a second identical
+    upstream call (within the HedgePolicy budget) and the first answer wins.
+    Calls made inside background() only run while the breaker is closed and at most half the concurrency
+    slots are busy, within LLM_BACKGROUND_RATE_LIMIT_PER_MINUTE.
+    """
+
+    def __init__(self, provider: LLMProvider, max_concurrency: Optional[int] = None, default_timeout: Optional[float] = None):
+        self.provider = provider
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+        self.default_timeout = default_timeout or float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+        self.router = ModelRouter(self.default_timeout)
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._pending: Dict[str, asyncio.Task] = {}
+        self.in_flight = 0
+
+        self.breaker = CircuitBreaker()
+        rate_per_minute = float(os.getenv("LLM_RATE_LIMIT_PER_MINUTE", "300"))
+        self.rate_limiter = TokenBucket(rate_per_minute / 60, float(os.getenv("LLM_RATE_LIMIT_BURST", "30"))) if rate_per_minute > 0 else None
+        self.rate_limit_max_wait = float(os.getenv("LLM_RATE_LIMIT_MAX_WAIT_SECONDS", "0.5"))
+        background_rate = float(os.getenv("LLM_BACKGROUND_RATE_LIMIT_PER_MINUTE", "30"))
+        self.background_limiter = TokenBucket(background_rate / 60, float(os.getenv("LLM_BACKGROUND_RATE_LIMIT_BURST", "5"))) if background_rate > 0 else None
+        self.background_max_in_flight = max(1, self.max_concurrency // 2)
+        self.hedging = HedgePolicy()
+
+    def timeout_for(self, task: str) -> float:
+        return self.router.timeout_for(task)
+
+    @staticmethod
+    def coalesce_key(prompt: str, generation_config: Dict, model: Optional[str] = None) -> str:
+        normalized = " ".join(prompt.split())
+        config = json.dumps(generation_config, sort_keys=True, default=str)
+        return hashlib.sha256(f"{model}\n{config}\n{normalized}".encode("utf-8")).hexdigest()
+
+    async def generate(self, prompt: str, task: str = "default", timeout: Optional[float] = None,
+                       coalesce: bool = True, **generation_config) -> str:
+        """
+        Generate text for a prompt without blocking the event loop.
+        generation_config kwargs (temperature, max_output_tokens, ...) are passed to the provider;
+        max_output_tokens defaults to the task's routed cap.
+        Time spent waiting for a concurrency slot counts towards the timeout.
+        Prompts that inject a nonce for variety should pass coalesce=False.
+        """
+        timeout = timeout if timeout is not None else self.timeout_for(task)
+        generation_config = self.router.apply(task, generation_config)
+        metrics.increment(f"llm.requests.{task}")
+        clamped, deadline_bound = deadlines.clamp(timeout, task)
+        if not coalesce:
+            return await self._call(prompt, task, clamped, generation_config, deadline_bound)
+
+        key = self.coalesce_key(prompt, generation_config, self.router.model_for(task))
+        shared = self._pending.get(key)
+        if shared is not None:
+            metrics.increment("llm.coalesced")
+            metrics.increment(f"llm.coalesced.{task}")
+        else:
+            # The shared call gets the task's full timeout, not the first caller's remaining budget: a later
+            # waiter may have more time left. Each waiter is bounded by its own deadline below.
+            with deadlines.detached():
+                shared = asyncio.ensure_future(self._call(prompt, task, timeout, generation_config))
+            self._pending[key] = shared
+            shared.add_done_callback(lambda done: self._finish_shared(key, done))
+        # shield: one waiter giving up (e.g. at its request deadline) must not cancel the call for the others
+        return await deadlines.bounded(asyncio.shield(shared), task=f"{task}.coalesced")
+
+    def _finish_shared(self, key: str, task: asyncio.Task) -> None:
+        self._pending.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # retrieved here in case every waiter already gave up
+
+    async def _admit(self, task: str) -> None:
+        """Circuit breaker, then rate limit. Raises instead of waiting when the call would be wasted."""
+        if _background.get():
+            self._admit_background(task)
+            return
+        if not self.breaker.allow():
+            metrics.increment("llm.breaker_rejected")
+            raise CircuitOpenError(f"LLM circuit open - skipping '{task}' call")
+        if self.rate_limiter is None or self.rate_limiter.try_acquire():
+            return
+        wait = self.rate_limiter.time_until_available()
+        if wait <= self.rate_limit_max_wait:
+            await asyncio.sleep(wait)
+            if self.rate_limiter.try_acquire():
+                return
+        self.breaker.release()
+        metrics.increment("llm.rate_limited")
+        raise RateLimitedError(f"LLM rate limit reached for '{task}'")
+
+    def background_available(self) -> bool:
+        """Whether a background call would be admitted now (nothing is taken)."""
+        return (self.breaker.state == CircuitBreaker.CLOSED and self.in_flight < self.background_max_in_flight
+                and (self.background_limiter is None or self.background_limiter.time_until_available() == 0))
+
+    def _admit_background(self, task: str) -> None:
+        """Background calls never take the half-open probe, a busy slot or an interactive rate-limit token."""
+        if self.breaker.state != CircuitBreaker.CLOSED:
+            metrics.increment("llm.background_rejected")
+            raise CircuitOpenError(f"LLM circuit not closed - skipping background '{task}' call")
+        if self.in_flight >= self.background_max_in_flight or (
+            self.background_limiter is not None and not self.background_limiter.try_acquire()
+        ):
+            metrics.increment("llm.background_rejected")
+            raise RateLimitedError(f"No background LLM capacity for '{task}'")
+
+    async def _call(self, prompt: str, task: str, timeout: float, generation_config: Dict, deadline_bound: bool = False) -> str:
+        await self._admit(task)
+        metrics.increment("llm.upstream_calls")
+        if _background.get():
+            metrics.increment("llm.background_calls")
+            # Best effort: errors go to the caller without moving the breaker (or the latency SLO on timeouts)
+            try:
+                return await asyncio.wait_for(self._generate(prompt, task, generation_config), timeout=timeout)
+            except asyncio.TimeoutError:
+                raise LLMTimeoutError(f"Background LLM call for '{task}' timed out after {timeout:.1f}s")
+        try:
+            if self.hedging.applies_to(task):
+                call = self._generate_hedged(prompt, task, generation_config)
+            else:
+                call = self._generate(prompt, task, generation_config)
+            result = await asyncio.wait_for(call, timeout=timeout)
+        except asyncio.TimeoutError:
+            if deadline_bound:
+                # The request ran out of budget; that says nothing about the upstream's health
+                self.breaker.release()
+                metrics.increment(f"llm.deadline_cut.{task}")
+                raise DeadlineExceededError(f"Request deadline reached during '{task}' call ({timeout:.1f}s left)")
+            logger.warning(f"LLM call for '{task}' timed out after {timeout:.1f}s")
+            error = LLMTimeoutError(f"LLM call for '{task}' timed out after {timeout:.1f}s")
+            self.router.record(task, timeout * 1000)
+            self.breaker.record_failure(error)
+            raise error
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception as e:
+            self.breaker.record_failure(e)
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def stream(self, prompt: str, task: str = "default", timeout: Optional[float] = None, **generation_config) -> AsyncIterator[str]:
+        """Streams generated text chunks as they arrive; the timeout bounds the whole stream."""
+        timeout = timeout if timeout is not None else self.timeout_for(task)
+        generation_config = self.router.apply(task, generation_config)
+        timeout, deadline_bound = deadlines.clamp(timeout, task)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        await self._admit(task)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            self.breaker.release()
+            raise LLMTimeoutError(f"LLM stream for '{task}' timed out waiting for a slot")
+
+        metrics.increment("llm.upstream_calls")
+        self.in_flight += 1
+        outcome_recorded = False
+        started = time.perf_counter()
+        chunks = self.provider.stream(prompt, task, generation_config, model=self.router.model_for(task))
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(chunks.__anext__(), timeout=max(0.0, deadline - loop.time()))
+                except StopAsyncIteration:
+                    if not outcome_recorded:
+                        self.breaker.record_success()
+                        outcome_recorded = True
+                    self.router.record(task, (time.perf_counter() - started) * 1000)
+                    break
+                except asyncio.TimeoutError:
+                    if deadline_bound:
+                        metrics.increment(f"llm.deadline_cut.{task}")
+                        raise DeadlineExceededError(f"Request deadline reached during '{task}' stream")
+                    logger.warning(f"LLM stream for '{task}' timed out after {timeout:.1f}s")
+                    raise LLMTimeoutError(f"LLM stream for '{task}' timed out after {timeout:.1f}s")
+                if item:
+                    if not outcome_recorded:
+                        # First chunk proves the upstream is serving
+                        self.breaker.record_success()
+                        outcome_recorded = True
+                    yield item
+        except Exception as e:
+            if not outcome_recorded and not isinstance(e, DeadlineExceededError):
+                self.breaker.record_failure(e)
+                outcome_recorded = True
+            raise
+        finally:
+            if not outcome_recorded:
+                self.breaker.release()
+            await chunks.aclose()
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def _generate(self, prompt: str, task: str, generation_config: Dict, timing: Optional[Dict[str, float]] = None) -> str:
+        """One upstream call. With `timing`, its start time is stored there and the caller records the latency."""
+        async with self._semaphore:
+            self.in_flight += 1
+            started = time.perf_counter()
+            if timing is not None:
+                timing["started"] = started
+            try:
+                result = await self.provider.generate(prompt, task, generation_config, model=self.router.model_for(task))
+            finally:
+                self.in_flight -= 1
+            # Upstream time only (not the wait for a slot), so queueing doesn't trigger a downgrade
+            if timing is None:
+                self.router.record(task, (time.perf_counter() - started) * 1000)
+            return result
+
+    def _can_hedge(self, task: str) -> bool:
+        """A hedge is extra load, so it is only sent while the upstream is healthy and has spare capacity."""
+        if self.breaker.state != CircuitBreaker.CLOSED or self._semaphore.locked():
+            return False
+        # Budget first, so a hedge the budget refuses doesn't use up a rate-limit token
+        if not self.hedging.has_budget(task):
+            return False
+        if self.rate_limiter is not None and not self.rate_limiter.try_acquire():
+            return False
+        self.hedging.spend(task)
+        return True
+
+    async def _generate_hedged(self, prompt: str, task: str, generation_config: Dict) -> str:
+        """
+        _generate, plus a second identical call if the first hasn't answered by the task's tracked latency
+        percentile (LLM_HEDGE_PERCENTILE). The first successful answer wins and the other call is cancelled.
+        One latency sample is recorded per call: the primary's time, which is a lower bound when the hedge won.
+        Recording the winner instead would drag the tracked p90 down and hide slow primaries from the SLO.
+        """
+        self.hedging.earn()
+        timing: Dict[str, float] = {}
+        primary = asyncio.ensure_future(self._generate(prompt, task, generation_config, timing))
+        delay_ms = self.router.latency_percentile(task, self.hedging.percentile, self.hedging.min_samples)
+        running = {primary}
+        try:
+            if delay_ms is not None:
+                done, _ = await asyncio.wait(running, timeout=max(delay_ms, self.hedging.min_delay_ms) / 1000)
+            if delay_ms is None or done or not self._can_hedge(task):
+                result = await primary
+                self.router.record(task, (time.perf_counter() - timing["started"]) * 1000)
+                return result
+            metrics.increment("llm.upstream_calls")
+            hedge = asyncio.ensure_future(self._generate(prompt, task, generation_config, {}))
+            running.add(hedge)
+            while running:
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    if finished.exception() is None:
+                        if finished is hedge:
+                            self.hedging.record_win(task)
+                        self.router.record(task, (time.perf_counter() - timing["started"]) * 1000)
+                        return finished.result()
+            # Both failed: surface the original call's error
+            return primary.result()
+        finally:
+            for pending in running:
+                if not pending.done():
+                    pending.cancel()
+
+    def status(self) -> Dict:
+        return {
+            "circuit": self.breaker.status(),
+            "rate_limit": self.rate_limiter.status() if self.rate_limiter is not None else None,
+            "background_rate_limit": self.background_limiter.status() if self.background_limiter is not None else None,
+            "provider": self.provider.name,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "routes": self.router.status(),
+            "hedging": self.hedging.status(),
+        }
+
+    def close(self):
+        """Cleanup resources"""
+        self.provider.close()
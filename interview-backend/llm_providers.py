@@ -0,0 +1,302 @@
+"""
+LLM Providers - the backends LLMClient sends prompts to
+GeminiProvider calls the real Gemini API; StubProvider returns schema-valid canned output with simulated
+latency and errors so the server can be load-tested offline (LLM_PROVIDER=stub)
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Dict, Optional
+
+
+class LLMProvider(ABC):
+    """
+    Interface used by LLMClient; subclasses must implement generate(). Timeouts, concurrency limits, the circuit breaker and model routing live in
+    the client; `model` is the routed model name (None for the provider's default model).
+    """
+
+    name = "base"
+
+    @abstractmethod
+    async def generate(self, prompt: str, task: str, generation_config: Dict, model: Optional[str] = None) -> str:
+        """Full response text for the prompt."""
+
+    async def stream(self, prompt: str, task: str, generation_config: Dict, model: Optional[str] = None) -> AsyncIterator[str]:
+        """Default: one chunk with the full response."""
+        yield await self.generate(prompt, task, generation_config, model=model)
+
+    def close(self):
+        pass
+
+
+class GeminiProvider(LLMProvider):
+    """Blocking google-generativeai SDK calls run in a dedicated thread pool."""
+
+    name = "gemini"
+
+    def __init__(self, api_key: str, model_name: Optional[str] = None, max_workers: int = 16):
+        import google.generativeai as genai
+        from google.generativeai.types import HarmCategory, HarmBlockThreshold
+
+        self._genai = genai
+        genai.configure(api_key=api_key)
+
+        # Safety settings to prevent blocking (use proper enum values)
+        self._safety_settings = safety_settings = [
+            {"category": category, "threshold": HarmBlockThreshold.BLOCK_NONE}
+            for category in [
+                HarmCategory.HARM_CATEGORY_HARASSMENT,
+                HarmCategory.HARM_CATEGORY_HATE_SPEECH,
+                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
+                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
+            ]
+        ]
+        # Using flash for lower quota usage
+        self.model_name = model_name or os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+        self.model = genai.GenerativeModel(self.model_name, safety_settings=safety_settings)
+        self._models: Dict[str, object] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+
+    def _model(self, model_name: Optional[str]):
+        """GenerativeModel for a routed model name, created once per name."""
+        if not model_name or model_name == self.model_name:
+            return self.model
+        if model_name not in self._models:
+            self._models[model_name] = self._genai.GenerativeModel(model_name, safety_settings=self._safety_settings)
+        return self._models[model_name]
+
+    def _generation_kwargs(self, generation_config: Dict) -> Dict:
+        if not generation_config:
+            return {}
+        return {"generation_config": self._genai.types.GenerationConfig(**generation_config)}
+
+    async def generate(self, prompt: str, task: str, generation_config: Dict, model: Optional[str] = None) -> str:
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            self._executor,
+            partial(self._model(model).generate_content, prompt, **self._generation_kwargs(generation_config)),
+        )
+        # response.text raises if the candidate was blocked; callers fall back on any exception
+        return (response.text or "").strip()
+
+    async def stream(self, prompt: str, task: str, generation_config: Dict, model: Optional[str] = None) -> AsyncIterator[str]:
+        """The SDK's blocking stream iterator runs in the thread pool and hands chunks over through a queue."""
+        loop = asyncio.get_running_loop()
+        kwargs = self._generation_kwargs(generation_config)
+        generative_model = self._model(model)
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        stop = threading.Event()
+
+        def publish(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                stop.set()  # event loop already closed
+
+        def produce():
+            try:
+                for chunk in generative_model.generate_content(prompt, stream=True, **kwargs):
+                    if stop.is_set():
+                        return
+                    publish(chunk.text or "")
+                publish(finished)
+            except Exception as e:
+                publish(e)
+
+        loop.run_in_executor(self._executor, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                if item:
+                    yield item
+        finally:
+            stop.set()
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Median simulated latency (ms) per task, roughly matching gemini-2.5-flash
+STUB_TASK_LATENCY_MS: Dict[str, float] = {
+    "plan": 1500,
+    "question": 600,
+    "coding_question": 900,
+    "mcq": 700,
+    "mcq_batch": 2500,
+    "ats_review": 2500,
+    "summary": 2000,
+    "feedback": 1200,
+    "feedback_batch": 3000,
+    "hint": 500,
+}
+
+# Simulated speed-up of lighter model tiers, matched on the routed model name
+STUB_MODEL_LATENCY_FACTOR: Dict[str, float] = {
+    "lite": 0.5,
+}
+
+
+class StubProvider(LLMProvider):
+    """
+    Local stand-in for Gemini. Output is picked by task name and is valid for the parsers in GeminiService.
+    Latency is log-normal around a per-task median (LLM_STUB_LATENCY_MS_<TASK>, scaled by LLM_STUB_LATENCY_SCALE
+    and by STUB_MODEL_LATENCY_FACTOR for lighter routed models, spread by LLM_STUB_LATENCY_SIGMA). LLM_STUB_ERROR_RATE / LLM_STUB_QUOTA_ERROR_RATE inject failures.
+    """
+
+    name = "stub"
+
+    BEHAVIORAL_TOPICS = [
+        "a time you disagreed with a teammate", "a project that missed its deadline", "mentoring a new engineer",
+        "a production incident you owned", "pushing back on a product requirement", "learning a new technology quickly",
+        "a decision made with incomplete data", "improving a slow process", "receiving difficult feedback",
+        "balancing speed and quality",
+    ]
+    CODING_PROBLEMS = [
+        ("Given an array of integers, return the length of the longest strictly increasing subsequence.", "def longest_increasing_subsequence(nums):\n    pass"),
+        ("Merge a list of overlapping intervals and return the merged list sorted by start.", "def merge_intervals(intervals):\n    pass"),
+        ("Return the k most frequent words in a list, ties broken alphabetically.", "def top_k_words(words, k):\n    pass"),
+        ("Determine whether a binary tree is height-balanced.", "def is_balanced(root):\n    pass"),
+        ("Find the number of islands in a 2D grid of '1's and '0's.", "def num_islands(grid):\n    pass"),
+    ]
+    MCQ_BANK = [
+        ("Which data structure gives O(1) average lookup by key?", ["A: Linked list", "B: Hash map", "C: Binary heap", "D: Sorted array"], 1),
+        ("What does HTTP status 429 mean?", ["A: Not found", "B: Unauthorized", "C: Too many requests", "D: Bad gateway"], 2),
+        ("Which sorting algorithm is stable?", ["A: Quick sort", "B: Heap sort", "C: Selection sort", "D: Merge sort"], 3),
+        ("What is the time complexity of binary search?", ["A: O(log n)", "B: O(n)", "C: O(n log n)", "D: O(1)"], 0),
+        ("Which isolation level prevents dirty reads but allows non-repeatable reads?", ["A: Read uncommitted", "B: Read committed", "C: Repeatable read", "D: Serializable"], 1),
+    ]
+
+    def __init__(self, latency_scale: Optional[float] = None, latency_sigma: Optional[float] = None,
+                 error_rate: Optional[float] = None, quota_error_rate: Optional[float] = None, seed: Optional[int] = None):
+        self.latency_scale = latency_scale if latency_scale is not None else float(os.getenv("LLM_STUB_LATENCY_SCALE", "1.0"))
+        self.latency_sigma = latency_sigma if latency_sigma is not None else float(os.getenv("LLM_STUB_LATENCY_SIGMA", "0.4"))
+        self.error_rate = error_rate if error_rate is not None else float(os.getenv("LLM_STUB_ERROR_RATE", "0"))
+        self.quota_error_rate = quota_error_rate if quota_error_rate is not None else float(os.getenv("LLM_STUB_QUOTA_ERROR_RATE", "0"))
+        self.task_latency_ms = {
+            task: float(os.getenv(f"LLM_STUB_LATENCY_MS_{task.upper()}", ms)) for task, ms in STUB_TASK_LATENCY_MS.items()
+        }
+        self.default_latency_ms = float(os.getenv("LLM_STUB_LATENCY_MS", "800"))
+        seed = seed if seed is not None else os.getenv("LLM_STUB_SEED")
+        self._random = random.Random(int(seed) if seed is not None else None)
+        self.calls = 0
+
+    def sample_latency(self, task: str, model: Optional[str] = None) -> float:
+        """Seconds to wait for this call."""
+        median_ms = self.task_latency_ms.get(task, self.default_latency_ms) * self.latency_scale
+        for marker, factor in STUB_MODEL_LATENCY_FACTOR.items():
+            if model and marker in model:
+                median_ms *= factor
+        if median_ms <= 0:
+            return 0.0
+        return self._random.lognormvariate(0.0, self.latency_sigma) * median_ms / 1000
+
+    def _maybe_fail(self, task: str):
+        roll = self._random.random()
+        if roll < self.quota_error_rate:
+            raise RuntimeError(f"429 Resource has been exhausted (e.g. check quota). [stub {task}]")
+        if roll < self.quota_error_rate + self.error_rate:
+            raise RuntimeError(f"500 An internal error has occurred. [stub {task}]")
+
+    async def generate(self, prompt: str, task: str, generation_config: Dict, model: Optional[str] = None) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.sample_latency(task, model))
+        self._maybe_fail(task)
+        return self.respond(prompt, task)
+
+    async def stream(self, prompt: str, task: str, generation_config: Dict, model: Optional[str] = None) -> AsyncIterator[str]:
+        """First chunk after ~40% of the sampled latency, the rest spread over the remainder."""
+        self.calls += 1
+        latency = self.sample_latency(task, model)
+        await asyncio.sleep(latency * 0.4)
+        self._maybe_fail(task)
+        text = self.respond(prompt, task)
+        chunks = [text[i:i + 24] for i in range(0, len(text), 24)] or [""]
+        for chunk in chunks:
+            yield chunk
+            await asyncio.sleep(latency * 0.6 / len(chunks))
+
+    def respond(self, prompt: str, task: str) -> str:
+        pick = self._random.choice
+        if task == "plan":
+            years = re.search(r"(\d+) years", prompt)
+            years = int(years.group(1)) if years else 3
+            rounds = [{"title": "Recruiter Screen", "type": "behavioral", "question_count": 2, "estimated_minutes": 20},
+                      {"title": "Online Assessment", "type": "mcq", "question_count": pick([3, 4, 5]), "estimated_minutes": 15},
+                      {"title": "Coding Interview", "type": "dsa", "question_count": pick([1, 2]), "estimated_minutes": 45}]
+            if years >= 3:
+                rounds.append({"title": "System Design", "type": "technical", "question_count": 1, "estimated_minutes": 45})
+            if years >= 6:
+                rounds.append({"title": "Leadership", "type": "behavioral", "question_count": 2, "estimated_minutes": 30})
+            rounds.append({"title": "Team Fit", "type": "behavioral", "question_count": pick([1, 2]), "estimated_minutes": 25})
+            return json.dumps(rounds)
+        if task == "question":
+            return f"Tell me about {pick(self.BEHAVIORAL_TOPICS)} - what did you do and what was the outcome? (#{self.calls})"
+        if task == "coding_question":
+            question, initial_code = pick(self.CODING_PROBLEMS)
+            return json.dumps({"question": f"{question} (variant {self.calls})", "initial_code": initial_code})
+        if task == "mcq":
+            question, options, correct = pick(self.MCQ_BANK)
+            return json.dumps({"question": f"{question} (#{self.calls})", "options": options, "correct_answer": options[correct]})
+        if task == "mcq_batch":
+            count = re.search(r"Generate exactly (\d+)", prompt)
+            items = []
+            for i in range(int(count.group(1)) if count else 5):
+                question, options, correct = pick(self.MCQ_BANK)
+                items.append({"question": f"{question} (#{self.calls}.{i})", "options": options, "correct_answer": options[correct]})
+            return json.dumps(items)
+        if task == "feedback":
+            return json.dumps(self._feedback())
+        if task == "feedback_batch":
+            count = len(re.findall(r"^\[(\d+)\]$", prompt, flags=re.MULTILINE)) or 1
+            return json.dumps([{"index": i, **self._feedback()} for i in range(count)])
+        if task == "summary":
+            return json.dumps({
+                "strengths": ["Clear communication", "Structured problem solving", "Concrete examples"],
+                "areas_for_improvement": ["Quantify impact", "Discuss trade-offs earlier", "Test edge cases"],
+                "recommendations": ["Practice system design", "Use the STAR method", "Time-box coding problems"],
+                "overall_feedback": "Solid interview overall with good structure; focus on measurable outcomes and trade-offs.",
+            })
+        if task == "ats_review":
+            return json.dumps({
+                "ats_score": self._random.randint(55, 90),
+                "strengths": ["Relevant experience", "Clear formatting", "Quantified achievements"],
+                "weaknesses": ["Missing some job keywords", "Summary is generic"],
+                "recommendations": ["Mirror the job description wording", "Lead with impact", "List core skills explicitly"],
+                "keyword_match_percentage": self._random.randint(40, 85),
+                "overall_feedback": "The resume fits the role reasonably well. Tailoring keywords would improve ATS ranking.",
+            })
+        if task == "hint":
+            return "Think about a concrete situation first, then walk through your actions and the measurable result."
+        return "OK"
+
+    def _feedback(self) -> Dict:
+        return {
+            "score": self._random.randint(4, 9),
+            "strengths": ["Clear structure", "Relevant example"],
+            "weaknesses": ["Could quantify the result"],
+            "feedback_text": "Good answer with a relevant example; add measurable outcomes to make it stronger.",
+        }
+
+
+def create_provider(name: Optional[str] = None, api_key: Optional[str] = None, max_workers: int = 16) -> LLMProvider:
+    """Builds the provider selected by LLM_PROVIDER (gemini by default, or stub)."""
+    name = (name or os.getenv("LLM_PROVIDER", "gemini")).lower()
+    if name == "stub":
+        return StubProvider()
+    if name == "gemini":
+        if not api_key:
+            raise ValueError("GOOGLE_API_KEY environment variable not set. Please create interview-backend/.env with GOOGLE_API_KEY=<your_key>, or set LLM_PROVIDER=stub.")
+        return GeminiProvider(api_key, max_workers=max_workers)
+    raise ValueError(f"Unknown LLM_PROVIDER '{name}' (expected 'gemini' or 'stub')")
@@ -1,10 +1,15 @@
 import os
 import json
-from typing import List, Optional, Dict, Any, Union
+import random
+import asyncio
+import time
+import uuid
+from collections import deque
+from typing import AsyncIterator, Callable, List, Optional, Dict, Any, Union
 from datetime import datetime
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 import google.generativeai as genai
@@ -19,7 +24,20 @@ from PyPDF2 import PdfReader
 import google.generativeai as genai
 from voice_service import VoiceService
 from avatar_service import AvatarService
-from vision_service import VisionService
+from vision_pool import VisionPoolBusyError, VisionTrackerPool
+import deadlines
+from circuit_breaker import CircuitOpenError
+from deadlines import DeadlineExceededError, DeadlineMiddleware
+from llm_client import LLMClient, background as llm_background, in_background as llm_in_background
+from llm_providers import create_provider
+from novelty_index import NoveltyIndex
+from plan_cache import PlanCache
+from question_bank import QuestionBank, DEFAULT_BANK_PATH, question_fingerprint
+from hint_cache import HintCache
+from json_stream import IncrementalJSONParser
+from metrics import metrics
+from session_aggregates import InterviewAggregates
+from structured_output import array_of, json_generation_config, parse_llm_json, record_fallback, schema_from_model
 
 # Logging setup
 import logging
@@ -30,39 +48,9 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 API_KEY = os.getenv("GOOGLE_API_KEY")
 
-if not API_KEY:
-    raise ValueError("GOOGLE_API_KEY environment variable not set. Please create interview-backend/.env with GOOGLE_API_KEY=<your_key>.")
-
-# Configure the Gemini client
-genai.configure(api_key=API_KEY)
-
-# Safety settings to prevent blocking (use proper enum values)
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
-
-SAFETY_SETTINGS = [
-    {
-        "category": HarmCategory.HARM_CATEGORY_HARASSMENT,
-        "threshold": HarmBlockThreshold.BLOCK_NONE,
-    },
-    {
-        "category": HarmCategory.HARM_CATEGORY_HATE_SPEECH,
-        "threshold": HarmBlockThreshold.BLOCK_NONE,
-    },
-    {
-        "category": HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
-        "threshold": HarmBlockThreshold.BLOCK_NONE,
-    },
-    {
-        "category": HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
-        "threshold": HarmBlockThreshold.BLOCK_NONE,
-    },
-]
-
-# Initialize the Gemini model - using flash for lower quota usage
-model = genai.GenerativeModel(
-    'gemini-2.5-flash',
-    safety_settings=SAFETY_SETTINGS
-)
+# Shared async client - every LLM call goes through it so slow generations don't block the event loop.
+# LLM_PROVIDER=stub swaps Gemini for a local latency-simulating stub (no GOOGLE_API_KEY needed)
+llm_client = LLMClient(create_provider(api_key=API_KEY, max_workers=int(os.getenv("LLM_MAX_CONCURRENCY", "16"))))
 
 app = FastAPI()
 
@@ -82,11 +70,11 @@ except Exception as e:
     avatar_service = None
 
 try:
-    vision_service = VisionService()
-    logger.info("Vision service initialized successfully")
+    vision_pool = VisionTrackerPool()
+    logger.info("Vision tracker pool initialized successfully")
 except Exception as e:
     logger.warning(f"Vision service initialization failed: {e}")
-    vision_service = None
+    vision_pool = None
 
 # Loosen CORS for local development including IDE/browser preview proxies
 app.add_middleware(
@@ -96,9 +84,20 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Per-endpoint request deadlines; upstream calls inside a request clamp their timeouts to what is left
+app.add_middleware(DeadlineMiddleware)
 
 session_data: Dict[str, Any] = {}
 sessions: Dict[str, Any] = {}  # New session storage for comprehensive tracking
+plan_cache = PlanCache()  # Shared by /api/preview-plan and /api/start-interview
+hint_cache = HintCache()  # Shared across sessions; empty-answer hints are pre-generated when a question is served
+HINT_PREWARM = os.getenv("HINT_PREWARM", "1").lower() not in ["0", "false", "no"]
+
+# Pre-generated questions; filled offline by `python question_bank.py` and refilled in the background
+question_bank = QuestionBank()
+_banked = question_bank.load(os.getenv("QUESTION_BANK_PATH", DEFAULT_BANK_PATH))
+if _banked:
+    logger.info(f"Loaded {_banked} pre-generated questions into the question bank")
 
 # Ensure static directories exist and mount static files for serving generated avatar videos
 BASE_DIR = os.path.dirname(__file__)
@@ -134,17 +133,20 @@ class FeedbackResponse(BaseModel):
     strengths: List[str]
     weaknesses: List[str]
     feedback_text: str
+    provisional: bool = Field(default=False, description="Local provisional score; the AI grade arrives when the round is batch-graded.")
 
 class InterviewStartResponse(BaseModel):
     message: str
     sessionId: str
     questionData: Union[QuestionResponse, CodingQuestionResponse, MCQQuestionResponse]
+    questionId: Optional[str] = Field(default=None, description="Ledger ID of the served question.")
     roundTitle: str
     isComplete: bool
     feedback: FeedbackResponse | None = Field(default=None)
 
 class InterviewSubmitResponse(BaseModel):
     questionData: Union[QuestionResponse, CodingQuestionResponse, MCQQuestionResponse]
+    questionId: Optional[str] = Field(default=None, description="Ledger ID of the served question.")
     roundTitle: str
     isComplete: bool
     feedback: FeedbackResponse | None = Field(default=None)
@@ -182,6 +184,7 @@ class PlanPreviewResponse(BaseModel):
     total_estimated_minutes: int
     is_ai_generated: bool
     generation_source: str
+    plan_id: Optional[str] = Field(default=None, description="Pass as planId to /api/start-interview to use this exact plan.")
 
 # New Pydantic model for TTS request (used by ElevenLabs VoiceService)
 class TTSRequest(BaseModel):
@@ -232,7 +235,16 @@ class ResumeParserService:
 @app.post("/generate_avatar", response_model=GenerateAvatarResponse)
 async def generate_avatar(req: GenerateAvatarRequest):
     try:
-        out_path = avatar_service.generate_video(req.text, voice=req.voice, emotion=req.emotion)
+        # Blocking TTS + video synthesis runs in a worker thread, bounded by the request deadline
+        budget = deadlines.remaining()
+        try:
+            out_path = await deadlines.bounded(
+                asyncio.to_thread(avatar_service.generate_video, req.text, voice=req.voice, emotion=req.emotion, timeout=budget),
+                task="avatar",
+            )
+        except DeadlineExceededError:
+            # Out of time - the sample video is a local file copy
+            out_path = avatar_service.generate_video(req.text, voice=req.voice, emotion=req.emotion, timeout=0)
         if not out_path:
             raise HTTPException(status_code=500, detail="Avatar generation failed.")
 
@@ -247,6 +259,88 @@ async def generate_avatar(req: GenerateAvatarRequest):
         print(f"/generate_avatar error: {e}")
         raise HTTPException(status_code=500, detail="Internal server error generating avatar")
 
+# Local fallback banks served when Gemini is unavailable
+FALLBACK_QUESTION_SETS = {
+    "amazon": [
+        "Tell me about a time you had to dive deep into a problem to find the root cause.",
+        "Describe a situation where you had to be right, a lot, despite initial disagreement.",
+        "Give me an example of when you took ownership of a problem that wasn't originally yours.",
+        "Tell me about a time you had to invent and simplify a complex process."
+    ],
+    "google": [
+        "Describe a time you collaborated with a team to solve a complex technical problem.",
+        "Tell me about a project where you had to think outside the box.",
+        "Give me an example of when you had to learn something completely new to accomplish a goal.",
+        "Describe a time you had to make a decision with ambiguous requirements."
+    ],
+    "default": [
+        "Tell me about a challenging project you led and how you ensured its success.",
+        "Describe a time you had to influence stakeholders without direct authority.",
+        "Give me an example of when you had to adapt quickly to changing priorities.",
+        "Tell me about a time you received difficult feedback and how you handled it."
+    ]
+}
+
+FALLBACK_CODING_PROBLEMS = {
+    "junior": [
+        {"question": "Find the first non-repeating character in a string.", "initial_code": "def first_unique_char(s):\n    # Your solution here\n    pass"},
+        {"question": "Check if two strings are anagrams of each other.", "initial_code": "def is_anagram(s1, s2):\n    # Your solution here\n    pass"},
+        {"question": "Find the maximum element in a rotated sorted array.", "initial_code": "def find_max(nums):\n    # Your solution here\n    pass"}
+    ],
+    "mid": [
+        {"question": "Implement a function to serialize and deserialize a binary tree.", "initial_code": "def serialize(root):\n    # Your solution here\n    pass\n\ndef deserialize(data):\n    # Your solution here\n    pass"},
+        {"question": "Find the longest increasing subsequence in an array.", "initial_code": "def longest_increasing_subsequence(nums):\n    # Your solution here\n    pass"},
+        {"question": "Design a data structure that supports insert, delete, and getRandom in O(1).", "initial_code": "class RandomizedSet:\n    def __init__(self):\n        # Your implementation here\n        pass"}
+    ],
+    "senior": [
+        {"question": "Design a distributed cache system with LRU eviction policy.", "initial_code": "class DistributedLRUCache:\n    def __init__(self, capacity):\n        # Your implementation here\n        pass"},
+        {"question": "Implement a rate limiter that can handle millions of requests per second.", "initial_code": "class RateLimiter:\n    def __init__(self, max_requests, time_window):\n        # Your implementation here\n        pass"},
+        {"question": "Design an algorithm to find the shortest path in a weighted graph with negative edges.", "initial_code": "def shortest_path_negative_edges(graph, start, end):\n    # Your solution here\n    pass"}
+    ]
+}
+
+FALLBACK_MCQ = {
+    "question": "Which of the following is not a programming language?",
+    "options": ["A: Python", "B: JavaScript", "C: HTML", "D: C++"],
+    "correct_answer": "C: HTML",
+}
+
+def is_fallback_question(question_text: str) -> bool:
+    """True if the text comes from one of the local fallback banks rather than the model."""
+    if question_text == FALLBACK_MCQ["question"]:
+        return True
+    if any(question_text in questions for questions in FALLBACK_QUESTION_SETS.values()):
+        return True
+    return any(question_text == p["question"] for problems in FALLBACK_CODING_PROBLEMS.values() for p in problems)
+
+def fallback_company_key(company_name: str) -> str:
+    return "amazon" if "amazon" in company_name.lower() else "google" if "google" in company_name.lower() else "default"
+
+def fallback_level(years_of_experience: int) -> str:
+    return "junior" if years_of_experience <= 2 else "senior" if years_of_experience >= 6 else "mid"
+
+def pick_novel(candidates: List[Any], novelty: Optional[NoveltyIndex], text=lambda c: c) -> Optional[Any]:
+    """Random candidate that isn't a near duplicate of anything in `novelty`; None if every candidate is."""
+    novel = [c for c in candidates if novelty is None or not novelty.is_near_duplicate(text(c))]
+    return random.choice(novel) if novel else None
+
+def covered_topics_block(novelty: Optional[NoveltyIndex], limit: int = 8) -> str:
+    """Prompt lines listing questions already asked, so generation steers away from them ('' if none)."""
+    covered = novelty.recent(limit) if novelty is not None else []
+    if not covered:
+        return ""
+    return "Already covered in this interview - pick a different topic:\n" + "\n".join(f"- {text[:120]}" for text in covered)
+
+# Response schemas for structured (JSON mode) generation, derived from the API models.
+# Fields filled in by the backend (type, provisional) are left out.
+PLAN_SCHEMA = array_of(schema_from_model(PlanItem, enums={"type": ["behavioral", "technical", "dsa", "mcq"]}))
+CODING_QUESTION_SCHEMA = schema_from_model(CodingQuestionResponse, exclude=["type"])
+MCQ_SCHEMA = schema_from_model(MCQQuestionResponse, exclude=["type"])
+ATS_REVIEW_SCHEMA = schema_from_model(ATSReviewResponse)
+FEEDBACK_SCHEMA = schema_from_model(FeedbackResponse, exclude=["provisional"])
+FEEDBACK_BATCH_SCHEMA = array_of(schema_from_model(FeedbackResponse, exclude=["provisional"], extra={"index": {"type": "integer"}}))
+SUMMARY_SCHEMA = schema_from_model(InterviewSummaryResponse, include=["strengths", "areas_for_improvement", "recommendations", "overall_feedback"])
+
 class GeminiService:
     @staticmethod
     async def extract_candidate_profile(resume_text: str | None, job_description: str | None) -> Dict[str, Any]:
@@ -305,22 +399,14 @@ Return ONLY a JSON array in this format:
 Types: behavioral, technical, dsa, mcq
 Vary rounds based on company culture. Token: {nonce}"""
             
-            response = model.generate_content(
+            raw = await llm_client.generate(
                 simple_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=2000
-                )
+                task="plan",
+                coalesce=False,  # nonce in the prompt - variety is intended
+                temperature=0.7,
+                **json_generation_config(PLAN_SCHEMA)
             )
-            raw = (response.text or "").strip()
-            # Extract JSON array from response
-            start = raw.find('[')
-            end = raw.rfind(']') + 1
-            if start >= 0 and end > start:
-                json_str = raw[start:end]
-                plan = json.loads(json_str)
-            else:
-                raise ValueError("No JSON array found in response")
+            plan = parse_llm_json(raw, "plan", expect=list, required=["title"])
             
             # Validate and normalize the plan
             for r in plan:
@@ -352,9 +438,12 @@ Vary rounds based on company culture. Token: {nonce}"""
             return plan, True, f"AI-generated plan using Gemini for {company_name} {job_role} with {years_of_experience} years experience"
         except Exception as e:
             print(f"Error generating interview plan: {e}")
-            # Check if it's a quota error and wait briefly
+            record_fallback("plan")
+            # Quota errors and an open circuit both go straight to the fallback plan
             if "quota" in str(e).lower() or "429" in str(e):
                 print("Quota exceeded - using enhanced fallback plan")
+            elif isinstance(e, CircuitOpenError):
+                print("LLM circuit open - using enhanced fallback plan")
             
             # Enhanced realistic fallback with some randomization
             import random
@@ -433,7 +522,8 @@ Vary rounds based on company culture. Token: {nonce}"""
             return base, False, f"Enhanced fallback plan for {company_name} {job_role} ({years_of_experience} YOE) - AI temporarily unavailable"
 
     @staticmethod
-    async def generate_question(job_role: str, years_of_experience: int, company_name: str, round_title: str) -> QuestionResponse:
+    async def generate_question(job_role: str, years_of_experience: int, company_name: str, round_title: str,
+                                novelty: Optional[NoveltyIndex] = None) -> QuestionResponse:
         try:
             import uuid
             import time
@@ -454,50 +544,30 @@ Vary rounds based on company culture. Token: {nonce}"""
             - Mid (3-5): Leadership, mentoring, technical decisions  
             - Senior (6+): Strategy, cross-team impact, driving results
             
+            {covered_topics_block(novelty)}
             Make it specific and unique. Avoid generic questions. Token: {nonce}
             Return only the question text.
             """
             
-            response = model.generate_content(
+            raw = await llm_client.generate(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.95,  # Higher temperature for more variety
-                    max_output_tokens=150
-                )
+                task="question",
+                coalesce=False,  # nonce in the prompt - variety is intended
+                temperature=0.95  # Higher temperature for more variety
             )
             
-            question_text = response.text.strip().replace('```', '').replace('"', '').strip()
+            question_text = raw.replace('```', '').replace('"', '').strip()
             return QuestionResponse(question=question_text, type="behavioral")
         except Exception as e:
             print(f"Error generating question: {e}")
-            # More varied fallback questions based on company/level
-            fallback_sets = {
-                "amazon": [
-                    "Tell me about a time you had to dive deep into a problem to find the root cause.",
-                    "Describe a situation where you had to be right, a lot, despite initial disagreement.",
-                    "Give me an example of when you took ownership of a problem that wasn't originally yours.",
-                    "Tell me about a time you had to invent and simplify a complex process."
-                ],
-                "google": [
-                    "Describe a time you collaborated with a team to solve a complex technical problem.",
-                    "Tell me about a project where you had to think outside the box.",
-                    "Give me an example of when you had to learn something completely new to accomplish a goal.",
-                    "Describe a time you had to make a decision with ambiguous requirements."
-                ],
-                "default": [
-                    "Tell me about a challenging project you led and how you ensured its success.",
-                    "Describe a time you had to influence stakeholders without direct authority.",
-                    "Give me an example of when you had to adapt quickly to changing priorities.",
-                    "Tell me about a time you received difficult feedback and how you handled it."
-                ]
-            }
-            
-            import random
-            company_key = "amazon" if "amazon" in company_name.lower() else "google" if "google" in company_name.lower() else "default"
-            return QuestionResponse(question=random.choice(fallback_sets[company_key]), type="behavioral")
+            record_fallback("question")
+            # More varied fallback questions based on company/level, preferring ones not yet asked
+            options = FALLBACK_QUESTION_SETS[fallback_company_key(company_name)]
+            return QuestionResponse(question=pick_novel(options, novelty) or random.choice(options), type="behavioral")
 
     @staticmethod
-    async def generate_coding_question(job_role: str, years_of_experience: int, company_name: str, round_title: str) -> CodingQuestionResponse:
+    async def generate_coding_question(job_role: str, years_of_experience: int, company_name: str, round_title: str,
+                                       novelty: Optional[NoveltyIndex] = None) -> CodingQuestionResponse:
         try:
             import uuid
             import time
@@ -517,51 +587,26 @@ Vary rounds based on company culture. Token: {nonce}"""
             - Microsoft: Practical, real-world problems
             - Meta: Performance, user experience focus
             
+            {covered_topics_block(novelty)}
             Return JSON: {{"question": "problem description", "initial_code": "def function_name():\\n    pass"}}
             Make it unique and specific. Token: {nonce}
             """
             
-            response = model.generate_content(
+            raw = await llm_client.generate(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.9,  # Higher for more variety
-                    max_output_tokens=300
-                )
+                task="coding_question",
+                coalesce=False,  # nonce in the prompt - variety is intended
+                temperature=0.9,  # Higher for more variety
+                **json_generation_config(CODING_QUESTION_SCHEMA)
             )
-            raw = response.text.strip()
-            # Extract JSON from response
-            start = raw.find('{')
-            end = raw.rfind('}') + 1
-            if start >= 0 and end > start:
-                json_str = raw[start:end]
-                result = json.loads(json_str)
-            else:
-                raise ValueError("No JSON found in response")
+            result = parse_llm_json(raw, "coding_question", required=["question", "initial_code"])
             return CodingQuestionResponse(question=result["question"], initial_code=result["initial_code"], type="technical")
         except Exception as e:
             print(f"Error generating coding question: {e}")
-            # More varied fallback problems by company/level
-            problem_sets = {
-                "junior": [
-                    {"question": "Find the first non-repeating character in a string.", "initial_code": "def first_unique_char(s):\n    # Your solution here\n    pass"},
-                    {"question": "Check if two strings are anagrams of each other.", "initial_code": "def is_anagram(s1, s2):\n    # Your solution here\n    pass"},
-                    {"question": "Find the maximum element in a rotated sorted array.", "initial_code": "def find_max(nums):\n    # Your solution here\n    pass"}
-                ],
-                "mid": [
-                    {"question": "Implement a function to serialize and deserialize a binary tree.", "initial_code": "def serialize(root):\n    # Your solution here\n    pass\n\ndef deserialize(data):\n    # Your solution here\n    pass"},
-                    {"question": "Find the longest increasing subsequence in an array.", "initial_code": "def longest_increasing_subsequence(nums):\n    # Your solution here\n    pass"},
-                    {"question": "Design a data structure that supports insert, delete, and getRandom in O(1).", "initial_code": "class RandomizedSet:\n    def __init__(self):\n        # Your implementation here\n        pass"}
-                ],
-                "senior": [
-                    {"question": "Design a distributed cache system with LRU eviction policy.", "initial_code": "class DistributedLRUCache:\n    def __init__(self, capacity):\n        # Your implementation here\n        pass"},
-                    {"question": "Implement a rate limiter that can handle millions of requests per second.", "initial_code": "class RateLimiter:\n    def __init__(self, max_requests, time_window):\n        # Your implementation here\n        pass"},
-                    {"question": "Design an algorithm to find the shortest path in a weighted graph with negative edges.", "initial_code": "def shortest_path_negative_edges(graph, start, end):\n    # Your solution here\n    pass"}
-                ]
-            }
-            
-            import random
-            level = "junior" if years_of_experience <= 2 else "senior" if years_of_experience >= 6 else "mid"
-            selected = random.choice(problem_sets[level])
+            record_fallback("coding_question")
+            # More varied fallback problems by company/level, preferring ones not yet asked
+            problems = FALLBACK_CODING_PROBLEMS[fallback_level(years_of_experience)]
+            selected = pick_novel(problems, novelty, text=lambda p: p["question"]) or random.choice(problems)
             return CodingQuestionResponse(
                 question=selected["question"],
                 initial_code=selected["initial_code"],
@@ -585,21 +630,14 @@ Vary rounds based on company culture. Token: {nonce}"""
               "correct_answer": "B: A function that remembers the values from its enclosing scope even if the scope is no longer active."
             }}
             """
-            response = model.generate_content(
+            raw = await llm_client.generate(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7
-                )
+                task="mcq",
+                coalesce=False,  # each call should produce a different question
+                temperature=0.7,
+                **json_generation_config(MCQ_SCHEMA)
             )
-            raw = response.text.strip()
-            # Extract JSON from response
-            start = raw.find('{')
-            end = raw.rfind('}') + 1
-            if start >= 0 and end > start:
-                json_str = raw[start:end]
-                result = json.loads(json_str)
-            else:
-                raise ValueError("No JSON found in response")
+            result = parse_llm_json(raw, "mcq", required=["question", "options", "correct_answer"])
             return MCQQuestionResponse(
                 question=result["question"],
                 options=result["options"],
@@ -608,13 +646,79 @@ Vary rounds based on company culture. Token: {nonce}"""
             )
         except Exception as e:
             print(f"Error generating MCQ: {e}")
-            return MCQQuestionResponse(
-                question="Which of the following is not a programming language?",
-                options=["A: Python", "B: JavaScript", "C: HTML", "D: C++"],
-                correct_answer="C: HTML",
-                type="mcq"
-            )
+            record_fallback("mcq")
+            return MCQQuestionResponse(**FALLBACK_MCQ, type="mcq")
     
+    @staticmethod
+    def validate_mcq(item: Any) -> Optional[Dict[str, Any]]:
+        """Returns a cleaned MCQ dict if it has a question, four distinct options and a correct_answer among them."""
+        if not isinstance(item, dict):
+            return None
+        question = str(item.get("question") or "").strip()
+        options = [str(option).strip() for option in item.get("options") or []]
+        correct_answer = str(item.get("correct_answer") or "").strip()
+        if not question or len(options) != 4 or not all(options) or len({o.lower() for o in options}) != 4:
+            return None
+        if correct_answer not in options:
+            # Accept "B", "B:" or the option text without its letter prefix
+            letter = correct_answer.rstrip(":).").upper()
+            matches = [o for o in options if (len(letter) == 1 and o.upper().startswith(letter))
+                       or o.split(":", 1)[-1].strip().lower() == correct_answer.lower()]
+            if len(matches) != 1:
+                return None
+            correct_answer = matches[0]
+        return {"question": question, "options": options, "correct_answer": correct_answer}
+
+    @staticmethod
+    async def generate_mcq_batch(job_role: str, company_name: str, years_of_experience: int, round_title: str,
+                                 count: int, avoid: List[str], seen_fingerprints: Optional[set] = None,
+                                 novelty: Optional[NoveltyIndex] = None) -> List[MCQQuestionResponse]:
+        """
+        Generates up to `count` distinct MCQs for a round in one call. `avoid` question texts are listed in
+        the prompt; invalid items, questions already in `avoid`/`seen_fingerprints` (or repeated within
+        the batch) and near duplicates of questions in `novelty` are dropped, so the result may be shorter.
+        """
+        try:
+            nonce = uuid.uuid4().hex[:8]
+            avoid_block = "\n".join(f"- {text[:120]}" for text in avoid[-15:]) or "- (none yet)"
+            prompt = f"""Generate exactly {count} distinct multiple-choice questions for the '{round_title}' round of a {job_role} interview at {company_name} ({years_of_experience} YOE).
+
+Cover different topics; match the difficulty to the experience level. Each question must have exactly four options (A, B, C, D) and a single correct answer.
+
+Do NOT repeat or paraphrase any of these already-asked questions:
+{avoid_block}
+
+Return ONLY a JSON array of objects with keys "question", "options" (array of 4 strings like "A: ...") and "correct_answer" (the full text of the correct option).
+Token: {nonce}"""
+            raw = await llm_client.generate(
+                prompt,
+                task="mcq_batch",
+                coalesce=False,  # session-specific avoid list and nonce
+                temperature=0.8,
+                max_output_tokens=250 * count + 200,
+                **json_generation_config(array_of(MCQ_SCHEMA))
+            )
+            items = parse_llm_json(raw, "mcq_batch", expect=list, required=["question", "options", "correct_answer"])
+        except Exception as e:
+            print(f"Error generating MCQ batch: {e}")
+            record_fallback("mcq_batch")
+            return []
+
+        seen = {question_fingerprint(text) for text in avoid} | set(seen_fingerprints or ())
+        batch: List[MCQQuestionResponse] = []
+        for item in items:
+            mcq = GeminiService.validate_mcq(item)
+            if mcq is None:
+                metrics.increment("mcq_batch.invalid")
+                continue
+            fingerprint = question_fingerprint(mcq["question"])
+            if fingerprint in seen or (novelty is not None and novelty.is_near_duplicate(mcq["question"])):
+                metrics.increment("mcq_batch.duplicates")
+                continue
+            seen.add(fingerprint)
+            batch.append(MCQQuestionResponse(**mcq, type="mcq"))
+        return batch[:count]
+
     # Removed Gemini TTS/STT helpers; ElevenLabs VoiceService is used instead.
     
     @staticmethod
@@ -648,35 +752,18 @@ Focus on:
 - ATS-friendly formatting
 - Missing requirements"""
             
-            response = model.generate_content(
+            raw = await llm_client.generate(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.3,
-                    max_output_tokens=1000
-                )
+                task="ats_review",
+                temperature=0.3,
+                **json_generation_config(ATS_REVIEW_SCHEMA)
             )
             
-            if not response.text:
+            if not raw:
                 raise ValueError("Empty response from model")
             
-            # Extract JSON from response robustly (handles code fences and prose)
-            raw = response.text.strip()
-            # Strip markdown code fences if present
-            if raw.startswith("```"):
-                first_nl = raw.find("\n")
-                if first_nl != -1:
-                    raw = raw[first_nl + 1:]
-                if raw.endswith("```"):
-                    raw = raw[:-3]
-            raw = raw.strip()
-            
-            # Find first JSON object
-            start = raw.find('{')
-            end = raw.rfind('}') + 1
-            if start < 0 or end <= start:
-                raise ValueError("No JSON found in response")
-            json_str = raw[start:end]
-            result = json.loads(json_str)
+            # Handles code fences, surrounding prose and near-valid JSON
+            result = parse_llm_json(raw, "ats_review")
             
             return ATSReviewResponse(
                 ats_score=result.get("ats_score", 60),
@@ -688,6 +775,7 @@ Focus on:
             )
         except Exception as e:
             logger.error(f"Error in ATS review: {e}")
+            record_fallback("ats_review")
             # Fallback response
             return ATSReviewResponse(
                 ats_score=65,
@@ -699,53 +787,24 @@ Focus on:
             )
 
     @staticmethod
-    async def generate_interview_summary(session_data: dict, company_name: str, job_role: str) -> InterviewSummaryResponse:
-        """
-        Generates a comprehensive interview summary with overall feedback and recommendations.
-        """
-        try:
-            # Extract data from session
-            questions_and_answers = session_data.get("questions_and_answers", [])
-            total_questions = len(questions_and_answers)
-            
-            # Calculate overall score
-            scores = [qa.get("score", 0) for qa in questions_and_answers if qa.get("score")]
-            overall_score = sum(scores) / len(scores) if scores else 0
-            
-            # Group by rounds
-            rounds = {}
-            for qa in questions_and_answers:
-                round_title = qa.get("round_title", "General")
-                if round_title not in rounds:
-                    rounds[round_title] = []
-                rounds[round_title].append(qa)
-            
-            round_summaries = []
-            for round_title, round_qas in rounds.items():
-                round_scores = [qa.get("score", 0) for qa in round_qas if qa.get("score")]
-                round_avg = sum(round_scores) / len(round_scores) if round_scores else 0
-                round_summaries.append({
-                    "round_title": round_title,
-                    "questions_count": len(round_qas),
-                    "average_score": round_avg,
-                    "question_types": list(set(qa.get("type", "unknown") for qa in round_qas))
-                })
-            
-            # Prepare context for AI summary
-            context = f"""
+    async def generate_summary_narrative(questions_and_answers: List[Dict[str, Any]], ledger: Dict[str, Any], round_summaries: List[Dict[str, Any]],
+                                         total_questions: int, overall_score: float, company_name: str, job_role: str) -> Dict[str, Any]:
+        """Asks the model for strengths, areas for improvement, recommendations and overall feedback. Raises on failure."""
+        # Prepare context for AI summary
+        context = f"""
             Interview Summary for {job_role} at {company_name}:
             - Total Questions: {total_questions}
             - Overall Score: {overall_score:.1f}/10
-            - Rounds: {len(rounds)}
+            - Rounds: {len(round_summaries)}
             
             Round Performance:
             {chr(10).join([f"- {r['round_title']}: {r['average_score']:.1f}/10 ({r['questions_count']} questions)" for r in round_summaries])}
             
             Sample Q&As:
-            {chr(10).join([f"Q: {qa.get('question', '')[:100]}... A: {qa.get('answer', '')[:100]}... Score: {qa.get('score', 0)}/10" for qa in questions_and_answers[:3]])}
+            {chr(10).join([f"Q: {ledger.get(qa.get('question_id'), {}).get('payload', {}).get('question', qa.get('question', ''))[:100]}... A: {qa.get('answer', '')[:100]}... Score: {qa.get('score', 0)}/10" for qa in questions_and_answers[:3]])}
             """
-            
-            prompt = f"""
+        
+        prompt = f"""
             Generate a comprehensive interview summary based on this performance data:
             
             {context}
@@ -765,24 +824,42 @@ Focus on:
             - Areas that need development
             - Specific actionable recommendations
             """
+        
+        raw = await llm_client.generate(
+            prompt,
+            task="summary",
+            temperature=0.3,
+            **json_generation_config(SUMMARY_SCHEMA)
+        )
+        return parse_llm_json(raw, "summary")
+
+    @staticmethod
+    async def generate_interview_summary(session_data: dict, company_name: str, job_role: str) -> InterviewSummaryResponse:
+        """
+        Generates a comprehensive interview summary with overall feedback and recommendations.
+        Scores come from the session's running aggregates; the LLM narrative is memoized on the
+        session and only regenerated once new answers or grades bump qa_version.
+        """
+        try:
+            # Extract data from session
+            questions_and_answers = session_data.get("questions_and_answers", [])
+            ledger = session_data.get("question_ledger", {})
+            aggregates = session_data.get("aggregates") or InterviewAggregates.from_entries(questions_and_answers)
+            total_questions = aggregates.overall.questions_count
+            overall_score = aggregates.overall.average
+            round_summaries = aggregates.round_summaries()
+            rounds = aggregates.rounds
             
-            response = model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.3,
-                    max_output_tokens=600
-                )
-            )
-            
-            raw = response.text.strip()
-            # Extract JSON from response
-            start = raw.find('{')
-            end = raw.rfind('}') + 1
-            if start >= 0 and end > start:
-                json_str = raw[start:end]
-                result = json.loads(json_str)
+            version = session_data.get("qa_version", len(questions_and_answers))
+            cached = session_data.get("summary_narrative")
+            if cached and cached["version"] == version:
+                metrics.increment("summary.narrative_cache_hits")
+                result = cached["result"]
             else:
-                raise ValueError("No JSON found in response")
+                result = await GeminiService.generate_summary_narrative(
+                    questions_and_answers, ledger, round_summaries, total_questions, overall_score, company_name, job_role
+                )
+                session_data["summary_narrative"] = {"version": version, "result": result}
             
             return InterviewSummaryResponse(
                 session_id=session_data.get("session_id", ""),
@@ -798,6 +875,7 @@ Focus on:
             )
         except Exception as e:
             print(f"Error generating interview summary: {e}")
+            record_fallback("summary")
             # Fallback summary
             return InterviewSummaryResponse(
                 session_id=session_data.get("session_id", ""),
@@ -812,13 +890,11 @@ Focus on:
                 overall_feedback="Thank you for completing the interview. Keep practicing to improve your skills and confidence."
             )
 
+    AI_FEEDBACK_PREFIX = "🤖 AI Feedback: "
+
     @staticmethod
-    async def get_feedback_and_score(question: str, userAnswer: str, company_name: str, job_role: str, extracted_resume_text: str | None = None) -> FeedbackResponse:
-        """
-        Generates feedback and a score for the user's answer, considering the resume.
-        """
-        try:
-            prompt = f"""Evaluate this interview answer for a {job_role} position.
+    def build_feedback_prompt(question: str, userAnswer: str, job_role: str) -> str:
+        return f"""Evaluate this interview answer for a {job_role} position.
 
 Question: {question}
 
@@ -833,84 +909,542 @@ Provide your evaluation in this exact JSON format:
 }}
 
 Rate from 1-10. Be constructive and specific."""
+
+    @staticmethod
+    def feedback_from_result(result: Dict[str, Any]) -> FeedbackResponse:
+        return FeedbackResponse(
+            score=result.get("score", 6),
+            strengths=result.get("strengths", ["Good attempt"]),
+            weaknesses=result.get("weaknesses", ["Could be more specific"]),
+            feedback_text=f"{GeminiService.AI_FEEDBACK_PREFIX}{result.get('feedback_text', 'Keep practicing!')}"
+        )
+
+    @staticmethod
+    def heuristic_feedback(userAnswer: str) -> FeedbackResponse:
+        """Local feedback based on answer length and content, used when the model is unavailable."""
+        score = 7 if len(userAnswer) > 100 else 5
+        has_example = any(word in userAnswer.lower() for word in ["when", "time", "example", "situation"])
+        has_result = any(word in userAnswer.lower() for word in ["result", "outcome", "improved", "increased", "decreased"])
+        
+        strengths = []
+        weaknesses = []
+        
+        if has_example:
+            strengths.append("Provided a specific example")
+        if has_result:
+            strengths.append("Mentioned concrete results")
+        if len(userAnswer) > 150:
+            strengths.append("Detailed response")
+        
+        if not has_example:
+            weaknesses.append("Could include a more specific example")
+        if not has_result:
+            weaknesses.append("Could quantify the impact or results")
+        if len(userAnswer) < 50:
+            weaknesses.append("Could provide more detail")
+        
+        return FeedbackResponse(
+            score=score,
+            strengths=strengths if strengths else ["Good effort"],
+            weaknesses=weaknesses if weaknesses else ["Consider using the STAR method"],
+            feedback_text=f"📋 Smart Analysis: Your answer shows understanding. {'Great use of specific examples!' if has_example else 'Try to include specific examples next time.'}"
+        )
+
+    @staticmethod
+    async def get_feedback_and_score(question: str, userAnswer: str, company_name: str, job_role: str, extracted_resume_text: str | None = None) -> FeedbackResponse:
+        """
+        Generates feedback and a score for the user's answer, considering the resume.
+        """
+        try:
+            prompt = GeminiService.build_feedback_prompt(question, userAnswer, job_role)
             
-            response = model.generate_content(
+            raw = await llm_client.generate(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.5,
-                    max_output_tokens=600
-                )
+                task="feedback",
+                temperature=0.5,
+                **json_generation_config(FEEDBACK_SCHEMA)
             )
             
-            if not response.text:
+            if not raw:
                 raise ValueError("Empty response from model")
             
-            # Extract JSON from response
-            raw = response.text.strip()
-            # Find JSON object in the response
-            start = raw.find('{')
-            end = raw.rfind('}') + 1
-            if start >= 0 and end > start:
-                json_str = raw[start:end]
-                result = json.loads(json_str)
-                return FeedbackResponse(
-                    score=result.get("score", 6),
-                    strengths=result.get("strengths", ["Good attempt"]),
-                    weaknesses=result.get("weaknesses", ["Could be more specific"]),
-                    feedback_text=f"🤖 AI Feedback: {result.get('feedback_text', 'Keep practicing!')}"
-                )
-            else:
-                raise ValueError("No JSON found in response")
+            result = parse_llm_json(raw, "feedback", required=["score"])
+            return GeminiService.feedback_from_result(result)
         except Exception as e:
             print(f"Error generating feedback: {e}")
+            record_fallback("feedback")
             # Better fallback feedback based on answer length and content
-            score = 7 if len(userAnswer) > 100 else 5
-            has_example = any(word in userAnswer.lower() for word in ["when", "time", "example", "situation"])
-            has_result = any(word in userAnswer.lower() for word in ["result", "outcome", "improved", "increased", "decreased"])
-            
-            strengths = []
-            weaknesses = []
-            
-            if has_example:
-                strengths.append("Provided a specific example")
-            if has_result:
-                strengths.append("Mentioned concrete results")
-            if len(userAnswer) > 150:
-                strengths.append("Detailed response")
-            
-            if not has_example:
-                weaknesses.append("Could include a more specific example")
-            if not has_result:
-                weaknesses.append("Could quantify the impact or results")
-            if len(userAnswer) < 50:
-                weaknesses.append("Could provide more detail")
-            
-            return FeedbackResponse(
-                score=score,
-                strengths=strengths if strengths else ["Good effort"],
-                weaknesses=weaknesses if weaknesses else ["Consider using the STAR method"],
-                feedback_text=f"📋 Smart Analysis: Your answer shows understanding. {'Great use of specific examples!' if has_example else 'Try to include specific examples next time.'}"
+            return GeminiService.heuristic_feedback(userAnswer)
+
+    @staticmethod
+    def provisional_feedback(question_entry: Optional[Dict[str, Any]], userAnswer: str) -> FeedbackResponse:
+        """Instant local score shown while an answer waits for batched grading; MCQs are checked against correct_answer."""
+        correct_answer = (question_entry or {}).get("payload", {}).get("correct_answer")
+        if correct_answer:
+            is_correct = userAnswer.strip().lower() == correct_answer.strip().lower()
+            feedback = FeedbackResponse(
+                score=10 if is_correct else 2,
+                strengths=["Selected the correct answer"] if is_correct else ["Attempted the question"],
+                weaknesses=["None"] if is_correct else [f"The correct answer was {correct_answer}"],
+                feedback_text="✅ Correct!" if is_correct else f"❌ Incorrect. The correct answer was {correct_answer}."
             )
+        else:
+            feedback = GeminiService.heuristic_feedback(userAnswer)
+            feedback.feedback_text = "⏳ Provisional score - detailed AI feedback will be ready at the end of this round. " + feedback.feedback_text
+        feedback.provisional = True
+        return feedback
+
+    @staticmethod
+    async def grade_answers_batch(items: List[Dict[str, str]], company_name: str, job_role: str) -> List[Optional[FeedbackResponse]]:
+        """
+        Grades several answers in one prompt. items are {"question", "answer"} dicts; the result has
+        one entry per item, None where the model returned nothing usable for that item.
+        """
+        try:
+            answers_block = "\n\n".join(
+                f"[{i}]\nQuestion: {item['question']}\nCandidate's Answer: {item['answer']}"
+                for i, item in enumerate(items)
+            )
+            prompt = f"""Evaluate each of these interview answers for a {job_role} position at {company_name}.
+
+{answers_block}
+
+Return ONLY a JSON array with one object per answer, in this exact format:
+[
+  {{"index": 0, "score": 7, "strengths": ["strength point 1"], "weaknesses": ["area for improvement 1"], "feedback_text": "Constructive feedback in 2-3 sentences"}}
+]
+
+Rate each from 1-10. Be constructive and specific."""
 
+            raw = await llm_client.generate(
+                prompt,
+                task="feedback_batch",
+                temperature=0.5,
+                max_output_tokens=200 + 250 * len(items),
+                **json_generation_config(FEEDBACK_BATCH_SCHEMA)
+            )
+            results = parse_llm_json(raw, "feedback_batch", expect=list, required=["score"])
+
+            graded: List[Optional[FeedbackResponse]] = [None] * len(items)
+            for position, result in enumerate(results):
+                if not isinstance(result, dict):
+                    continue
+                index = result.get("index", position)
+                if isinstance(index, int) and 0 <= index < len(items):
+                    graded[index] = GeminiService.feedback_from_result(result)
+            return graded
+        except Exception as e:
+            print(f"Error batch grading answers: {e}")
+            record_fallback("feedback_batch")
+            return [None] * len(items)
+
+    @staticmethod
+    async def stream_feedback_and_score(question: str, userAnswer: str, company_name: str, job_role: str) -> AsyncIterator[tuple[str, Any]]:
+        """
+        Streaming variant of get_feedback_and_score. Yields ("partial", dict) with the fields parsed
+        so far while tokens arrive, then exactly one ("final", FeedbackResponse). Falls back to the
+        heuristic feedback if the stream fails or doesn't produce valid JSON.
+        """
+        parser = IncrementalJSONParser()
+        try:
+            prompt = GeminiService.build_feedback_prompt(question, userAnswer, job_role)
+            async for chunk in llm_client.stream(prompt, task="feedback", temperature=0.5,
+                                                 **json_generation_config(FEEDBACK_SCHEMA)):
+                partial_result = parser.feed(chunk)
+                if isinstance(partial_result, dict):
+                    yield "partial", partial_result
+
+            result = parse_llm_json(parser.buffer, "feedback", required=["score"])
+            yield "final", GeminiService.feedback_from_result(result)
+        except Exception as e:
+            print(f"Error streaming feedback: {e}")
+            record_fallback("feedback")
+            yield "final", GeminiService.heuristic_feedback(userAnswer)
 
 async def get_next_question_data(session: Dict[str, Any], next_round_info: Dict[str, Any]) -> Union[QuestionResponse, CodingQuestionResponse, MCQQuestionResponse]:
-    """Helper function to get the next question based on the round type."""
+    """Helper function to get the next question based on the round type.
+    Serves from the question bank when it has an unseen, novel question, otherwise generates live."""
+    if next_round_info["type"] == "mcq":
+        queued = pop_session_mcq(session)
+        if queued:
+            return queued
+    bank_args = (session["company_name"], session["job_role"], session["years_of_experience"], next_round_info["type"], next_round_info["title"])
+    banked = pop_banked_question(session, next_round_info)
+    # Refills are speculative spend: off the request deadline and on the background LLM budget
+    with deadlines.detached(), llm_background():
+        question_bank.request_refill(*bank_args, generate=generate_bank_questions, requester=session.get("interview_id", ""))
+    if banked:
+        return banked
+    return await generate_live_question(session, next_round_info)
+
+def pop_banked_question(session: Dict[str, Any], round_info: Dict[str, Any]) -> Optional[Union[QuestionResponse, CodingQuestionResponse, MCQQuestionResponse]]:
+    """Next bank question the session hasn't been served and that isn't a near duplicate of one it has."""
+    novelty = session.get("novelty_index")
+    banked = question_bank.pop(
+        session["company_name"], session["job_role"], session["years_of_experience"], round_info["type"], round_info["title"],
+        seen=session.get("served_fingerprints"), reject=novelty.is_near_duplicate if novelty is not None else None
+    )
+    if not banked:
+        return None
+    if round_info["type"] in ["technical", "dsa"]:
+        return CodingQuestionResponse(**banked)
+    elif round_info["type"] == "mcq":
+        return MCQQuestionResponse(**banked)
+    return QuestionResponse(**banked)
+
+def ensure_novel_question(session: Dict[str, Any], round_info: Dict[str, Any], question_data: Union[QuestionResponse, CodingQuestionResponse, MCQQuestionResponse]) -> Union[QuestionResponse, CodingQuestionResponse, MCQQuestionResponse]:
+    """
+    Serve-time repeat check against the session's novelty index. Questions prepared ahead (openers,
+    prefetch) can't see each other, so a near duplicate of an already-served question is swapped for
+    a novel queued/banked/local fallback question - never another model call. Kept as-is if none is novel.
+    """
+    novelty = session.get("novelty_index")
+    if novelty is None:
+        return question_data
+    metrics.increment("novelty.checks")
+    if not novelty.is_near_duplicate(question_data.question):
+        return question_data
+    metrics.increment("novelty.rejections")
+    substitute = pop_session_mcq(session) if round_info["type"] == "mcq" else None
+    substitute = substitute or pop_banked_question(session, round_info)
+    if substitute is None and round_info["type"] in ["technical", "dsa"]:
+        problem = pick_novel(FALLBACK_CODING_PROBLEMS[fallback_level(session["years_of_experience"])], novelty, text=lambda p: p["question"])
+        substitute = CodingQuestionResponse(**problem, type="technical") if problem else None
+    elif substitute is None and round_info["type"] != "mcq":
+        question = pick_novel(FALLBACK_QUESTION_SETS[fallback_company_key(session["company_name"])], novelty)
+        substitute = QuestionResponse(question=question, type="behavioral") if question else None
+    if substitute is None:
+        metrics.increment("novelty.unresolved")
+        return question_data
+    return substitute
+
+async def generate_live_question(session: Dict[str, Any], next_round_info: Dict[str, Any]) -> Union[QuestionResponse, CodingQuestionResponse, MCQQuestionResponse]:
+    """Generates the next question with Gemini based on the round type."""
     if next_round_info["type"] in ["technical", "dsa"]:
         return await GeminiService.generate_coding_question(
             job_role=session["job_role"],
             years_of_experience=session["years_of_experience"],
             company_name=session["company_name"],
-            round_title=next_round_info["title"]
+            round_title=next_round_info["title"],
+            novelty=session.get("novelty_index")
         )
     elif next_round_info["type"] == "mcq":
-        return await GeminiService.generate_mcq_questions(session["job_role"])
+        return await next_session_mcq(session, next_round_info)
     else:
         return await GeminiService.generate_question(
             job_role=session["job_role"],
             years_of_experience=session["years_of_experience"],
             company_name=session["company_name"],
-            round_title=next_round_info["title"]
+            round_title=next_round_info["title"],
+            novelty=session.get("novelty_index")
+        )
+
+
+# =============================
+# Per-session MCQ queue
+# =============================
+# MCQ rounds are generated a batch at a time (up to MCQ_BATCH_SIZE per call) and served from a queue
+MCQ_BATCH_SIZE = int(os.getenv("MCQ_BATCH_SIZE", "10"))
+
+def pop_session_mcq(session: Dict[str, Any]) -> Optional[MCQQuestionResponse]:
+    """Next queued MCQ the session hasn't been served yet (nor a near duplicate of one), or None."""
+    queue = session.get("mcq_queue")
+    served = session.get("served_fingerprints", set())
+    novelty = session.get("novelty_index")
+    while queue:
+        mcq = queue.popleft()
+        if question_fingerprint(mcq.question) not in served and (novelty is None or not novelty.is_near_duplicate(mcq.question)):
+            return mcq
+    return None
+
+async def next_session_mcq(session: Dict[str, Any], round_info: Dict[str, Any]) -> MCQQuestionResponse:
+    """Serves from the session's MCQ queue, batch-generating up to a round's worth when it runs dry."""
+    for _ in range(2):
+        mcq = pop_session_mcq(session)
+        if mcq:
+            return mcq
+        # Single-flight per session: round openers and prefetch share one batch call
+        fill = session.get("mcq_fill")
+        if fill is None or fill.done():
+            with deadlines.detached():
+                fill = session["mcq_fill"] = asyncio.ensure_future(fill_session_mcq_queue(session, round_info))
+        try:
+            if not await deadlines.bounded(asyncio.shield(fill), task="mcq_batch"):
+                break  # nothing new (failed, or every item was a repeat) - don't spend another batch call on it
+        except DeadlineExceededError:
+            break  # the batch keeps filling the queue for later questions
+    # Batch generation came up empty - one single-question attempt (falls back locally on error)
+    return await GeminiService.generate_mcq_questions(session["job_role"])
+
+async def fill_session_mcq_queue(session: Dict[str, Any], round_info: Dict[str, Any]) -> int:
+    """Batch-generates up to a round's worth of MCQs into the session queue. Returns how many were queued."""
+    queue = session.setdefault("mcq_queue", deque())
+    ledger = session.get("question_ledger", {})
+    asked = [entry["payload"]["question"] for entry in ledger.values() if entry["payload"].get("options")]
+    queued = [mcq.question for mcq in queue]
+    count = min(max(int(round_info.get("question_count", 1) or 1), 1), MCQ_BATCH_SIZE)
+    batch = await GeminiService.generate_mcq_batch(
+        session["job_role"], session["company_name"], session["years_of_experience"], round_info.get("title", "Online Assessment"),
+        count, avoid=asked + queued, seen_fingerprints=session.get("served_fingerprints"),
+        novelty=session.get("novelty_index")
+    )
+    queue.extend(batch)
+    return len(batch)
+
+async def generate_bank_questions(company_name: str, job_role: str, years_of_experience: int, round_type: str,
+                                  round_title: str, count: int) -> Optional[List[Dict[str, Any]]]:
+    """Live-generates up to `count` question payloads for the question bank's pool for the round; None if the model fell back to local questions."""
+    if llm_in_background() and not llm_client.background_available():
+        return None  # out of background budget: stop the refill without a refused call and a local fallback
+    plan_type = {"coding": "dsa"}.get(round_type, round_type)
+    key = QuestionBank.make_key(company_name, job_role, years_of_experience, plan_type, round_title)
+    # The pool's novelty index steers generation away from questions the pool already has
+    pool_novelty = question_bank.novelty_index(key)
+    if plan_type == "mcq":
+        # MCQ pools fill through the whole-round batch path: one call, the pool's recent questions as the avoid list
+        batch = await GeminiService.generate_mcq_batch(
+            job_role, company_name, years_of_experience, round_title, min(max(count, 1), MCQ_BATCH_SIZE),
+            avoid=question_bank.recent_questions(key), novelty=pool_novelty
         )
+        return [mcq.dict() for mcq in batch] or None
+    question_data = await generate_live_question(
+        {"company_name": company_name, "job_role": job_role, "years_of_experience": years_of_experience, "novelty_index": pool_novelty},
+        {"type": plan_type, "title": round_title}
+    )
+    if is_fallback_question(question_data.question):
+        return None
+    return [question_data.dict()]
+
+
+# =============================
+# Per-session question ledger
+# =============================
+def record_question(session: Dict[str, Any], round_index: int, question_index: int, round_info: Dict[str, Any], question_data: Union[QuestionResponse, CodingQuestionResponse, MCQQuestionResponse]) -> str:
+    """
+    Records a served question (full payload, including MCQ correct_answer and coding initial_code)
+    in the session's ledger and makes it the current question. Returns its stable question ID.
+    """
+    ledger = session.setdefault("question_ledger", {})
+    question_id = f"q{len(ledger) + 1}-{uuid.uuid4().hex[:6]}"
+    ledger[question_id] = {
+        "question_id": question_id,
+        "round_index": round_index,
+        "question_index": question_index,
+        "round_title": round_info["title"],
+        "type": round_info["type"],
+        "payload": question_data.dict(),
+        "served_at": datetime.now(),
+    }
+    session.setdefault("served_fingerprints", set()).add(question_fingerprint(question_data.question))
+    if session.get("novelty_index") is not None:
+        session["novelty_index"].add(question_data.question)
+    session["current_question_id"] = question_id
+    session["current_question"] = question_data.question
+    session["current_question_type"] = round_info["type"]
+    prewarm_hint(session)
+    return question_id
+
+def get_current_question_entry(session: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return session.get("question_ledger", {}).get(session.get("current_question_id"))
+
+def describe_question(entry: Dict[str, Any], include_answer: bool = False) -> str:
+    """Renders a ledger entry as prompt text; MCQ options/answer and coding starter code are appended."""
+    payload = entry["payload"]
+    text = payload["question"]
+    if payload.get("options"):
+        text += "\nOptions:\n" + "\n".join(payload["options"])
+        if include_answer and payload.get("correct_answer"):
+            text += f"\nCorrect answer: {payload['correct_answer']}"
+    if payload.get("initial_code"):
+        text += f"\nStarter code:\n{payload['initial_code']}"
+    return text
+
+
+# =============================
+# Speculative next-question prefetch
+# =============================
+SESSION_TTL_MINUTES = int(os.getenv("SESSION_TTL_MINUTES", "180"))
+
+def get_following_position(session: Dict[str, Any], round_index: int, question_index: int) -> Optional[tuple[int, int]]:
+    """Returns (round_index, question_index) of the question after the given one, or None at the end of the plan."""
+    interview_plan = session["interview_plan"]
+    if question_index + 1 < interview_plan[round_index]["question_count"]:
+        return round_index, question_index + 1
+    if round_index + 1 < len(interview_plan):
+        return round_index + 1, 0
+    return None
+
+def schedule_question_prefetch(session: Dict[str, Any]) -> None:
+    """Starts generating the question after the current one in the background and parks the task on the session."""
+    cancel_question_prefetch(session)
+    position = get_following_position(session, session["current_round_index"], session["current_question_index"])
+    if position is None or (position[1] == 0 and position[0] in session.get("round_openers", {})):
+        return  # end of plan, or the next round's opener is already being prepared
+    round_info = session["interview_plan"][position[0]]
+    with deadlines.detached():
+        session["prefetched_question"] = {
+            "position": position,
+            "task": asyncio.create_task(get_next_question_data(session, round_info)),
+        }
+
+def cancel_question_prefetch(session: Dict[str, Any]) -> None:
+    prefetched = session.pop("prefetched_question", None)
+    if prefetched and not prefetched["task"].done():
+        prefetched["task"].cancel()
+
+async def take_question(session: Dict[str, Any], position: tuple[int, int], round_info: Dict[str, Any]) -> Union[QuestionResponse, CodingQuestionResponse, MCQQuestionResponse]:
+    """Serves the question at position from its round-opener or prefetch slot when one matches, otherwise generates it live."""
+    question_data = None
+    opener = session.get("round_openers", {}).pop(position[0], None) if position[1] == 0 else None
+    if opener is not None and not opener.cancelled():
+        try:
+            question_data = await deadlines.bounded(asyncio.shield(opener), task="round_opener")
+            metrics.increment("round_openers.served")
+        except Exception as e:
+            logger.warning(f"Prepared round opener failed, generating live: {e}")
+    prefetched = session.pop("prefetched_question", None)
+    if question_data is None and prefetched and prefetched["position"] == position and not prefetched["task"].cancelled():
+        try:
+            question_data = await deadlines.bounded(asyncio.shield(prefetched["task"]), task="prefetch")
+        except Exception as e:
+            logger.warning(f"Prefetched question failed, generating live: {e}")
+    elif prefetched and not prefetched["task"].done():
+        prefetched["task"].cancel()
+    if question_data is None:
+        question_data = await get_next_question_data(session, round_info)
+    return ensure_novel_question(session, round_info, question_data)
+
+# =============================
+# Round openers - the first question of every planned round, prepared concurrently at start
+# =============================
+ROUND_PREP_CONCURRENCY = int(os.getenv("ROUND_PREP_CONCURRENCY", "3"))
+
+def prepare_round_openers(session: Dict[str, Any]) -> None:
+    """
+    Starts generating the opening question of every round in the plan, at most ROUND_PREP_CONCURRENCY
+    at a time. Tasks are created in round order so round 0 gets the first slot; take_question serves them.
+    """
+    cancel_round_openers(session)
+    limit = asyncio.Semaphore(ROUND_PREP_CONCURRENCY)
+
+    async def prepare(round_info: Dict[str, Any]):
+        async with limit:
+            return await get_next_question_data(session, round_info)
+
+    with deadlines.detached():
+        session["round_openers"] = {
+            round_index: asyncio.create_task(prepare(round_info))
+            for round_index, round_info in enumerate(session["interview_plan"])
+        }
+
+def cancel_round_openers(session: Dict[str, Any]) -> None:
+    for task in session.pop("round_openers", {}).values():
+        if not task.done():
+            task.cancel()
+
+def cancel_prefetched_work(session: Dict[str, Any]) -> None:
+    """Cancels every speculative question generation parked on the session."""
+    cancel_question_prefetch(session)
+    cancel_round_openers(session)
+
+def expire_stale_sessions() -> None:
+    """Drops sessions idle for longer than SESSION_TTL_MINUTES and cancels their prefetched work."""
+    now = datetime.now()
+    for sid, s in list(sessions.items()):
+        last_activity = s.get("last_activity") or s.get("start_time")
+        if last_activity and (now - last_activity).total_seconds() > SESSION_TTL_MINUTES * 60:
+            cancel_prefetched_work(s)
+            for task in s.get("grading_tasks", []):
+                task.cancel()
+            if vision_pool is not None:
+                vision_pool.release(sid)
+            del sessions[sid]
+
+
+# =============================
+# Batched grading mode
+# =============================
+# "immediate" grades every answer as it is submitted; "batched" shows a local provisional score
+# and grades all of a round's answers in one prompt when the round ends.
+GRADING_MODE = os.getenv("GRADING_MODE", "immediate")
+GRADING_BATCH_SIZE = int(os.getenv("GRADING_BATCH_SIZE", "10"))
+
+def is_batched_grading(session: Dict[str, Any]) -> bool:
+    return session.get("grading_mode", GRADING_MODE) == "batched"
+
+# Share of the submit-answer budget live grading may use; the rest is for serving the next question
+FEEDBACK_BUDGET_SHARE = float(os.getenv("FEEDBACK_BUDGET_SHARE", "0.75"))
+
+async def grade_answer(session: Dict[str, Any], question_entry: Optional[Dict[str, Any]], question_for_grading: str, user_answer: str) -> FeedbackResponse:
+    """Grades one answer now, or returns a provisional score when the session defers grading to the end of the round."""
+    if is_batched_grading(session):
+        return GeminiService.provisional_feedback(question_entry, user_answer)
+    try:
+        return await deadlines.bounded(GeminiService.get_feedback_and_score(
+            question=question_for_grading,
+            userAnswer=user_answer,
+            company_name=session["company_name"],
+            job_role=session["job_role"],
+            extracted_resume_text=None
+        ), share=FEEDBACK_BUDGET_SHARE, task="feedback")
+    except DeadlineExceededError:
+        record_fallback("feedback")
+        return GeminiService.heuristic_feedback(user_answer)
+
+def schedule_round_grading(session: Dict[str, Any], round_index: Optional[int] = None) -> None:
+    """Starts batch grading of the provisional answers of a round (all rounds when round_index is None)."""
+    pending = [
+        qa for qa in session.get("questions_and_answers", [])
+        if qa.get("grading") == "provisional" and (round_index is None or qa.get("round_index") == round_index)
+    ]
+    if not pending:
+        return
+    for qa in pending:
+        qa["grading"] = "grading"
+    with deadlines.detached():
+        session.setdefault("grading_tasks", []).append(asyncio.create_task(grade_round_answers(session, pending)))
+
+async def grade_round_answers(session: Dict[str, Any], entries: List[Dict[str, Any]]) -> None:
+    """Grades the entries in batches of GRADING_BATCH_SIZE and maps each result back onto its entry."""
+    ledger = session.get("question_ledger", {})
+    for i in range(0, len(entries), GRADING_BATCH_SIZE):
+        batch = entries[i:i + GRADING_BATCH_SIZE]
+        items = [
+            {
+                "question": describe_question(ledger[qa["question_id"]], include_answer=True) if qa.get("question_id") in ledger else qa["question"],
+                "answer": qa["answer"],
+            }
+            for qa in batch
+        ]
+        results = await GeminiService.grade_answers_batch(items, session["company_name"], session["job_role"])
+        for qa, feedback in zip(batch, results):
+            if feedback is None:
+                qa["grading"] = "provisional_final"  # keep the local score
+                continue
+            old_score = qa.get("score")
+            qa.update({
+                "score": feedback.score,
+                "feedback_text": feedback.feedback_text,
+                "strengths": feedback.strengths,
+                "weaknesses": feedback.weaknesses,
+                "grading": "graded",
+            })
+            note_answers_changed(session, qa, old_score, rescored=True)
+
+async def finalize_grading(session: Dict[str, Any]) -> None:
+    """
+    Grades anything still provisional and waits for in-flight batches, e.g. before building a summary.
+    Waits at most half the request's remaining budget; unfinished batches keep running and are waited
+    for again next time, and the summary uses the provisional scores meanwhile.
+    """
+    schedule_round_grading(session)
+    tasks = session.pop("grading_tasks", [])
+    if tasks:
+        try:
+            await deadlines.bounded(asyncio.shield(asyncio.gather(*tasks, return_exceptions=True)), share=0.5, task="grading")
+        except DeadlineExceededError:
+            logger.warning("Batch grading still running at the summary deadline - using provisional scores")
+            session.setdefault("grading_tasks", []).extend(task for task in tasks if not task.done())
 
 # New endpoint for parsing the resume
 @app.post("/api/parse-resume")
@@ -966,6 +1500,8 @@ async def get_interview_summary(session_id: str):
         raise HTTPException(status_code=404, detail="Session not found")
     
     session_data = sessions[session_id]
+    # Batched-grading sessions: make sure every answer carries its AI grade first
+    await finalize_grading(session_data)
     
     # Get company and role info
     company_name = session_data.get("company_name", "Unknown Company")
@@ -986,7 +1522,12 @@ async def tts(tts_request: TTSRequest):
         )
     
     try:
-        audio_data = voice_service.text_to_speech(tts_request.text, tts_request.voice)
+        # Blocking ElevenLabs call runs in a worker thread, bounded by the request deadline
+        budget = deadlines.remaining()
+        audio_data = await deadlines.bounded(
+            asyncio.to_thread(voice_service.text_to_speech, tts_request.text, tts_request.voice, timeout=budget),
+            task="tts",
+        )
         if not audio_data:
             raise HTTPException(
                 status_code=503,
@@ -996,6 +1537,14 @@ async def tts(tts_request: TTSRequest):
     except HTTPException as http_err:
         # Re-raise HTTP exceptions
         raise http_err
+    except DeadlineExceededError:
+        return {
+            "fallback": "client_tts",
+            "reason": "deadline",
+            "message": "Using client-side TTS because server TTS did not finish in time",
+            "text": tts_request.text,
+            "voice": tts_request.voice,
+        }
     except Exception as e:
         # For other TTS failures, surface a structured fallback
         return {
@@ -1072,7 +1621,10 @@ async def preview_plan(
     effective_yoe = yearsOfExperience
     effective_company = companyName
 
-    plan, is_ai_generated, generation_source = await GeminiService.generate_interview_plan(effective_company, effective_role, effective_yoe)
+    plan, is_ai_generated, generation_source = await plan_cache.get_plan(
+        effective_company, effective_role, effective_yoe, GeminiService.generate_interview_plan
+    )
+    plan_id = plan_cache.remember(effective_company, effective_role, effective_yoe, (plan, is_ai_generated, generation_source))
 
     total_questions = sum(int(r.get("question_count", 0) or 0) for r in plan)
     total_estimated_minutes = sum(int(r.get("estimated_minutes", 0) or 0) for r in plan)
@@ -1086,6 +1638,7 @@ async def preview_plan(
         total_estimated_minutes=total_estimated_minutes,
         is_ai_generated=is_ai_generated,
         generation_source=generation_source,
+        plan_id=plan_id,
     )
 
 @app.post("/api/start-interview", response_model=InterviewStartResponse)
@@ -1094,176 +1647,206 @@ async def start_interview(
     jobDescription: str = Form(""),
     yearsOfExperience: int = Form(...),
     jobRole: str = Form(...),
-    companyName: str = Form(...)
+    companyName: str = Form(...),
+    planId: str = Form(""),
+    gradingMode: str = Form("")
 ):
     if not all([yearsOfExperience, jobRole, companyName]):
         raise HTTPException(status_code=400, detail="Missing required form data.")
+    if gradingMode not in ["", "immediate", "batched"]:
+        raise HTTPException(status_code=400, detail="gradingMode must be 'immediate' or 'batched'.")
+    started_at = time.perf_counter()
     
     # Do not parse or consider resume or job description; use provided values only
     effective_role = jobRole
     effective_yoe = yearsOfExperience
     effective_company = companyName
 
-    interview_plan, _, _ = await GeminiService.generate_interview_plan(effective_company, effective_role, effective_yoe)
+    # Use the exact plan the candidate previewed when available, otherwise the shared plan cache
+    previewed = plan_cache.claim(planId, effective_company, effective_role, effective_yoe)
+    if previewed:
+        interview_plan, _, _ = previewed
+    else:
+        interview_plan, _, _ = await plan_cache.get_plan(
+            effective_company, effective_role, effective_yoe, GeminiService.generate_interview_plan
+        )
     
     session_id = "mock_" + str(hash(effective_company.lower() + effective_role))[2:]
-    
-    initial_round = interview_plan[0]
-    initial_question_data = await get_next_question_data(
-        {"job_role": effective_role, "years_of_experience": effective_yoe, "company_name": effective_company},
-        initial_round
-    )
+    expire_stale_sessions()
+    if session_id in sessions:
+        cancel_prefetched_work(sessions[session_id])
     
     # Store interview plan and other details in the session
-    sessions[session_id] = {
+    session = {
         "company_name": effective_company,
         "job_role": effective_role,
         "years_of_experience": effective_yoe,
         "extracted_resume_text": "",
         # Keep both legacy and new keys for compatibility
         "current_round": 0,
-        "current_question": initial_question_data.question,  # Store actual question text
-        "current_question_type": initial_round["type"],  # Store question type
         "interview_plan": interview_plan,
         "current_round_index": 0,
         "current_question_index": 0,
         "interview_history": [],
         "questions_and_answers": [],
+        "aggregates": InterviewAggregates(),  # running scores, updated as answers are appended
+        "qa_version": 0,  # bumped on every new/regraded answer; keys the memoized summary narrative
+        "novelty_index": NoveltyIndex(),  # near-duplicate check for served questions
+        "question_ledger": {},
+        "grading_mode": gradingMode or GRADING_MODE,
         "is_complete": False,
         "start_time": datetime.now(),
-        "session_id": session_id
+        "last_activity": datetime.now(),
+        "session_id": session_id,
+        "interview_id": uuid.uuid4().hex  # unique per interview; session ids repeat for the same company and role
     }
     
+    # Fan out: prepare every round's opening question now, so round transitions don't wait on a cold generation
+    prepare_round_openers(session)
+    initial_round = interview_plan[0]
+    try:
+        initial_question_data = await take_question(session, (0, 0), initial_round)
+    except BaseException:
+        cancel_prefetched_work(session)  # e.g. client went away before the session was stored
+        raise
+    metrics.observe("start_interview.time_to_first_question_ms", (time.perf_counter() - started_at) * 1000)
+    
+    sessions[session_id] = session
+    question_id = record_question(session, 0, 0, initial_round, initial_question_data)
+    schedule_question_prefetch(session)
+    
     return InterviewStartResponse(
         message="Interview session started successfully.",
         sessionId=session_id,
         questionData=initial_question_data,
+        questionId=question_id,
         roundTitle=initial_round["title"],
         isComplete=False,
         feedback=None  # No feedback on the first question
     )
 
 
-@app.post("/api/submit-answer", response_model=InterviewSubmitResponse)
-async def submit_answer(answer_data: InterviewAnswer):
+def get_submit_session(session_id: str) -> Dict[str, Any]:
     # Check both session storages for compatibility
-    session = session_data.get(answer_data.sessionId)
-    session_new = sessions.get(answer_data.sessionId)
+    session = session_data.get(session_id)
+    session_new = sessions.get(session_id)
     
     if not session and not session_new:
         raise HTTPException(status_code=404, detail="Session not found.")
     
     # Use the new sessions storage if available, otherwise fall back to old one
-    if session_new:
-        session = session_new
-    
-    interview_plan = session["interview_plan"]
-    current_round_index = session["current_round_index"]
-    current_question_index = session["current_question_index"]
-    
-    current_round = interview_plan[current_round_index]
-    
-    # Get the actual question text from the Gemini Service for the feedback prompt
-    question_to_feedback = ""
-    if current_round["type"] in ["technical", "dsa"]:
-        q_data = await GeminiService.generate_coding_question(
-            job_role=session["job_role"],
-            years_of_experience=session["years_of_experience"],
-            company_name=session["company_name"],
-            round_title=current_round["title"]
-        )
-        question_to_feedback = q_data.question
-    elif current_round["type"] == "mcq":
-        q_data = await GeminiService.generate_mcq_questions(session["job_role"])
-        question_to_feedback = q_data.question
+    return session_new or session
+
+def get_question_for_grading(session: Dict[str, Any]) -> tuple[Optional[Dict[str, Any]], str, str]:
+    """Returns (ledger entry, question text, grading prompt text) for the current question."""
+    # Grade against the exact question the candidate saw, as recorded in the ledger
+    question_entry = get_current_question_entry(session)
+    if question_entry:
+        return question_entry, question_entry["payload"]["question"], describe_question(question_entry, include_answer=True)
+    question_text = session.get("current_question", "")
+    return None, question_text, question_text
+
+def note_answers_changed(session: Dict[str, Any], entry: Dict[str, Any], old_score: Optional[float] = None, rescored: bool = False) -> None:
+    """Updates the running aggregates for a new (or regraded) entry and invalidates the memoized summary narrative."""
+    aggregates = session.setdefault("aggregates", InterviewAggregates())
+    if rescored:
+        aggregates.rescore(entry, old_score)
     else:
-        q_data = await GeminiService.generate_question(
-            job_role=session["job_role"],
-            years_of_experience=session["years_of_experience"],
-            company_name=session["company_name"],
-            round_title=current_round["title"]
-        )
-        question_to_feedback = q_data.question
-
-    # Generate feedback for the submitted answer
-    feedback = await GeminiService.get_feedback_and_score(
-        question=question_to_feedback,
-        userAnswer=answer_data.userAnswer,
-        company_name=session["company_name"],
-        job_role=session["job_role"],
-        extracted_resume_text=None
-    )
+        aggregates.add(entry)
+    session["qa_version"] = session.get("qa_version", 0) + 1
 
+def record_answer(session: Dict[str, Any], session_id: str, question_entry: Optional[Dict[str, Any]], question_text: str,
+                  user_answer: str, current_round: Dict[str, Any], feedback: FeedbackResponse) -> Optional[Dict[str, Any]]:
+    """Stores the answer and feedback on the session; returns the questions_and_answers entry."""
     # Store the user's answer and feedback to the session history
     if "interview_history" in session:
         session["interview_history"].append({
-            "question": question_to_feedback,
-            "user_answer": answer_data.userAnswer,
+            "question": question_text,
+            "user_answer": user_answer,
             "feedback": feedback.dict()
         })
     
     # Also store in the new format for comprehensive summary
-    if answer_data.sessionId in sessions:
-        sessions[answer_data.sessionId]["questions_and_answers"].append({
-            "question": question_to_feedback,
-            "answer": answer_data.userAnswer,
-            "score": feedback.score,
-            "round_title": current_round["title"],
-            "type": current_round["type"],
-            "feedback_text": feedback.feedback_text,
-            "strengths": feedback.strengths,
-            "weaknesses": feedback.weaknesses
-        })
-        
-        # Update completion status and duration
-        if session.get("is_complete", False):
-            start_time = sessions[answer_data.sessionId].get("start_time")
-            if start_time:
-                duration = (datetime.now() - start_time).total_seconds() / 60
-                sessions[answer_data.sessionId]["duration_minutes"] = int(duration)
-            sessions[answer_data.sessionId]["is_complete"] = True
+    if session_id not in sessions:
+        return None
+    entry = {
+        "question_id": question_entry["question_id"] if question_entry else None,
+        "round_index": session.get("current_round_index", 0),
+        "question": question_text,
+        "answer": user_answer,
+        "score": feedback.score,
+        "round_title": current_round["title"],
+        "type": current_round["type"],
+        "feedback_text": feedback.feedback_text,
+        "strengths": feedback.strengths,
+        "weaknesses": feedback.weaknesses,
+        "grading": "provisional" if feedback.provisional else "graded"
+    }
+    sessions[session_id]["questions_and_answers"].append(entry)
+    note_answers_changed(session, entry)
     
+    # Update completion status and duration
+    if session.get("is_complete", False):
+        start_time = sessions[session_id].get("start_time")
+        if start_time:
+            duration = (datetime.now() - start_time).total_seconds() / 60
+            sessions[session_id]["duration_minutes"] = int(duration)
+        sessions[session_id]["is_complete"] = True
+    return entry
+
+async def advance_interview(session: Dict[str, Any], session_id: str, feedback: FeedbackResponse) -> InterviewSubmitResponse:
+    """Moves the session to the next question (or completes it) and builds the submit response."""
+    interview_plan = session["interview_plan"]
+    current_round_index = session["current_round_index"]
+    current_question_index = session["current_question_index"]
+    current_round = interview_plan[current_round_index]
+
     if current_question_index + 1 < current_round["question_count"]:
         session["current_question_index"] += 1
         
-        next_question_data = await get_next_question_data(session, current_round)
+        next_question_data = await take_question(session, (current_round_index, session["current_question_index"]), current_round)
         
         # Update session with new question
-        session["current_question"] = next_question_data.question
-        session["current_question_type"] = current_round["type"]
+        question_id = record_question(session, current_round_index, session["current_question_index"], current_round, next_question_data)
+        schedule_question_prefetch(session)
         
         return InterviewSubmitResponse(
             questionData=next_question_data,
+            questionId=question_id,
             roundTitle=current_round["title"],
             isComplete=False,
             feedback=feedback
         )
     else:
+        if is_batched_grading(session):
+            schedule_round_grading(session, current_round_index)
         if current_round_index + 1 < len(interview_plan):
             session["current_round_index"] += 1
             session["current_question_index"] = 0
             
             next_round = interview_plan[session["current_round_index"]]
-            next_question_data = await get_next_question_data(session, next_round)
+            next_question_data = await take_question(session, (session["current_round_index"], 0), next_round)
             
             # Update session with new question
-            session["current_question"] = next_question_data.question
-            session["current_question_type"] = next_round["type"]
+            question_id = record_question(session, session["current_round_index"], 0, next_round, next_question_data)
+            schedule_question_prefetch(session)
             
             return InterviewSubmitResponse(
                 questionData=next_question_data,
+                questionId=question_id,
                 roundTitle=next_round["title"],
                 isComplete=False,
                 feedback=feedback
             )
         else:
+            cancel_prefetched_work(session)
             # Mark interview as complete in new sessions storage
-            if answer_data.sessionId in sessions:
-                start_time = sessions[answer_data.sessionId].get("start_time")
+            if session_id in sessions:
+                start_time = sessions[session_id].get("start_time")
                 if start_time:
                     duration = (datetime.now() - start_time).total_seconds() / 60
-                    sessions[answer_data.sessionId]["duration_minutes"] = int(duration)
-                sessions[answer_data.sessionId]["is_complete"] = True
+                    sessions[session_id]["duration_minutes"] = int(duration)
+                sessions[session_id]["is_complete"] = True
             
             return InterviewSubmitResponse(
                 questionData=QuestionResponse(question="Congratulations! You have completed the mock interview.", type="complete"),
@@ -1273,32 +1856,145 @@ async def submit_answer(answer_data: InterviewAnswer):
             )
 
 
-# New endpoint for getting hints when stuck
-@app.post("/api/get-hint", response_model=HintResponse)
-async def get_hint(hint_request: HintRequest):
+@app.post("/api/submit-answer", response_model=InterviewSubmitResponse)
+async def submit_answer(answer_data: InterviewAnswer):
+    session = get_submit_session(answer_data.sessionId)
+    current_round = session["interview_plan"][session["current_round_index"]]
+    session["last_activity"] = datetime.now()
+    
+    question_entry, question_to_feedback, question_for_grading = get_question_for_grading(session)
+
+    # Generate feedback for the submitted answer (provisional when grading is batched per round)
+    feedback = await grade_answer(session, question_entry, question_for_grading, answer_data.userAnswer)
+
+    record_answer(session, answer_data.sessionId, question_entry, question_to_feedback, answer_data.userAnswer, current_round, feedback)
+    return await advance_interview(session, answer_data.sessionId, feedback)
+
+
+async def provisional_feedback_events(feedback: FeedbackResponse) -> AsyncIterator[tuple[str, Any]]:
+    yield "final", feedback
+
+def sse_event(event: str, data: Any) -> str:
+    """Formats one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/submit-answer/stream")
+async def submit_answer_stream(answer_data: InterviewAnswer):
     """
-    Provide a helpful hint to the user when they're stuck on a question.
-    Like a real interviewer would do.
+    Same as /api/submit-answer, but streams the feedback as Server-Sent Events while it is generated:
+    - feedback_delta: {"delta": str} appended pieces of feedback_text
+    - strengths / weaknesses: {"items": [...]} the (partial) lists whenever they change
+    - feedback: the final FeedbackResponse (authoritative, includes the score)
+    - entry: the persisted questions_and_answers entry
+    - next: the InterviewSubmitResponse for the next question
+    - timing: {"first_token_ms", "feedback_ms", "total_ms"} measured server-side
     """
-    try:
-        session_id = hint_request.sessionId
-        
-        if session_id not in sessions:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        session = sessions[session_id]
-        current_question = session.get("current_question", "")
-        question_type = session.get("current_question_type", "behavioral")
-        job_role = session.get("job_role", "")
-        current_answer = hint_request.currentAnswer
-        
-        # Track hint count
-        if "hints_used" not in session:
-            session["hints_used"] = 0
-        session["hints_used"] += 1
-        
-        # Generate contextual hint based on question type
-        hint_prompt = f"""You are a helpful interviewer. The candidate is stuck on this question:
+    session = get_submit_session(answer_data.sessionId)
+    request_start = time.perf_counter()
+
+    async def event_stream():
+        current_round = session["interview_plan"][session["current_round_index"]]
+        session["last_activity"] = datetime.now()
+        question_entry, question_to_feedback, question_for_grading = get_question_for_grading(session)
+
+        sent_text = ""
+        sent_lists: Dict[str, List[str]] = {"strengths": [], "weaknesses": []}
+        first_token_ms = None
+        feedback = None
+        if is_batched_grading(session):
+            # Nothing to stream - the provisional score is computed locally
+            feedback_events = provisional_feedback_events(GeminiService.provisional_feedback(question_entry, answer_data.userAnswer))
+        else:
+            feedback_events = GeminiService.stream_feedback_and_score(
+                question=question_for_grading,
+                userAnswer=answer_data.userAnswer,
+                company_name=session["company_name"],
+                job_role=session["job_role"]
+            )
+        async for kind, value in feedback_events:
+            if kind == "final":
+                feedback = value
+                break
+
+            events = []
+            partial_text = value.get("feedback_text")
+            if isinstance(partial_text, str) and partial_text:
+                full_text = GeminiService.AI_FEEDBACK_PREFIX + partial_text
+                if full_text.startswith(sent_text) and len(full_text) > len(sent_text):
+                    events.append(sse_event("feedback_delta", {"delta": full_text[len(sent_text):]}))
+                    sent_text = full_text
+            for key in ["strengths", "weaknesses"]:
+                items = value.get(key)
+                if isinstance(items, list):
+                    items = [item for item in items if item]
+                if isinstance(items, list) and items and items != sent_lists[key]:
+                    events.append(sse_event(key, {"items": items}))
+                    sent_lists[key] = list(items)
+
+            if events and first_token_ms is None:
+                first_token_ms = (time.perf_counter() - request_start) * 1000
+                metrics.observe("feedback_stream.first_token_ms", first_token_ms)
+            for event in events:
+                yield event
+
+        feedback_ms = (time.perf_counter() - request_start) * 1000
+        yield sse_event("feedback", feedback.dict())
+        entry = record_answer(session, answer_data.sessionId, question_entry, question_to_feedback, answer_data.userAnswer, current_round, feedback)
+        yield sse_event("entry", entry)
+        next_response = await advance_interview(session, answer_data.sessionId, feedback)
+        yield sse_event("next", next_response.dict())
+
+        total_ms = (time.perf_counter() - request_start) * 1000
+        metrics.observe("feedback_stream.feedback_ms", feedback_ms)
+        metrics.observe("feedback_stream.total_ms", total_ms)
+        yield sse_event("timing", {
+            "first_token_ms": round(first_token_ms, 1) if first_token_ms is not None else None,
+            "feedback_ms": round(feedback_ms, 1),
+            "total_ms": round(total_ms, 1),
+        })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """In-process latency percentiles and counters (including LLM single-flight coalescing)."""
+    snapshot = metrics.snapshot()
+    snapshot["llm_in_flight"] = llm_client.in_flight
+    snapshot["plan_cache"] = plan_cache.stats()
+    snapshot["question_bank"] = question_bank.stats()
+    snapshot["hint_cache"] = hint_cache.stats()
+    if vision_pool is not None:
+        snapshot["vision"] = vision_pool.stats()
+    checks = snapshot["counters"].get("novelty.checks", 0)
+    rejections = snapshot["counters"].get("novelty.rejections", 0)
+    snapshot["novelty"] = {"checks": checks, "rejections": rejections, "rejection_rate": rejections / checks if checks else 0.0}
+    return snapshot
+
+
+@app.get("/api/llm-status")
+async def get_llm_status():
+    """Circuit breaker state, rate limiter headroom and in-flight LLM calls."""
+    return llm_client.status()
+
+
+# =============================
+# Hints
+# =============================
+def current_hint_context(session: Dict[str, Any]) -> tuple:
+    """(question prompt text, question type, job role) for the session's current question."""
+    question_entry = get_current_question_entry(session)
+    current_question = describe_question(question_entry) if question_entry else session.get("current_question", "")
+    return current_question, session.get("current_question_type", "behavioral"), session.get("job_role", "")
+
+async def generate_hint_text(current_question: str, question_type: str, job_role: str, current_answer: str) -> str:
+    # Generate contextual hint based on question type
+    hint_prompt = f"""You are a helpful interviewer. The candidate is stuck on this question:
 
 Question: {current_question}
 Question Type: {question_type}
@@ -1317,9 +2013,50 @@ For coding questions: Hint at the algorithm or data structure, not the code
 
 Keep the hint to 2-3 sentences maximum. Be warm and encouraging like a real interviewer.
 """
+    return await llm_client.generate(hint_prompt, task="hint")
+
+def prewarm_hint(session: Dict[str, Any]) -> None:
+    """Pre-generates the empty-answer hint for the question just served (shared by every session that gets it)."""
+    if not HINT_PREWARM or llm_client.breaker.state != llm_client.breaker.CLOSED:
+        return
+    current_question, question_type, job_role = current_hint_context(session)
+    if not current_question:
+        return
+    key = HintCache.make_key(current_question, question_type, context=job_role)
+    with deadlines.detached():
+        hint_cache.prewarm(key, lambda: generate_hint_text(current_question, question_type, job_role, ""))
+
+
+# New endpoint for getting hints when stuck
+@app.post("/api/get-hint", response_model=HintResponse)
+async def get_hint(hint_request: HintRequest):
+    """
+    Provide a helpful hint to the user when they're stuck on a question.
+    Like a real interviewer would do. The empty-answer hint is cached per (question, type); a hint for an
+    answer in progress is generated from that answer and never shared.
+    """
+    try:
+        session_id = hint_request.sessionId
         
-        response = model.generate_content(hint_prompt)
-        hint_text = response.text.strip()
+        if session_id not in sessions:
+            raise HTTPException(status_code=404, detail="Session not found")
+        
+        session = sessions[session_id]
+        current_question, question_type, job_role = current_hint_context(session)
+        current_answer = hint_request.currentAnswer
+        
+        # Track hint count
+        if "hints_used" not in session:
+            session["hints_used"] = 0
+        session["hints_used"] += 1
+        
+        if HintCache.cacheable(current_answer):
+            key = HintCache.make_key(current_question, question_type, context=job_role)
+            hint_text = await deadlines.bounded(hint_cache.get(
+                key, lambda: generate_hint_text(current_question, question_type, job_role, "")
+            ), task="hint")
+        else:
+            hint_text = await generate_hint_text(current_question, question_type, job_role, current_answer)
         
         # Determine hint type
         hint_type = "guidance"
@@ -1334,6 +2071,7 @@ Keep the hint to 2-3 sentences maximum. Be warm and encouraging like a real inte
         raise
     except Exception as e:
         print(f"Error generating hint: {e}")
+        record_fallback("hint")
         # Provide a generic helpful hint as fallback
         return HintResponse(
             hint="Take a moment to think about your past experiences. What situation comes to mind? Try using the STAR method: Situation, Task, Action, Result.",
@@ -1387,24 +2125,83 @@ async def analyze_behavior(request: VisionAnalysisRequest):
     """
     try:
         print(f"[analyze-behavior] Received request, image length: {len(request.image) if request.image else 0}")
-        result = vision_service.process_base64_frame(request.image)
+        result = await run_vision(request.sessionId, lambda service: service.process_base64_frame(request.image))
         
         if "error" in result:
             print(f"[analyze-behavior] Error from vision service: {result['error']}")
             raise HTTPException(status_code=400, detail=result["error"])
         
-        # Optionally store behavior metrics in session
-        if request.sessionId and request.sessionId in sessions:
-            if "behavior_metrics" not in sessions[request.sessionId]:
-                sessions[request.sessionId]["behavior_metrics"] = []
-            
-            sessions[request.sessionId]["behavior_metrics"].append({
-                "timestamp": result["timestamp"],
-                "confidence_score": result["confidence_score"],
-                "eye_contact": result["eye_contact"],
-                "posture_good": result["posture"]["is_good"]
-            })
+        metrics.increment("vision.frames.json")
+        metrics.increment("vision.frame_bytes.json", len(request.image))
+        record_behavior_metrics(request.sessionId, result)
+        return VisionAnalysisResponse(**result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in behavior analysis: {e}")
+        raise HTTPException(status_code=500, detail=f"Vision analysis error: {str(e)}")
+
+
+# Largest frame body accepted by the binary endpoint (a 640x480 webcam JPEG is ~30-60 KB)
+BEHAVIOR_FRAME_MAX_BYTES = int(os.getenv("BEHAVIOR_FRAME_MAX_BYTES", str(2 * 1024 * 1024)))
+BEHAVIOR_FRAME_TYPES = ("image/jpeg", "image/png", "image/webp", "application/octet-stream")
+
+
+async def run_vision(session_id: Optional[str], analyze: Callable[[Any], Dict[str, Any]]) -> Dict[str, Any]:
+    """Analyzes a frame on the session's own tracker (vision_pool.py), off the event loop."""
+    if vision_pool is None:
+        raise HTTPException(status_code=503, detail="Vision service unavailable")
+    try:
+        return await vision_pool.analyze(session_id if session_id in sessions else None, analyze)
+    except VisionPoolBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+def record_behavior_metrics(session_id: Optional[str], result: Dict[str, Any]) -> None:
+    """Optionally store behavior metrics in session"""
+    if session_id and session_id in sessions:
+        if "behavior_metrics" not in sessions[session_id]:
+            sessions[session_id]["behavior_metrics"] = []
+        
+        sessions[session_id]["behavior_metrics"].append({
+            "timestamp": result["timestamp"],
+            "confidence_score": result["confidence_score"],
+            "eye_contact": result["eye_contact"],
+            "posture_good": result["posture"]["is_good"]
+        })
+
+
+@app.post("/api/analyze-behavior/frame", response_model=VisionAnalysisResponse)
+async def analyze_behavior_frame(request: Request, sessionId: Optional[str] = None):
+    """
+    Binary variant of /api/analyze-behavior: the body is the raw encoded frame (Content-Type: image/jpeg)
+    and the session goes in the query string. No JSON parsing or base64 step - the frame is decoded
+    straight from the request body, and the upload is ~25% smaller than the base64 data URL.
+    """
+    if vision_pool is None:
+        raise HTTPException(status_code=503, detail="Vision service unavailable")
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in BEHAVIOR_FRAME_TYPES:
+        raise HTTPException(status_code=415, detail=f"Send the frame as a raw image body ({', '.join(BEHAVIOR_FRAME_TYPES)})")
+    declared_length = request.headers.get("content-length")
+    if declared_length and declared_length.isdigit() and int(declared_length) > BEHAVIOR_FRAME_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Frame too large")
+    
+    try:
+        frame_bytes = await request.body()
+        if not frame_bytes:
+            raise HTTPException(status_code=400, detail="Empty frame")
+        if len(frame_bytes) > BEHAVIOR_FRAME_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="Frame too large")
         
+        result = await run_vision(sessionId, lambda service: service.process_encoded_frame(frame_bytes))
+        if "error" in result:
+            print(f"[analyze-behavior/frame] Error from vision service: {result['error']}")
+            raise HTTPException(status_code=400, detail=result["error"])
+        
+        metrics.increment("vision.frames.binary")
+        metrics.increment("vision.frame_bytes.binary", len(frame_bytes))
+        record_behavior_metrics(sessionId, result)
         return VisionAnalysisResponse(**result)
     except HTTPException:
         raise
@@ -1413,6 +2210,65 @@ async def analyze_behavior(request: VisionAnalysisRequest):
         raise HTTPException(status_code=500, detail=f"Vision analysis error: {str(e)}")
 
 
+@app.websocket("/ws/behavior/{session_id}")
+async def behavior_stream(websocket: WebSocket, session_id: str):
+    """
+    Streaming behavior analysis for one session over a single connection. The client sends encoded frames
+    as binary messages and gets a VisionAnalysisResponse JSON message back for every frame analyzed.
+    Only the newest frame is analyzed: frames that arrive while one is being analyzed replace each other,
+    so a slow analysis drops stale frames instead of building a backlog. Results are appended to the
+    session's behavior_metrics directly.
+    """
+    if vision_pool is None or session_id not in sessions:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    metrics.increment("vision.ws.connections")
+
+    latest: Dict[str, Optional[bytes]] = {"frame": None}
+    frame_ready = asyncio.Event()
+
+    async def analyze_frames() -> None:
+        while True:
+            await frame_ready.wait()
+            frame_ready.clear()
+            frame_bytes, latest["frame"] = latest["frame"], None
+            try:
+                result = await run_vision(session_id, lambda service: service.process_encoded_frame(frame_bytes))
+            except HTTPException as e:
+                result = {"error": e.detail}
+            if "error" in result:
+                await websocket.send_json({"error": result["error"]})
+                continue
+            metrics.increment("vision.ws.analyzed")
+            record_behavior_metrics(session_id, result)
+            await websocket.send_json(VisionAnalysisResponse(**result).dict())
+
+    def analyzer_stopped(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.info(f"Behavior stream for session {session_id} stopped: {task.exception()}")
+
+    analyzer = asyncio.ensure_future(analyze_frames())
+    analyzer.add_done_callback(analyzer_stopped)
+    try:
+        while not analyzer.done():
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            frame_bytes = message.get("bytes")
+            if not frame_bytes or len(frame_bytes) > BEHAVIOR_FRAME_MAX_BYTES:
+                metrics.increment("vision.ws.rejected")
+                continue
+            metrics.increment("vision.frames.ws")
+            metrics.increment("vision.frame_bytes.ws", len(frame_bytes))
+            if latest["frame"] is not None:
+                metrics.increment("vision.ws.dropped")  # superseded before it was analyzed
+            latest["frame"] = frame_bytes
+            frame_ready.set()
+    finally:
+        analyzer.cancel()
+
+
 # Endpoint to get behavior summary for a session
 @app.get("/api/behavior-summary/{session_id}")
 async def get_behavior_summary(session_id: str):
@@ -0,0 +1,76 @@
+"""
+Lightweight in-process metrics - counters and latency percentiles
+Exposed by the backend at /api/metrics
+"""
+
+import threading
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Iterable, Optional
+
+
+def percentile(samples: Iterable[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile (0-100) of the samples, or None if there are none."""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Metrics:
+    """Thread-safe counters plus a bounded sample window per timing for p50/p95/p99."""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._timings: Dict[str, Deque[float]] = {}
+        self._timing_counts: Dict[str, int] = defaultdict(int)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    def count(self, name: str) -> int:
+        return self._counters.get(name, 0)
+
+    def observe(self, name: str, value_ms: float) -> None:
+        """Records a latency sample in milliseconds."""
+        with self._lock:
+            samples = self._timings.get(name)
+            if samples is None:
+                samples = self._timings[name] = deque(maxlen=self.window)
+            samples.append(value_ms)
+            self._timing_counts[name] += 1
+
+    def percentile(self, name: str, pct: float) -> Optional[float]:
+        """Percentile (0-100) over the recent window, or None if there are no samples."""
+        with self._lock:
+            samples = list(self._timings.get(name, ()))
+        return percentile(samples, pct)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            timings = {name: list(samples) for name, samples in self._timings.items()}
+            timing_counts = dict(self._timing_counts)
+
+        def pick(samples, pct):
+            return round(percentile(samples, pct), 2)
+
+        return {
+            "counters": counters,
+            "timings_ms": {
+                name: {
+                    "count": timing_counts[name],
+                    "p50": pick(samples, 50),
+                    "p95": pick(samples, 95),
+                    "p99": pick(samples, 99),
+                    "max": round(max(samples), 2),
+                }
+                for name, samples in timings.items() if samples
+            },
+        }
+
+
+# Shared registry used by the backend services
+metrics = Metrics()
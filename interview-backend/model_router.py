@@ -0,0 +1,166 @@
+"""
+Model Router - per-task model tier, output token cap and timeout, with latency SLO downgrades
+Short interactive tasks (hints, MCQs) run on a lighter model; quality-critical tasks (summary, ATS review,
+plan) stay on the standard model and have no SLO, so they are never downgraded. A task already on the
+lightest tier can't be downgraded, so an SLO breach there is reported (metric and warning) instead
+"""
+
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from metrics import metrics, percentile
+
+logger = logging.getLogger(__name__)
+
+# Heaviest first; a downgrade moves a task one step to the right
+TIER_ORDER: List[str] = ["standard", "lite"]
+
+# Model per tier; override with LLM_MODEL_<TIER> (GEMINI_MODEL still sets the standard tier)
+DEFAULT_TIER_MODELS: Dict[str, str] = {
+    "standard": "gemini-2.5-flash",
+    "lite": "gemini-2.5-flash-lite",
+}
+
+# task: (tier, max_output_tokens, timeout seconds, p95 SLO ms). Override with LLM_TIER_<TASK>,
+# LLM_MAX_TOKENS_<TASK>, LLM_TIMEOUT_<TASK> and LLM_SLO_MS_<TASK> (0 disables the SLO).
+# max_output_tokens None leaves the cap to the caller (batch calls scale it with the batch size).
+DEFAULT_TASK_ROUTES: Dict[str, tuple] = {
+    "plan": ("standard", 2000, 30.0, None),
+    "question": ("standard", 150, 15.0, 3000),
+    "coding_question": ("standard", 300, 25.0, 6000),
+    "mcq": ("lite", 400, 15.0, 3000),
+    "mcq_batch": ("lite", None, 45.0, 12000),
+    "ats_review": ("standard", 1000, 45.0, None),
+    "summary": ("standard", 600, 45.0, None),
+    "feedback": ("standard", 600, 30.0, None),
+    "feedback_batch": ("standard", None, 60.0, None),
+    "hint": ("lite", 200, 10.0, 2500),
+}
+
+
+class TaskRoute:
+    """Routing settings for one task plus its recent upstream latencies on the current tier."""
+
+    def __init__(self, task: str, tier: str, max_output_tokens: Optional[int], timeout: float,
+                 slo_ms: Optional[float], window: int):
+        self.task = task
+        self.configured_tier = tier
+        self.tier = tier
+        self.max_output_tokens = max_output_tokens
+        self.timeout = timeout
+        self.slo_ms = slo_ms
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.downgraded_at: Optional[float] = None
+        self.slo_breached = False  # p95 over the SLO on the lightest tier, where there is nothing to downgrade to
+
+    def percentile(self, pct: float) -> Optional[float]:
+        return percentile(self.samples, pct)
+
+    def p95(self) -> Optional[float]:
+        return self.percentile(95)
+
+
+class ModelRouter:
+    """
+    Maps each GeminiService task to a model tier, max_output_tokens and timeout. Upstream latencies are
+    recorded per task; when a task's p95 over the last LLM_ROUTE_WINDOW calls (at least LLM_ROUTE_MIN_SAMPLES)
+    breaches its SLO it is moved to the next lighter tier, and after LLM_ROUTE_RECOVERY_SECONDS it goes
+    back to its configured tier to re-measure. On the lightest tier a breach is counted in
+    llm.slo_breaches.<task> and logged once, until the p95 is back under the SLO.
+    """
+
+    def __init__(self, default_timeout: float = 30.0):
+        self.default_timeout = default_timeout
+        self.tier_models: Dict[str, str] = {tier: os.getenv(f"LLM_MODEL_{tier.upper()}", model) for tier, model in DEFAULT_TIER_MODELS.items()}
+        if not os.getenv("LLM_MODEL_STANDARD") and os.getenv("GEMINI_MODEL"):
+            self.tier_models["standard"] = os.getenv("GEMINI_MODEL")
+        self.window = int(os.getenv("LLM_ROUTE_WINDOW", "50"))
+        self.min_samples = int(os.getenv("LLM_ROUTE_MIN_SAMPLES", "20"))
+        self.recovery_seconds = float(os.getenv("LLM_ROUTE_RECOVERY_SECONDS", "300"))
+
+        self.routes: Dict[str, TaskRoute] = {}
+        for task, (tier, max_tokens, timeout, slo_ms) in DEFAULT_TASK_ROUTES.items():
+            prefix = task.upper()
+            tier = os.getenv(f"LLM_TIER_{prefix}", tier).lower()
+            if tier not in self.tier_models:
+                logger.warning(f"Unknown model tier '{tier}' for task '{task}', using standard")
+                tier = "standard"
+            max_tokens = int(os.getenv(f"LLM_MAX_TOKENS_{prefix}", max_tokens or 0)) or None
+            slo_ms = float(os.getenv(f"LLM_SLO_MS_{prefix}", slo_ms or 0)) or None
+            timeout = float(os.getenv(f"LLM_TIMEOUT_{prefix}", timeout))
+            self.routes[task] = TaskRoute(task, tier, max_tokens, timeout, slo_ms, self.window)
+
+    def route(self, task: str) -> Optional[TaskRoute]:
+        route = self.routes.get(task)
+        if route is not None and route.downgraded_at is not None and time.monotonic() - route.downgraded_at >= self.recovery_seconds:
+            logger.info(f"Routing '{task}' back to the {route.configured_tier} tier")
+            route.tier = route.configured_tier
+            route.downgraded_at = None
+            route.samples.clear()
+        return route
+
+    def model_for(self, task: str) -> Optional[str]:
+        route = self.route(task)
+        return self.tier_models[route.tier] if route is not None else None
+
+    def timeout_for(self, task: str) -> float:
+        route = self.routes.get(task)
+        return route.timeout if route is not None else self.default_timeout
+
+    def latency_percentile(self, task: str, pct: float, min_samples: int = 1) -> Optional[float]:
+        """Percentile (ms) of the task's recent upstream latencies on its current tier; None with too few samples."""
+        route = self.routes.get(task)
+        if route is None or len(route.samples) < min_samples:
+            return None
+        return route.percentile(pct)
+
+    def apply(self, task: str, generation_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Generation config with the task's max_output_tokens filled in (an explicit caller value wins)."""
+        route = self.routes.get(task)
+        if route is None or route.max_output_tokens is None or "max_output_tokens" in generation_config:
+            return generation_config
+        return {**generation_config, "max_output_tokens": route.max_output_tokens}
+
+    def record(self, task: str, latency_ms: float) -> None:
+        """Records one upstream call's latency (a timeout counts as its full timeout) and checks the SLO."""
+        metrics.observe(f"llm.latency_ms.{task}", latency_ms)
+        route = self.routes.get(task)
+        if route is None:
+            return
+        route.samples.append(latency_ms)
+        if route.slo_ms is None or len(route.samples) < self.min_samples:
+            return
+        p95 = route.p95()
+        if p95 <= route.slo_ms:
+            route.slo_breached = False
+            return
+        position = TIER_ORDER.index(route.tier)
+        if position + 1 < len(TIER_ORDER):
+            route.tier = TIER_ORDER[position + 1]
+            route.downgraded_at = time.monotonic()
+            route.samples.clear()
+            metrics.increment(f"llm.route_downgrades.{task}")
+            logger.warning(f"'{task}' p95 {p95:.0f}ms breached its {route.slo_ms:.0f}ms SLO - routing to the {route.tier} tier")
+        elif not route.slo_breached:
+            route.slo_breached = True
+            metrics.increment(f"llm.slo_breaches.{task}")
+            logger.warning(f"'{task}' p95 {p95:.0f}ms breached its {route.slo_ms:.0f}ms SLO on the {route.tier} tier - no lighter tier to route to")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            task: {
+                "tier": route.tier,
+                "model": self.tier_models[route.tier],
+                "configured_tier": route.configured_tier,
+                "max_output_tokens": route.max_output_tokens,
+                "timeout": route.timeout,
+                "slo_ms": route.slo_ms,
+                "slo_breached": route.slo_breached,
+                "p95_ms": round(route.p95(), 1) if route.samples else None,
+                "samples": len(route.samples),
+            }
+            for task, route in self.routes.items()
+        }
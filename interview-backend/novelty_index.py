@@ -0,0 +1,109 @@
+"""
+Novelty Index - cheap near-duplicate detection for interview questions
+MinHash signatures over content-word shingles with LSH banding, so checking a question against everything a
+session (or a question-bank pool) has seen costs a few dict lookups instead of a pairwise comparison
+"""
+
+import os
+import random
+import re
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+NUM_PERM = 64
+BANDS = 32
+ROWS_PER_BAND = NUM_PERM // BANDS
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1337)  # fixed so signatures are comparable across indexes and restarts
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "did", "do", "does", "for", "from", "how", "i", "in",
+    "is", "it", "me", "of", "on", "or", "that", "the", "this", "to", "was", "were", "what", "when", "where",
+    "which", "while", "who", "why", "with", "would", "you", "your",
+    # interview boilerplate that says nothing about the topic
+    "tell", "describe", "about", "give", "example", "share", "time", "walk", "through", "explain", "discuss",
+    "had", "have", "there", "some", "one", "situation", "question", "write", "function", "given", "return",
+}
+
+Signature = Tuple[int, ...]
+
+
+def _stem(word: str) -> str:
+    """Crude suffix stripping so 'resolved' / 'resolve' / 'resolving' share a shingle."""
+    for suffix in ("ing", "ed", "es", "e", "s"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def shingles(text: str) -> Set[str]:
+    """Stemmed content words of the normalized text (topic words, not phrasing)."""
+    return {_stem(w) for w in re.findall(r"[a-z0-9]+", (text or "").lower()) if w not in _STOPWORDS}
+
+
+@lru_cache(maxsize=4096)
+def signature(text: str) -> Signature:
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles(text)] or [0]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(first: Signature, second: Signature) -> float:
+    """Estimated Jaccard similarity of the two shingle sets."""
+    return sum(1 for x, y in zip(first, second) if x == y) / NUM_PERM
+
+
+class NoveltyIndex:
+    """
+    Bounded set of question texts with near-duplicate lookup. A question is a near duplicate when its
+    estimated shingle Jaccard similarity to an indexed question is >= `threshold` (NOVELTY_THRESHOLD).
+    Oldest entries are evicted beyond `max_items`.
+    """
+
+    def __init__(self, threshold: Optional[float] = None, max_items: int = 200):
+        self.threshold = threshold if threshold is not None else float(os.getenv("NOVELTY_THRESHOLD", "0.5"))
+        self.max_items = max_items
+        self._items: "OrderedDict[int, Tuple[str, Signature]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Signature], Set[int]] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @staticmethod
+    def _bands(sig: Signature):
+        for band in range(BANDS):
+            yield band, sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+
+    def max_similarity(self, text: str) -> float:
+        """Highest estimated similarity to an indexed question sharing at least one LSH band (0.0 if none)."""
+        sig = signature(text)
+        candidates: Set[int] = set()
+        for band_key in self._bands(sig):
+            candidates |= self._buckets.get(band_key, set())
+        return max((similarity(sig, self._items[item_id][1]) for item_id in candidates), default=0.0)
+
+    def is_near_duplicate(self, text: str) -> bool:
+        return bool(self._items) and self.max_similarity(text) >= self.threshold
+
+    def add(self, text: str) -> None:
+        sig = signature(text)
+        item_id = self._next_id
+        self._next_id += 1
+        self._items[item_id] = (text, sig)
+        for band_key in self._bands(sig):
+            self._buckets.setdefault(band_key, set()).add(item_id)
+        while len(self._items) > self.max_items:
+            old_id, (_, old_sig) = self._items.popitem(last=False)
+            for band_key in self._bands(old_sig):
+                bucket = self._buckets.get(band_key)
+                if bucket is not None:
+                    bucket.discard(old_id)
+                    if not bucket:
+                        del self._buckets[band_key]
+
+    def recent(self, limit: int = 10) -> List[str]:
+        """Most recently indexed question texts, newest last - used to steer generation away from covered topics."""
+        return [text for text, _ in list(self._items.values())[-limit:]]
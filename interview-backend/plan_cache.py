@@ -0,0 +1,143 @@
+"""
+Interview Plan Cache - reuses generated plans for popular (company, role, experience) inputs
+Keeps a small pool of variants per key so plans still vary, and lets a preview hand its exact plan to start-interview
+"""
+
+import asyncio
+import copy
+import os
+import random
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from metrics import metrics
+
+PlanResult = Tuple[List[Dict[str, Any]], bool, str]
+
+
+class PlanCache:
+    """
+    LRU cache of AI-generated interview plans keyed on normalized company, role and experience band.
+    Each key holds up to `variants_per_key` plans; until the pool is full every lookup generates a
+    fresh variant, afterwards a random cached variant is served. Variants expire after `ttl_seconds`.
+    Fallback (non-AI) plans are never cached since they are generated locally.
+    Concurrent misses for a key only start as many generations as the pool still needs;
+    further callers join an in-flight generation (single-flight per key).
+    """
+
+    def __init__(self, max_keys: Optional[int] = None, variants_per_key: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None, handoff_ttl_seconds: Optional[float] = None):
+        self.max_keys = max_keys or int(os.getenv("PLAN_CACHE_MAX_KEYS", "512"))
+        self.variants_per_key = variants_per_key or int(os.getenv("PLAN_CACHE_VARIANTS", "3"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("PLAN_CACHE_TTL_MINUTES", "360")) * 60
+        self.handoff_ttl_seconds = handoff_ttl_seconds or float(os.getenv("PLAN_HANDOFF_TTL_MINUTES", "60")) * 60
+
+        # key -> list of (created_at, PlanResult)
+        self._entries: "OrderedDict[Tuple[str, str, str], List[Tuple[float, PlanResult]]]" = OrderedDict()
+        # plan_id -> (created_at, key, PlanResult) for preview -> start handoff
+        self._handoffs: "OrderedDict[str, Tuple[float, Tuple[str, str, str], PlanResult]]" = OrderedDict()
+        # key -> generations currently in flight
+        self._inflight: Dict[Tuple[str, str, str], List[asyncio.Task]] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def experience_band(years_of_experience: int) -> str:
+        """Same bands the plan prompt uses: junior (0-2), mid (3-5), senior (6+)."""
+        if years_of_experience >= 6:
+            return "senior"
+        if years_of_experience >= 3:
+            return "mid"
+        return "junior"
+
+    @classmethod
+    def make_key(cls, company_name: str, job_role: str, years_of_experience: int) -> Tuple[str, str, str]:
+        normalize = lambda value: " ".join((value or "").lower().split())
+        return normalize(company_name), normalize(job_role), cls.experience_band(years_of_experience)
+
+    async def get_plan(self, company_name: str, job_role: str, years_of_experience: int,
+                       generate: Callable[[str, str, int], Awaitable[PlanResult]]) -> PlanResult:
+        """Returns a plan for the inputs, generating a new variant while the key's pool isn't full."""
+        key = self.make_key(company_name, job_role, years_of_experience)
+        now = time.time()
+
+        variants = [v for v in self._entries.get(key, []) if now - v[0] < self.ttl_seconds]
+        if len(variants) >= self.variants_per_key:
+            self.hits += 1
+            self._entries[key] = variants
+            self._entries.move_to_end(key)
+            plan, is_ai_generated, generation_source = random.choice(variants)[1]
+            return copy.deepcopy(plan), is_ai_generated, generation_source
+
+        pending = self._inflight.get(key, [])
+        if pending and len(variants) + len(pending) >= self.variants_per_key:
+            self.coalesced += 1
+            metrics.increment("llm.coalesced")
+            metrics.increment("llm.coalesced.plan")
+            plan, is_ai_generated, generation_source = await asyncio.shield(random.choice(pending))
+            return copy.deepcopy(plan), is_ai_generated, generation_source
+
+        self.misses += 1
+        task = asyncio.ensure_future(self._generate_variant(key, company_name, job_role, years_of_experience, generate))
+        self._inflight.setdefault(key, []).append(task)
+        plan, is_ai_generated, generation_source = await asyncio.shield(task)
+        return copy.deepcopy(plan), is_ai_generated, generation_source
+
+    async def _generate_variant(self, key: Tuple[str, str, str], company_name: str, job_role: str,
+                                years_of_experience: int, generate: Callable[[str, str, int], Awaitable[PlanResult]]) -> PlanResult:
+        try:
+            result = await generate(company_name, job_role, years_of_experience)
+        finally:
+            pending = self._inflight.get(key, [])
+            pending[:] = [t for t in pending if not t.done() and t is not asyncio.current_task()]
+            if not pending:
+                self._inflight.pop(key, None)
+        plan, is_ai_generated, _ = result
+        if is_ai_generated and plan:
+            variants = [v for v in self._entries.get(key, []) if time.time() - v[0] < self.ttl_seconds]
+            variants.append((time.time(), (copy.deepcopy(plan), *result[1:])))
+            self._entries[key] = variants[-self.variants_per_key:]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+        return result
+
+    def remember(self, company_name: str, job_role: str, years_of_experience: int, result: PlanResult) -> str:
+        """Stores the exact plan shown in a preview and returns a plan_id start-interview can claim."""
+        self._prune_handoffs()
+        plan_id = uuid.uuid4().hex
+        key = self.make_key(company_name, job_role, years_of_experience)
+        self._handoffs[plan_id] = (time.time(), key, (copy.deepcopy(result[0]), *result[1:]))
+        while len(self._handoffs) > self.max_keys * self.variants_per_key:
+            self._handoffs.popitem(last=False)
+        return plan_id
+
+    def claim(self, plan_id: str, company_name: str, job_role: str, years_of_experience: int) -> Optional[PlanResult]:
+        """Returns (and removes) the previewed plan if it exists, hasn't expired and matches the inputs."""
+        self._prune_handoffs()
+        handoff = self._handoffs.pop(plan_id, None) if plan_id else None
+        if not handoff or handoff[1] != self.make_key(company_name, job_role, years_of_experience):
+            return None
+        return handoff[2]
+
+    def _prune_handoffs(self):
+        now = time.time()
+        while self._handoffs:
+            created_at = next(iter(self._handoffs.values()))[0]
+            if now - created_at < self.handoff_ttl_seconds:
+                break
+            self._handoffs.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self._entries),
+            "variants": sum(len(v) for v in self._entries.values()),
+            "pending_handoffs": len(self._handoffs),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,287 @@
+"""
+Question Bank - pre-generated interview questions served without an LLM round trip
+Pools are indexed by (company, role, experience band, round type, round title), filled offline by the
+batch generator CLI below and topped up by background refill workers while the server runs.
+Questions are generated for the round's title, so a banked question keeps the tailoring a live one has.
+
+Usage (offline batch generation):
+    python question_bank.py --company Google --role "Software Engineer" --years 3 --count 20
+    python question_bank.py --company Google --role "Software Engineer" --years 3 --rounds "Recruiter Screen=behavioral,Online Assessment=mcq"
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from metrics import metrics
+from novelty_index import NoveltyIndex
+from plan_cache import PlanCache
+
+logger = logging.getLogger(__name__)
+
+BankKey = Tuple[str, str, str, str, str]
+# generate(company_name, job_role, years_of_experience, round_type, round_title, count) -> up to `count` question
+# payload dicts (batch-capable round types generate them in one call), or None when the model is unavailable
+QuestionGenerator = Callable[[str, str, int, str, str, int], Awaitable[Optional[List[Dict[str, Any]]]]]
+
+DEFAULT_BANK_PATH = os.path.join(os.path.dirname(__file__), "question_bank.json")
+
+
+def bank_round_type(round_type: str) -> str:
+    """Plan round types map onto the three question shapes the bank stores."""
+    if round_type in ["technical", "dsa"]:
+        return "coding"
+    if round_type == "mcq":
+        return "mcq"
+    return "behavioral"
+
+
+def question_fingerprint(question_text: str) -> str:
+    """Stable fingerprint of a question's normalized text, used for per-session no-repeat checks."""
+    normalized = " ".join((question_text or "").lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+class QuestionBank:
+    """
+    In-memory pools of question payloads (the dict form of the question response models).
+    pop() is an O(1) deque pop that skips questions the session has already seen. Refills are speculative
+    LLM spend, so a pool is only refilled once `min_demand` different sessions have asked for it (round titles
+    are free text; most keys are asked for once), and one refill adds at most `refill_max` questions towards
+    `target_size`. Each pool also keeps a NoveltyIndex so paraphrases of pooled questions are rejected on add
+    and generation can be steered.
+    """
+
+    def __init__(self, target_size: Optional[int] = None, low_water: Optional[int] = None,
+                 refill_concurrency: Optional[int] = None, refill_enabled: Optional[bool] = None):
+        self.target_size = target_size or int(os.getenv("QUESTION_BANK_TARGET_SIZE", "10"))
+        self.low_water = low_water or int(os.getenv("QUESTION_BANK_LOW_WATER", "3"))
+        self.refill_concurrency = refill_concurrency or int(os.getenv("QUESTION_BANK_REFILL_CONCURRENCY", "2"))
+        self.refill_max = int(os.getenv("QUESTION_BANK_REFILL_MAX", "3"))
+        # A pool whose generations keep coming back as repeats is saturated; more calls won't add to it
+        self.max_consecutive_rejections = int(os.getenv("QUESTION_BANK_MAX_REJECTIONS", "2"))
+        self.min_demand = int(os.getenv("QUESTION_BANK_MIN_DEMAND", "2"))
+        self.max_demand_keys = int(os.getenv("QUESTION_BANK_MAX_DEMAND_KEYS", "4096"))
+        if refill_enabled is None:
+            refill_enabled = os.getenv("QUESTION_BANK_REFILL", "1") not in ["0", "false", "False"]
+        self.refill_enabled = refill_enabled
+
+        self._pools: Dict[BankKey, Deque[Dict[str, Any]]] = {}
+        self._fingerprints: Dict[BankKey, Set[str]] = {}
+        self._novelty: Dict[BankKey, NoveltyIndex] = {}
+        self._refills: Dict[BankKey, asyncio.Task] = {}
+        # key -> sessions that asked for it (up to min_demand), LRU-bounded
+        self._demand: "OrderedDict[BankKey, Set[str]]" = OrderedDict()
+        self._refill_semaphore: Optional[asyncio.Semaphore] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.near_duplicates = 0
+
+    @staticmethod
+    def make_key(company_name: str, job_role: str, years_of_experience: int, round_type: str, round_title: str) -> BankKey:
+        title = " ".join((round_title or "").lower().split())
+        return (*PlanCache.make_key(company_name, job_role, years_of_experience), bank_round_type(round_type), title)
+
+    def novelty_index(self, key: BankKey) -> NoveltyIndex:
+        """Near-duplicate index of the questions generated for a pool (kept after they are popped)."""
+        return self._novelty.setdefault(key, NoveltyIndex())
+
+    def add(self, key: BankKey, questions: Iterable[Dict[str, Any]]) -> int:
+        """Adds questions to a pool, skipping ones already pooled or near duplicates of them. Returns how many were added."""
+        pool = self._pools.setdefault(key, deque())
+        fingerprints = self._fingerprints.setdefault(key, set())
+        novelty = self.novelty_index(key)
+        added = 0
+        for question in questions:
+            fingerprint = question_fingerprint(question.get("question", ""))
+            if not question.get("question") or fingerprint in fingerprints:
+                continue
+            if novelty.is_near_duplicate(question["question"]):
+                self.near_duplicates += 1
+                continue
+            pool.append(question)
+            fingerprints.add(fingerprint)
+            novelty.add(question["question"])
+            added += 1
+        return added
+
+    def pop(self, company_name: str, job_role: str, years_of_experience: int, round_type: str, round_title: str,
+            seen: Optional[Set[str]] = None, reject: Optional[Callable[[str], bool]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Pops the next question for the key that isn't in `seen` (fingerprints already served to
+        the session) and isn't rejected by `reject(question_text)` (e.g. a session near-duplicate check).
+        Skipped questions rotate to the back so other sessions can still use them.
+        """
+        key = self.make_key(company_name, job_role, years_of_experience, round_type, round_title)
+        pool = self._pools.get(key)
+        seen = seen or set()
+        if pool:
+            for _ in range(len(pool)):
+                question = pool.popleft()
+                fingerprint = question_fingerprint(question["question"])
+                if fingerprint in seen or (reject is not None and reject(question["question"])):
+                    pool.append(question)
+                    continue
+                self._fingerprints[key].discard(fingerprint)
+                self.hits += 1
+                return dict(question)
+        self.misses += 1
+        return None
+
+    def size(self, key: BankKey) -> int:
+        return len(self._pools.get(key, ()))
+
+    def recent_questions(self, key: BankKey, limit: int = 15) -> List[str]:
+        """Texts of the pool's newest questions, for "don't repeat these" prompts."""
+        pool = self._pools.get(key, ())
+        return [question["question"] for question in list(pool)[-limit:]]
+
+    def _record_demand(self, key: BankKey, requester: str) -> bool:
+        """Notes that `requester` asked for the key; True once min_demand different requesters have."""
+        requesters = self._demand.setdefault(key, set())
+        self._demand.move_to_end(key)
+        if len(requesters) < self.min_demand:
+            requesters.add(requester)
+        while len(self._demand) > self.max_demand_keys:
+            self._demand.popitem(last=False)
+        return len(requesters) >= self.min_demand
+
+    def request_refill(self, company_name: str, job_role: str, years_of_experience: int, round_type: str,
+                       round_title: str, generate: QuestionGenerator, requester: str = "") -> None:
+        """Schedules a background top-up for the key if it is below the low-water mark and in demand."""
+        key = self.make_key(company_name, job_role, years_of_experience, round_type, round_title)
+        if not self.refill_enabled or not self._record_demand(key, requester) or self.size(key) >= self.low_water:
+            return
+        running = self._refills.get(key)
+        if running and not running.done():
+            return
+        self._refills[key] = asyncio.create_task(
+            self._refill(key, company_name, job_role, years_of_experience, round_type, round_title, generate)
+        )
+
+    async def _refill(self, key: BankKey, company_name: str, job_role: str, years_of_experience: int,
+                      round_type: str, round_title: str, generate: QuestionGenerator) -> None:
+        if self._refill_semaphore is None:
+            self._refill_semaphore = asyncio.Semaphore(self.refill_concurrency)
+        async with self._refill_semaphore:
+            goal = min(self.target_size, self.size(key) + self.refill_max)
+            attempts = rejections = 0
+            while self.size(key) < goal and attempts < self.refill_max * 2:
+                attempts += 1
+                try:
+                    questions = await generate(company_name, job_role, years_of_experience, round_type, round_title,
+                                               goal - self.size(key))
+                except Exception as e:
+                    logger.warning(f"Question bank refill for {key} failed: {e}")
+                    break
+                if not questions:
+                    # Generator fell back to a local question - the model is unavailable, stop for now
+                    break
+                if self.add(key, questions):
+                    rejections = 0
+                    continue
+                rejections += 1
+                if rejections >= self.max_consecutive_rejections:
+                    metrics.increment("question_bank.refills_saturated")
+                    logger.info(f"Question bank pool {key} looks saturated ({rejections} repeats in a row), stopping refill")
+                    break
+
+    def cancel_refills(self) -> None:
+        for task in self._refills.values():
+            if not task.done():
+                task.cancel()
+        self._refills.clear()
+
+    def load(self, path: str = DEFAULT_BANK_PATH) -> int:
+        """Loads pools written by the batch generator. Returns the number of questions loaded."""
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        loaded = 0
+        for pool in data.get("pools", []):
+            if "round_title" not in pool:
+                # Written before pools were keyed by round title; those questions weren't generated for a round
+                logger.warning(f"Skipping question bank pool without a round title: {pool['company']}/{pool['role']}/{pool['round_type']}")
+                continue
+            key = (pool["company"], pool["role"], pool["band"], pool["round_type"], pool["round_title"])
+            loaded += self.add(key, pool.get("questions", []))
+        return loaded
+
+    def save(self, path: str = DEFAULT_BANK_PATH) -> None:
+        pools = [
+            {"company": k[0], "role": k[1], "band": k[2], "round_type": k[3], "round_title": k[4], "questions": list(v)}
+            for k, v in self._pools.items() if v
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"pools": pools}, f, indent=2)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pools": len(self._pools),
+            "questions": sum(len(v) for v in self._pools.values()),
+            "refills_running": sum(1 for t in self._refills.values() if not t.done()),
+            "keys_in_demand": sum(1 for requesters in self._demand.values() if len(requesters) >= self.min_demand),
+            "hits": self.hits,
+            "misses": self.misses,
+            "near_duplicates": self.near_duplicates,
+        }
+
+
+async def _generate_offline(args) -> None:
+    # Imported lazily: main configures the Gemini client and owns the live generators
+    from main import GeminiService, generate_bank_questions
+
+    bank = QuestionBank(refill_enabled=False)
+    bank.load(args.output)
+    if args.rounds:
+        rounds = [tuple(part.strip() for part in entry.rsplit("=", 1)) for entry in args.rounds.split(",") if entry.strip()]
+    else:
+        # The rounds of a generated plan for the inputs (pools only serve rounds with the same title)
+        plan, _, _ = await GeminiService.generate_interview_plan(args.company, args.role, args.years)
+        rounds = [(r["title"], r["type"]) for r in plan]
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def fill(round_title: str, round_type: str) -> None:
+        key = QuestionBank.make_key(args.company, args.role, args.years, round_type, round_title)
+        async with semaphore:
+            rejections = 0
+            for _ in range(args.count * 2):
+                if bank.size(key) >= args.count:
+                    break
+                questions = await generate_bank_questions(args.company, args.role, args.years, round_type, round_title,
+                                                          args.count - bank.size(key))
+                if not questions:
+                    logger.warning(f"Model unavailable while generating questions for '{round_title}'")
+                    break
+                rejections = 0 if bank.add(key, questions) else rejections + 1
+                if rejections >= bank.max_consecutive_rejections:
+                    logger.warning(f"'{round_title}' keeps producing repeats, stopping at {bank.size(key)} questions")
+                    break
+        print(f"{key}: {bank.size(key)} questions")
+
+    await asyncio.gather(*(fill(title, round_type) for title, round_type in dict.fromkeys(rounds)))
+    bank.save(args.output)
+    print(f"Saved question bank to {args.output}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pre-generate interview questions into the question bank.")
+    parser.add_argument("--company", required=True)
+    parser.add_argument("--role", required=True)
+    parser.add_argument("--years", type=int, required=True)
+    parser.add_argument("--rounds", help='Comma-separated "Round Title=type" entries (default: the rounds of a generated plan)')
+    parser.add_argument("--count", type=int, default=20, help="Questions per round")
+    parser.add_argument("--concurrency", type=int, default=3)
+    parser.add_argument("--output", default=os.getenv("QUESTION_BANK_PATH", DEFAULT_BANK_PATH))
+    asyncio.run(_generate_offline(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Running interview aggregates - per-round and overall score statistics kept up to date as answers arrive
+Lets the summary endpoint build its numbers without re-scanning questions_and_answers
+"""
+
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class ScoreAggregate:
+    """
+    Count, sum, min/max and question types for a group of answers, updated in O(1).
+    Scores are kept as a histogram so a regraded answer can be swapped out without a rescan;
+    like the original summary, falsy scores (0 / missing) don't count towards the average.
+    """
+
+    def __init__(self):
+        self.questions_count = 0
+        self.scored_count = 0
+        self.score_sum = 0.0
+        self._scores: Counter = Counter()
+        self.question_types: Counter = Counter()
+
+    def add(self, score: Optional[float], question_type: str) -> None:
+        self.questions_count += 1
+        self.question_types[question_type or "unknown"] += 1
+        self._add_score(score)
+
+    def rescore(self, old_score: Optional[float], new_score: Optional[float]) -> None:
+        if old_score:
+            self._scores[old_score] -= 1
+            if not self._scores[old_score]:
+                del self._scores[old_score]
+            self.scored_count -= 1
+            self.score_sum -= old_score
+        self._add_score(new_score)
+
+    def _add_score(self, score: Optional[float]) -> None:
+        if score:
+            self._scores[score] += 1
+            self.scored_count += 1
+            self.score_sum += score
+
+    @property
+    def average(self) -> float:
+        return self.score_sum / self.scored_count if self.scored_count else 0
+
+    @property
+    def min_score(self) -> Optional[float]:
+        return min(self._scores) if self._scores else None
+
+    @property
+    def max_score(self) -> Optional[float]:
+        return max(self._scores) if self._scores else None
+
+
+class InterviewAggregates:
+    """Overall plus per-round (keyed by round title, in order of first answer) aggregates for one session."""
+
+    def __init__(self):
+        self.overall = ScoreAggregate()
+        self.rounds: Dict[str, ScoreAggregate] = {}
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Dict[str, Any]]) -> "InterviewAggregates":
+        aggregates = cls()
+        for entry in entries:
+            aggregates.add(entry)
+        return aggregates
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        """Call once per questions_and_answers entry as it is appended."""
+        round_title = entry.get("round_title", "General")
+        if round_title not in self.rounds:
+            self.rounds[round_title] = ScoreAggregate()
+        self.rounds[round_title].add(entry.get("score"), entry.get("type", "unknown"))
+        self.overall.add(entry.get("score"), entry.get("type", "unknown"))
+
+    def rescore(self, entry: Dict[str, Any], old_score: Optional[float]) -> None:
+        """Call after an entry's score changed (e.g. batched grading replaced its provisional score)."""
+        round_aggregate = self.rounds.get(entry.get("round_title", "General"))
+        if round_aggregate is not None:
+            round_aggregate.rescore(old_score, entry.get("score"))
+        self.overall.rescore(old_score, entry.get("score"))
+
+    def round_summaries(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "round_title": round_title,
+                "questions_count": aggregate.questions_count,
+                "average_score": aggregate.average,
+                "min_score": aggregate.min_score,
+                "max_score": aggregate.max_score,
+                "question_types": list(aggregate.question_types),
+            }
+            for round_title, aggregate in self.rounds.items()
+        ]
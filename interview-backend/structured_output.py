@@ -0,0 +1,158 @@
+"""
+Structured LLM output - JSON response schemas derived from the Pydantic models, plus tolerant parsing
+Requests application/json with a schema (LLM_STRUCTURED_OUTPUT, on by default), repairs near-valid JSON
+locally instead of falling back, and counts parse results and fallbacks per task at /api/metrics
+"""
+
+import json
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from pydantic import BaseModel
+
+from json_stream import complete_partial_json
+from metrics import metrics
+
+STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "1").lower() not in ["0", "false", "no"]
+
+# Keys Gemini's Schema proto understands; everything else pydantic emits (title, default, ...) is dropped
+_SCHEMA_KEYS = {"type", "format", "description", "nullable", "enum", "items", "properties", "required"}
+
+
+def schema_from_model(model_cls: Type[BaseModel], exclude: Iterable[str] = (), include: Optional[Iterable[str]] = None,
+                      enums: Optional[Dict[str, List[str]]] = None, extra: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Object schema for a Pydantic model in the subset accepted as a Gemini response_schema.
+    Fields set by the backend rather than the model (e.g. `type`, `provisional`) should be excluded.
+    """
+    source = model_cls.model_json_schema()
+    definitions = source.get("$defs", {})
+    include = set(include) if include is not None else None
+    exclude = set(exclude)
+
+    properties: Dict[str, Any] = {}
+    for name, field_schema in source.get("properties", {}).items():
+        if name in exclude or (include is not None and name not in include):
+            continue
+        properties[name] = _convert(field_schema, definitions)
+        if enums and name in enums:
+            properties[name]["enum"] = list(enums[name])
+    for name, field_schema in (extra or {}).items():
+        properties[name] = field_schema
+
+    required = [name for name in source.get("required", []) if name in properties] + list(extra or {})
+    return {"type": "object", "properties": properties, "required": required}
+
+
+def array_of(item_schema: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "array", "items": item_schema}
+
+
+def _convert(schema: Dict[str, Any], definitions: Dict[str, Any]) -> Dict[str, Any]:
+    if "$ref" in schema:
+        return _convert(definitions[schema["$ref"].split("/")[-1]], definitions)
+    if "anyOf" in schema:
+        # Optional[X] -> nullable X
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        converted = _convert(options[0], definitions) if options else {"type": "string"}
+        if len(options) < len(schema["anyOf"]):
+            converted["nullable"] = True
+        return converted
+
+    converted = {key: value for key, value in schema.items() if key in _SCHEMA_KEYS}
+    if "items" in schema:
+        converted["items"] = _convert(schema["items"], definitions)
+    if "properties" in schema:
+        converted["properties"] = {name: _convert(value, definitions) for name, value in schema["properties"].items()}
+    converted.setdefault("type", "string")
+    return converted
+
+
+def json_generation_config(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Extra generation config kwargs asking the provider for schema-constrained JSON ({} when disabled)."""
+    if not STRUCTURED_OUTPUT:
+        return {}
+    return {"response_mime_type": "application/json", "response_schema": schema}
+
+
+_FENCE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+# A whole string (possibly cut off at the end) is matched first and kept as is, so the fixes only apply
+# outside strings: "None of the above" stays intact
+_REPAIRABLE = re.compile(r'"(?:[^"\\]|\\.)*(?:"|$)|,\s*([}\]])|\b(True|False|None)\b', re.DOTALL)
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _repair_token(match: "re.Match[str]") -> str:
+    if match.group(1):
+        return match.group(1)  # trailing comma dropped
+    if match.group(2):
+        return _PY_LITERALS[match.group(2)]
+    return match.group(0)
+
+
+def repair_json(text: str) -> str:
+    """Cheap fixes for common near-JSON: smart quotes, and trailing commas and Python literals outside strings."""
+    text = text.replace("“", '"').replace("”", '"').replace("‘", "'").replace("’", "'")
+    return _REPAIRABLE.sub(_repair_token, text)
+
+
+def _load(text: Any, expect: type, required: Iterable[str] = ()) -> Optional[Any]:
+    try:
+        value = json.loads(text) if isinstance(text, str) else text
+    except ValueError:
+        return None
+    if expect is list and isinstance(value, dict):
+        # {"rounds": [...]} style wrapper around the expected array
+        lists = [v for v in value.values() if isinstance(v, list)]
+        value = lists[0] if len(lists) == 1 else value
+    if not isinstance(value, expect):
+        return None
+    if expect is list:
+        # Drop items missing required keys (e.g. the last item of a truncated array)
+        value = [item for item in value if not required or (isinstance(item, dict) and all(key in item for key in required))]
+        return value or None
+    return value if all(key in value for key in required) else None
+
+
+def parse_llm_json(raw: str, task: str, expect: type = dict, required: Iterable[str] = ()) -> Any:
+    """
+    Parses a model response into a dict (or list of dicts with expect=list) that has the `required` keys.
+    Tries, in order: the raw text, the outermost JSON span, a repaired span, and a truncation-completed
+    span. Raises ValueError if nothing usable is found. Counts llm.parse_ok / llm.parse_repaired /
+    llm.parse_failed per task.
+    """
+    required = tuple(required)
+    text = _FENCE.sub("", (raw or "").strip())
+    value = _load(text, expect, required)
+    if value is not None:
+        metrics.increment(f"llm.parse_ok.{task}")
+        return value
+
+    start = text.find("[" if expect is list else "{")
+    if start < 0 and expect is list:
+        start = text.find("{")  # maybe a wrapper object
+    end = max(text.rfind("]"), text.rfind("}")) + 1
+    if start >= 0:
+        span = text[start:end] if end > start else text[start:]
+        value = _load(span, expect, required)
+        if value is None:
+            value = _load(repair_json(span), expect, required)
+            if value is None:
+                # Truncated output (e.g. max_output_tokens hit): close open strings and containers
+                completed = complete_partial_json(repair_json(text[start:]))
+                value = _load(completed, expect, required) if completed is not None else None
+            if value is not None:
+                metrics.increment(f"llm.parse_repaired.{task}")
+                return value
+        else:
+            metrics.increment(f"llm.parse_ok.{task}")
+            return value
+
+    metrics.increment(f"llm.parse_failed.{task}")
+    raise ValueError(f"No valid JSON {expect.__name__} found in '{task}' response")
+
+
+def record_fallback(task: str) -> None:
+    """Counts a call that ended in its local fallback (llm.fallback.<task>)."""
+    metrics.increment(f"llm.fallback.{task}")
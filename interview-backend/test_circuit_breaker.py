@@ -0,0 +1,133 @@
+"""Unit tests for circuit_breaker: breaker state transitions and the token bucket"""
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CircuitBreaker, TokenBucket, is_quota_error
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+def make_breaker() -> CircuitBreaker:
+    return CircuitBreaker(failure_threshold=3, quota_threshold=2, window_seconds=30, open_seconds=10, max_open_seconds=25)
+
+
+def test_is_quota_error():
+    assert is_quota_error(Exception("429 Resource has been exhausted (e.g. check quota)."))
+    assert is_quota_error(RuntimeError("Rate limit reached"))
+    assert not is_quota_error(ValueError("bad JSON"))
+
+
+def test_opens_after_failure_threshold(clock):
+    breaker = make_breaker()
+    for _ in range(2):
+        breaker.record_failure(RuntimeError("boom"))
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+    breaker.record_failure(RuntimeError("boom"))
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.status()["rejected"] == 1
+
+
+def test_opens_sooner_on_quota_errors(clock):
+    breaker = make_breaker()
+    breaker.record_failure(Exception("429 quota exceeded"))
+    breaker.record_failure(Exception("429 quota exceeded"))
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_failures_outside_window_do_not_count(clock):
+    breaker = make_breaker()
+    breaker.record_failure(RuntimeError("boom"))
+    breaker.record_failure(RuntimeError("boom"))
+    clock.now += 31
+    breaker.record_failure(RuntimeError("boom"))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_success_resets_failure_count(clock):
+    breaker = make_breaker()
+    breaker.record_failure(RuntimeError("boom"))
+    breaker.record_failure(RuntimeError("boom"))
+    breaker.record_success()
+    breaker.record_failure(RuntimeError("boom"))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_allows_single_probe_then_closes(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record_failure(RuntimeError("boom"))
+    clock.now += 9
+    assert not breaker.allow()
+
+    clock.now += 1
+    assert breaker.allow()  # the probe
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()  # only one probe at a time
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_backs_off_with_cap(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record_failure(RuntimeError("boom"))
+
+    for expected_open_seconds in (20, 25, 25):
+        clock.now += breaker.open_seconds
+        assert breaker.allow()
+        breaker.record_failure(RuntimeError("still down"))
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.open_seconds == expected_open_seconds
+
+    clock.now += breaker.open_seconds
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.open_seconds == 10
+    assert breaker.status()["times_opened"] == 4
+
+
+def test_release_frees_probe_slot(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record_failure(RuntimeError("boom"))
+    clock.now += 10
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_token_bucket_refills_over_time(clock):
+    bucket = TokenBucket(rate_per_second=2, capacity=2)
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.time_until_available() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert bucket.try_acquire()
+    clock.now += 100
+    assert bucket.status()["available_tokens"] == 2
+
+
+def test_token_bucket_without_rate_never_refills(clock):
+    bucket = TokenBucket(rate_per_second=0, capacity=1)
+    assert bucket.try_acquire()
+    assert bucket.time_until_available() == float("inf")
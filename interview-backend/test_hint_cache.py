@@ -0,0 +1,105 @@
+"""Unit tests for hint_cache: keying, coalescing and pre-generation"""
+
+import asyncio
+
+import pytest
+
+from hint_cache import HintCache
+
+
+def make_generator(calls, hint="Start with the constraints.", delay=0.0):
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return hint
+    return generate
+
+
+def test_only_empty_answers_are_cacheable():
+    assert HintCache.cacheable("")
+    assert HintCache.cacheable("   \n")
+    assert not HintCache.cacheable("I would use a hash map")
+
+
+def test_make_key_normalizes_question_and_separates_context_and_type():
+    key = HintCache.make_key("Design  a URL shortener", "technical", "SWE")
+    assert key == HintCache.make_key("design a url shortener ", "technical", "SWE")
+    assert key != HintCache.make_key("Design a URL shortener", "technical", "Data Scientist")
+    assert key != HintCache.make_key("Design a URL shortener", "behavioral", "SWE")
+    assert HintCache.make_key("Q", "")[1] == "behavioral"
+
+
+def test_concurrent_lookups_share_one_generation():
+    async def run():
+        cache = HintCache()
+        calls = []
+        key = HintCache.make_key("Q", "technical")
+        hints = await asyncio.gather(*(cache.get(key, make_generator(calls, delay=0.01)) for _ in range(4)))
+        hints.append(await cache.get(key, make_generator(calls)))
+        return cache, calls, hints
+
+    cache, calls, hints = asyncio.run(run())
+    assert len(calls) == 1
+    assert set(hints) == {"Start with the constraints."}
+    assert cache.stats()["coalesced"] == 3 and cache.stats()["hits"] == 1
+
+
+def test_prewarm_serves_first_click_from_memory():
+    async def run():
+        cache = HintCache()
+        calls = []
+        key = HintCache.make_key("Q", "technical")
+        cache.prewarm(key, make_generator(calls, delay=0.01))
+        cache.prewarm(key, make_generator(calls))  # already in flight
+        hint = await cache.get(key, make_generator(calls))
+        return cache, calls, hint
+
+    cache, calls, hint = asyncio.run(run())
+    assert hint == "Start with the constraints."
+    assert len(calls) == 1
+    assert cache.stats()["prewarmed"] == 1 and cache.stats()["coalesced"] == 1
+
+
+def test_unavailable_model_is_not_cached():
+    async def run():
+        cache = HintCache()
+        calls = []
+        key = HintCache.make_key("Q", "technical")
+        first = await cache.get(key, make_generator(calls, hint=None))
+        second = await cache.get(key, make_generator(calls))
+        return calls, first, second
+
+    calls, first, second = asyncio.run(run())
+    assert first is None and second == "Start with the constraints."
+    assert len(calls) == 2
+
+
+def test_errors_propagate_and_clear_in_flight():
+    async def run():
+        cache = HintCache()
+        key = HintCache.make_key("Q", "technical")
+
+        async def failing():
+            raise RuntimeError("upstream down")
+
+        with pytest.raises(RuntimeError):
+            await cache.get(key, failing)
+        return cache
+
+    assert asyncio.run(run()).stats()["in_flight"] == 0
+
+
+def test_entries_expire_and_are_bounded():
+    async def run():
+        cache = HintCache(max_entries=2, ttl_seconds=60)
+        for question in ("A", "B", "C"):
+            await cache.get(HintCache.make_key(question, "technical"), make_generator([]))
+        expired_key = HintCache.make_key("C", "technical")
+        cache._entries[expired_key] = (0.0, "old")
+        calls = []
+        await cache.get(expired_key, make_generator(calls))
+        return cache, calls
+
+    cache, calls = asyncio.run(run())
+    assert cache.stats()["entries"] == 2
+    assert len(calls) == 1
@@ -0,0 +1,50 @@
+"""Unit tests for json_stream: partial JSON completion and incremental parsing"""
+
+from json_stream import IncrementalJSONParser, complete_partial_json
+
+
+def test_complete_partial_json_closes_open_string_and_containers():
+    assert complete_partial_json('{"question": "Tell me about') == {"question": "Tell me about"}
+    assert complete_partial_json('{"items": [1, 2, {"a": "b"') == {"items": [1, 2, {"a": "b"}]}
+
+
+def test_complete_partial_json_drops_dangling_key():
+    assert complete_partial_json('{"question": "Q", "type"') == {"question": "Q"}
+    assert complete_partial_json('{"question": "Q", "type":') == {"question": "Q"}
+    assert complete_partial_json('{"question": "Q", "ty') == {"question": "Q"}
+
+
+def test_complete_partial_json_drops_trailing_comma():
+    assert complete_partial_json('[1, 2,') == [1, 2]
+
+
+def test_complete_partial_json_ignores_leading_prose_and_trailing_text():
+    assert complete_partial_json('Sure! {"a": 1} and more') == {"a": 1}
+
+
+def test_complete_partial_json_returns_none_when_not_parsable_yet():
+    assert complete_partial_json("no json here") is None
+    assert complete_partial_json('{"done": tru') is None
+
+
+def test_complete_partial_json_handles_escape_at_cut():
+    assert complete_partial_json('{"q": "say \\') == {"q": "say "}
+
+
+def test_incremental_parser_keeps_most_complete_value():
+    parser = IncrementalJSONParser()
+    document = '{"question": "Design a URL shortener", "type": "technical", "done": true}'
+    values = [parser.feed(document[i:i + 7]) for i in range(0, len(document), 7)]
+
+    assert values[0] == {}
+    assert values[-1] == {"question": "Design a URL shortener", "type": "technical", "done": True}
+    # Question text only ever grows while the stream is in progress
+    questions = [v.get("question", "") for v in values if v]
+    assert all(later.startswith(earlier) for earlier, later in zip(questions, questions[1:]))
+
+
+def test_incremental_parser_keeps_last_value_on_unparsable_chunk():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"done": false, "ok": ') == {"done": False}
+    assert parser.feed("tr") == {"done": False}
+    assert parser.feed("ue}") == {"done": False, "ok": True}
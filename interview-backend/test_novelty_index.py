@@ -0,0 +1,57 @@
+"""Unit tests for novelty_index: MinHash similarity and near-duplicate lookup"""
+
+from novelty_index import NUM_PERM, NoveltyIndex, shingles, signature, similarity
+
+CONFLICT = "Tell me about a time you resolved a conflict with a teammate."
+CONFLICT_REPHRASED = "Describe a situation where you resolved conflict with a teammate."
+RATE_LIMITER = "Design a rate limiter for a distributed API gateway."
+RATE_LIMITER_REPHRASED = "How would you design a distributed rate limiter for an API?"
+LRU_CACHE = "Implement an LRU cache with O(1) get and put operations."
+
+
+def test_shingles_ignore_boilerplate_and_stem():
+    assert shingles(CONFLICT) == shingles(CONFLICT_REPHRASED) == {"resolv", "conflict", "teammat"}
+
+
+def test_signature_is_deterministic_and_fixed_size():
+    assert signature(RATE_LIMITER) == signature(RATE_LIMITER)
+    assert len(signature(RATE_LIMITER)) == NUM_PERM
+
+
+def test_similarity_thresholds():
+    assert similarity(signature(CONFLICT), signature(CONFLICT)) == 1.0
+    assert similarity(signature(CONFLICT), signature(CONFLICT_REPHRASED)) >= 0.9
+    assert similarity(signature(RATE_LIMITER), signature(RATE_LIMITER_REPHRASED)) >= 0.5
+    assert similarity(signature(CONFLICT), signature(RATE_LIMITER)) < 0.2
+    assert similarity(signature(RATE_LIMITER), signature(LRU_CACHE)) < 0.2
+
+
+def test_index_flags_rephrasings_but_not_new_topics():
+    index = NoveltyIndex(threshold=0.5)
+    assert not index.is_near_duplicate(CONFLICT)  # empty index
+
+    index.add(CONFLICT)
+    index.add(RATE_LIMITER)
+    assert index.is_near_duplicate(CONFLICT_REPHRASED)
+    assert index.is_near_duplicate(RATE_LIMITER_REPHRASED)
+    assert not index.is_near_duplicate(LRU_CACHE)
+    assert index.max_similarity(LRU_CACHE) < 0.5
+
+
+def test_threshold_is_respected():
+    index = NoveltyIndex(threshold=0.95)
+    index.add(RATE_LIMITER)
+    assert not index.is_near_duplicate(RATE_LIMITER_REPHRASED)
+    assert index.is_near_duplicate(RATE_LIMITER)
+
+
+def test_oldest_entries_are_evicted():
+    index = NoveltyIndex(threshold=0.5, max_items=2)
+    index.add(CONFLICT)
+    index.add(RATE_LIMITER)
+    index.add(LRU_CACHE)
+
+    assert len(index) == 2
+    assert index.recent() == [RATE_LIMITER, LRU_CACHE]
+    assert not index.is_near_duplicate(CONFLICT_REPHRASED)
+    assert index.is_near_duplicate(LRU_CACHE)
@@ -0,0 +1,103 @@
+"""Unit tests for plan_cache: variant pools, single-flight generation and preview handoff"""
+
+import asyncio
+
+from plan_cache import PlanCache
+
+
+def make_generator(calls, delay=0.0, ai=True):
+    async def generate(company_name, job_role, years_of_experience):
+        calls.append((company_name, job_role, years_of_experience))
+        await asyncio.sleep(delay)
+        return [{"title": f"Round {len(calls)}", "type": "technical"}], ai, "ai" if ai else "fallback"
+    return generate
+
+
+def test_make_key_normalizes_and_bands():
+    assert PlanCache.make_key(" Google ", "Software  Engineer", 4) == ("google", "software engineer", "mid")
+    assert PlanCache.make_key("Google", "SWE", 1)[2] == "junior"
+    assert PlanCache.make_key("Google", "SWE", 10)[2] == "senior"
+
+
+def test_pool_fills_before_serving_hits():
+    async def run():
+        cache = PlanCache(variants_per_key=2)
+        calls = []
+        generate = make_generator(calls)
+        for _ in range(5):
+            await cache.get_plan("Google", "SWE", 3, generate)
+        return cache, calls
+
+    cache, calls = asyncio.run(run())
+    assert len(calls) == 2
+    assert cache.stats()["misses"] == 2 and cache.stats()["hits"] == 3
+
+
+def test_concurrent_misses_join_in_flight_generation():
+    async def run():
+        cache = PlanCache(variants_per_key=1)
+        calls = []
+        results = await asyncio.gather(*(cache.get_plan("Google", "SWE", 3, make_generator(calls, delay=0.01)) for _ in range(5)))
+        return cache, calls, results
+
+    cache, calls, results = asyncio.run(run())
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 4
+    assert all(result == results[0] for result in results)
+    # Joined callers get their own copy of the plan
+    results[0][0][0]["title"] = "changed"
+    assert results[1][0][0]["title"] == "Round 1"
+
+
+def test_only_missing_variants_are_generated_concurrently():
+    async def run():
+        cache = PlanCache(variants_per_key=2)
+        calls = []
+        await asyncio.gather(*(cache.get_plan("Google", "SWE", 3, make_generator(calls, delay=0.01)) for _ in range(6)))
+        return cache, calls
+
+    cache, calls = asyncio.run(run())
+    assert len(calls) == 2
+    assert cache.stats()["coalesced"] == 4
+    assert cache.stats()["variants"] == 2
+
+
+def test_failed_generation_propagates_to_joined_callers_and_is_not_cached():
+    async def run():
+        cache = PlanCache(variants_per_key=1)
+
+        async def failing(company_name, job_role, years_of_experience):
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(*(cache.get_plan("Google", "SWE", 3, failing) for _ in range(3)), return_exceptions=True)
+        return cache, results
+
+    cache, results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.stats()["variants"] == 0
+    assert not cache._inflight
+
+
+def test_fallback_plans_are_not_cached():
+    async def run():
+        cache = PlanCache(variants_per_key=1)
+        calls = []
+        for _ in range(2):
+            await cache.get_plan("Google", "SWE", 3, make_generator(calls, ai=False))
+        return cache, calls
+
+    cache, calls = asyncio.run(run())
+    assert len(calls) == 2
+    assert cache.stats()["variants"] == 0
+
+
+def test_handoff_is_claimed_once_for_matching_inputs():
+    cache = PlanCache()
+    result = ([{"title": "Coding", "type": "dsa"}], True, "ai")
+    plan_id = cache.remember("Google", "SWE", 3, result)
+
+    assert cache.claim(plan_id, "Meta", "SWE", 3) is None  # wrong inputs consume the handoff
+    plan_id = cache.remember("Google", "SWE", 3, result)
+    assert cache.claim(plan_id, "google", "swe", 4) == result
+    assert cache.claim(plan_id, "Google", "SWE", 3) is None
@@ -0,0 +1,62 @@
+"""Unit tests for structured_output: JSON repair and model-response parsing"""
+
+import json
+
+import pytest
+
+from structured_output import parse_llm_json, repair_json
+
+
+def test_repair_json_replaces_python_literals_outside_strings():
+    repaired = repair_json('{"shuffle": True, "graded": False, "hint": None}')
+    assert json.loads(repaired) == {"shuffle": True, "graded": False, "hint": None}
+
+
+def test_repair_json_keeps_literals_inside_strings():
+    text = '{"options": ["None of the above", "False for tuples", "True",], "correct_answer": "None of the above", "ok": True}'
+    value = json.loads(repair_json(text))
+    assert value["options"] == ["None of the above", "False for tuples", "True"]
+    assert value["correct_answer"] == "None of the above"
+    assert value["ok"] is True
+
+
+def test_repair_json_keeps_trailing_commas_inside_strings():
+    value = json.loads(repair_json('{"question": "Pick one of a, b, ]", "tags": ["x", "y",],}'))
+    assert value == {"question": "Pick one of a, b, ]", "tags": ["x", "y"]}
+
+
+def test_repair_json_handles_escaped_quotes():
+    value = json.loads(repair_json(r'{"question": "What does \"None\" mean?", "multi": False,}'))
+    assert value == {"question": 'What does "None" mean?', "multi": False}
+
+
+def test_repair_json_replaces_smart_quotes():
+    assert json.loads(repair_json("{“question”: “Why?”}")) == {"question": "Why?"}
+
+
+def test_parse_llm_json_strips_fences_and_prose():
+    raw = 'Here you go:\n```json\n{"question": "Q", "type": "technical"}\n```'
+    assert parse_llm_json(raw, "test", required=["question"]) == {"question": "Q", "type": "technical"}
+
+
+def test_parse_llm_json_repairs_mcq_without_touching_options():
+    raw = '{"question": "Which is immutable?", "options": ["list", "dict", "None of the above", "tuple"], "correct_answer": "tuple", "multi": False,}'
+    value = parse_llm_json(raw, "test", required=["question", "options", "correct_answer"])
+    assert value["options"][2] == "None of the above"
+    assert value["multi"] is False
+
+
+def test_parse_llm_json_unwraps_list_and_drops_incomplete_items():
+    raw = '{"questions": [{"question": "A", "options": ["1"]}, {"question": "B"}]}'
+    assert parse_llm_json(raw, "test", expect=list, required=["question", "options"]) == [{"question": "A", "options": ["1"]}]
+
+
+def test_parse_llm_json_completes_truncated_output():
+    raw = '[{"question": "A", "answer": "x"}, {"question": "B", "answer": "trunc'
+    value = parse_llm_json(raw, "test", expect=list, required=["question", "answer"])
+    assert [item["question"] for item in value] == ["A", "B"]
+
+
+def test_parse_llm_json_raises_without_json():
+    with pytest.raises(ValueError):
+        parse_llm_json("Sorry, I can't help with that.", "test")
@@ -0,0 +1,155 @@
+"""
+Vision Tracker Pool - one MediaPipe tracker per interview session
+Holistic with static_image_mode=False carries landmark tracking from one frame to the next, so every session
+gets its own VisionService instead of sharing one graph. Idle trackers are closed, the least recently used one
+makes room when the pool is full, and analyses run on a bounded thread pool so sessions are analyzed in parallel
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from metrics import metrics
+from vision_service import VisionService
+
+logger = logging.getLogger(__name__)
+
+# analyze(service) -> metrics dict; runs in a worker thread with exclusive use of the service
+FrameAnalysis = Callable[[VisionService], Dict[str, Any]]
+
+
+class VisionPoolBusyError(RuntimeError):
+    """Raised when every tracker slot is analyzing a frame and none can be evicted for a new session."""
+
+
+class _Tracker:
+    def __init__(self, service: Optional[VisionService] = None):
+        self.service = service
+        self.lock = asyncio.Lock()  # one frame at a time, in arrival order
+        self.pending = 0  # frames running or queued on the lock; such a tracker is never evicted
+        self.last_used = time.monotonic()
+        self.frames = 0
+        self.retired = False  # released while frames were pending; closed when the last one finishes
+        self.closed = False
+
+
+class VisionTrackerPool:
+    """
+    Session-affine pool of VisionService trackers, at most VISION_MAX_TRACKERS at once. A session's tracker
+    is created on its first frame and closed after VISION_TRACKER_IDLE_SECONDS without frames, when its
+    session expires, or when a new session needs the slot and it is the least recently used idle tracker.
+    Frames without a session use a shared static-image tracker (no tracking state to leak).
+    Analyses run on VISION_WORKERS threads (default: one per core); MediaPipe releases the GIL while
+    running its graph, so different sessions' frames are processed in parallel.
+    """
+
+    def __init__(self, factory: Callable[..., VisionService] = VisionService, max_trackers: Optional[int] = None,
+                 idle_seconds: Optional[float] = None, workers: Optional[int] = None):
+        self.factory = factory
+        self.max_trackers = max_trackers or int(os.getenv("VISION_MAX_TRACKERS", "16"))
+        self.idle_seconds = idle_seconds or float(os.getenv("VISION_TRACKER_IDLE_SECONDS", "120"))
+        self.workers = workers or int(os.getenv("VISION_WORKERS", str(os.cpu_count() or 1)))
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="vision")
+
+        # Built eagerly so a missing/broken MediaPipe install fails at startup
+        self._static = _Tracker(factory(static_image_mode=True))
+        self._trackers: "OrderedDict[str, _Tracker]" = OrderedDict()
+
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+
+    async def analyze(self, session_id: Optional[str], analyze: FrameAnalysis) -> Dict[str, Any]:
+        """Runs `analyze` on the session's tracker (the static tracker when session_id is None)."""
+        tracker = self._tracker_for(session_id) if session_id else self._static
+        loop = asyncio.get_running_loop()
+        tracker.pending += 1
+        try:
+            async with tracker.lock:
+                if tracker.closed or (session_id and self._trackers.get(session_id) is not tracker):
+                    # The session was released while this frame waited; never build a graph on a detached tracker
+                    raise VisionPoolBusyError("Vision tracker was released")
+                if tracker.service is None:
+                    try:
+                        tracker.service = await loop.run_in_executor(self.executor, self.factory)
+                    except Exception:
+                        self._trackers.pop(session_id, None)
+                        tracker.closed = True
+                        raise
+                    self.created += 1
+                    metrics.increment("vision.trackers.created")
+                try:
+                    return await loop.run_in_executor(self.executor, analyze, tracker.service)
+                finally:
+                    tracker.frames += 1
+                    tracker.last_used = time.monotonic()
+        finally:
+            tracker.pending -= 1
+            if tracker.retired and not tracker.pending:
+                self._close(tracker)
+
+    def _tracker_for(self, session_id: str) -> _Tracker:
+        self._expire_idle()
+        tracker = self._trackers.get(session_id)
+        if tracker is not None:
+            self._trackers.move_to_end(session_id)
+            return tracker
+        if len(self._trackers) >= self.max_trackers:
+            victim = next((sid for sid, t in self._trackers.items() if not t.pending), None)
+            if victim is None:
+                metrics.increment("vision.trackers.busy")
+                raise VisionPoolBusyError("All vision trackers are busy")
+            self._close(self._trackers.pop(victim))
+            self.evicted += 1
+            metrics.increment("vision.trackers.evicted")
+        tracker = _Tracker()
+        self._trackers[session_id] = tracker
+        return tracker
+
+    def _expire_idle(self) -> None:
+        cutoff = time.monotonic() - self.idle_seconds
+        for sid, tracker in list(self._trackers.items()):
+            if tracker.last_used < cutoff and not tracker.pending:
+                self._close(self._trackers.pop(sid))
+                self.expired += 1
+                metrics.increment("vision.trackers.expired")
+
+    def release(self, session_id: str) -> None:
+        """Drops a session's tracker (e.g. when the session expires); a frame in progress finishes first, queued ones are refused."""
+        tracker = self._trackers.pop(session_id, None)
+        if tracker is None:
+            return
+        if tracker.pending:
+            tracker.retired = True
+        else:
+            self._close(tracker)
+
+    def _close(self, tracker: _Tracker) -> None:
+        tracker.closed = True
+        service, tracker.service = tracker.service, None
+        if service is not None:
+            self.executor.submit(service.close)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "trackers": len(self._trackers),
+            "busy": sum(1 for t in self._trackers.values() if t.pending),
+            "max_trackers": self.max_trackers,
+            "workers": self.workers,
+            "created": self.created,
+            "evicted": self.evicted,
+            "expired": self.expired,
+        }
+
+    def close(self) -> None:
+        for tracker in [self._static, *self._trackers.values()]:
+            tracker.closed = True
+            if tracker.service is not None:
+                tracker.service.close()
+                tracker.service = None
+        self._trackers.clear()
+        self.executor.shutdown(wait=False)
@@ -3,25 +3,89 @@ Enhanced Vision Service - Real-time CV Analysis with Dynamic Visualization
 Displays metrics, feedback, and visual indicators directly on video feed
 """
 
+import os
 import cv2
 import numpy as np
 import mediapipe as mp
 import time
 import base64
+from types import SimpleNamespace
 from typing import Dict, Tuple
 
+# Pipeline profiles (VISION_PROFILE). The metrics only use four face-mesh points and the shoulders/hips, so
+# "face_pose" runs FaceMesh + Pose instead of Holistic (which also tracks both hands) and "lite" additionally
+# uses the complexity-0 pose model. MediaPipe downloads that model on first use unless it is pre-fetched.
+VISION_PROFILES = {
+    "full": {"holistic": True, "model_complexity": 1},
+    "face_pose": {"holistic": False, "model_complexity": 1},
+    "lite": {"holistic": False, "model_complexity": 0},
+}
+DEFAULT_PROFILE = os.getenv("VISION_PROFILE", "full")
+# Frames wider than this are downscaled before inference (0 = native resolution); JPEGs are decoded at reduced size
+DEFAULT_INFERENCE_WIDTH = int(os.getenv("VISION_INFERENCE_WIDTH", "0"))
+
+# Decode flags for JPEG DCT-domain downscaling, largest reduction first
+REDUCED_DECODE_FLAGS = [(8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2)]
+# Start-of-frame markers (baseline, progressive, ...) - they carry the image size; C4/C8/CC are not SOF
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def jpeg_width(data) -> int:
+    """Image width from a JPEG's start-of-frame header without decoding it; 0 if it isn't a readable JPEG."""
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return 0
+    pos = 2
+    while pos + 9 <= len(data):
+        if data[pos] != 0xFF:
+            return 0
+        marker = data[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            return int.from_bytes(data[pos + 7:pos + 9], "big")
+        if marker == 0xD9 or marker == 0xDA:  # end of image / start of scan before any SOF
+            return 0
+        pos += 2 + int.from_bytes(data[pos + 2:pos + 4], "big")
+    return 0
+
 class VisionService:
-    def __init__(self):
+    def __init__(self, static_image_mode=False, profile=None, inference_width=None):
+        """static_image_mode=False tracks landmarks across frames, so an instance must only see one video stream"""
         self.mp_holistic = mp.solutions.holistic
         self.mp_drawing = mp.solutions.drawing_utils
         self.mp_drawing_styles = mp.solutions.drawing_styles
         
-        self.holistic = self.mp_holistic.Holistic(
-            static_image_mode=False,
-            model_complexity=1,  # Increased from 0 to 1 for better accuracy
-            min_detection_confidence=0.2,  # Lowered from 0.3 to 0.2
-            min_tracking_confidence=0.2,   # Lowered from 0.3 to 0.2
-        )
+        self.profile = profile or DEFAULT_PROFILE
+        if self.profile not in VISION_PROFILES:
+            raise ValueError(f"Unknown vision profile '{self.profile}' (expected one of {', '.join(VISION_PROFILES)})")
+        settings = VISION_PROFILES[self.profile]
+        self.inference_width = DEFAULT_INFERENCE_WIDTH if inference_width is None else inference_width
+        
+        self.holistic = None
+        self.face_mesh = None
+        self.pose = None
+        if settings["holistic"]:
+            self.holistic = self.mp_holistic.Holistic(
+                static_image_mode=static_image_mode,
+                model_complexity=settings["model_complexity"],
+                min_detection_confidence=0.2,  # Lowered from 0.3 to 0.2
+                min_tracking_confidence=0.2,   # Lowered from 0.3 to 0.2
+            )
+        else:
+            self.face_mesh = mp.solutions.face_mesh.FaceMesh(
+                static_image_mode=static_image_mode,
+                max_num_faces=1,
+                refine_landmarks=False,
+                min_detection_confidence=0.2,
+                min_tracking_confidence=0.2,
+            )
+            self.pose = mp.solutions.pose.Pose(
+                static_image_mode=static_image_mode,
+                model_complexity=settings["model_complexity"],
+                min_detection_confidence=0.2,
+                min_tracking_confidence=0.2,
+            )
         
         self.last_face_time = time.time()
         self.metrics_history = []
@@ -113,12 +177,24 @@ class VisionService:
         angle = abs(np.degrees(np.arctan2(dx, dy)))
         return float(angle)
     
-    def analyze_frame_with_visualization(self, frame):
-        """Analyze frame and draw all metrics on it"""
+    def _detect(self, frame):
+        """Run the profile's graph(s) on a BGR frame; results expose face_landmarks and pose_landmarks"""
         image_h, image_w = frame.shape[:2]
+        if self.inference_width and image_w > self.inference_width:
+            target_h = max(1, round(image_h * self.inference_width / image_w))
+            frame = cv2.resize(frame, (self.inference_width, target_h), interpolation=cv2.INTER_AREA)
         rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.holistic.process(rgb)
-        
+        rgb.flags.writeable = False  # lets MediaPipe use the buffer without copying it
+        if self.holistic is not None:
+            return self.holistic.process(rgb)
+        face = self.face_mesh.process(rgb)
+        return SimpleNamespace(
+            face_landmarks=face.multi_face_landmarks[0] if face.multi_face_landmarks else None,
+            pose_landmarks=self.pose.process(rgb).pose_landmarks,
+        )
+    
+    def _compute_metrics(self, results, image_w, image_h):
+        """Behavior metrics from Holistic results (no drawing)"""
         # Initialize metrics
         presence = False
         eye_contact = "unknown"
@@ -130,22 +206,10 @@ class VisionService:
         
         now = time.time()
         
-        print(f"[VisionService] Frame: {image_w}x{image_h}, Face detected: {results.face_landmarks is not None}, Pose detected: {results.pose_landmarks is not None}")
-        
-        # Draw face mesh if detected
         if results.face_landmarks:
             presence = True
             self.last_face_time = now
             
-            # Draw face landmarks
-            self.mp_drawing.draw_landmarks(
-                frame,
-                results.face_landmarks,
-                self.mp_holistic.FACEMESH_CONTOURS,
-                landmark_drawing_spec=None,
-                connection_drawing_spec=self.mp_drawing_styles.get_default_face_mesh_contours_style()
-            )
-            
             # Calculate head pose
             head_pose = self.head_direction_estimate(results.face_landmarks, image_w, image_h)
             yaw, pitch = head_pose['yaw'], head_pose['pitch']
@@ -164,16 +228,7 @@ class VisionService:
             if now - self.last_face_time > 2.0:
                 feedback_messages.append("✗ Not in camera frame")
         
-        # Draw pose if detected
         if results.pose_landmarks:
-            # Draw pose landmarks
-            self.mp_drawing.draw_landmarks(
-                frame,
-                results.pose_landmarks,
-                self.mp_holistic.POSE_CONNECTIONS,
-                landmark_drawing_spec=self.mp_drawing_styles.get_default_pose_landmarks_style()
-            )
-            
             # Calculate posture
             slouch_angle = self.posture_slouch_estimate(results.pose_landmarks, image_w, image_h)
             is_good_posture = slouch_angle <= 20.0
@@ -203,6 +258,67 @@ class VisionService:
         else:
             overall = "😟 Please improve your presence and engagement"
         
+        return {
+            "presence": presence,
+            "eye_contact": eye_contact,
+            "confidence_score": confidence_score,
+            "posture": {
+                "slouch_angle": slouch_angle,
+                "is_good": is_good_posture
+            },
+            "head_pose": head_pose,
+            "feedback": feedback_messages,
+            "overall": overall,
+            "timestamp": now
+        }
+    
+    def analyze_frame(self, frame):
+        """Metrics-only analysis for the API - nothing is drawn and the frame is not modified"""
+        image_h, image_w = frame.shape[:2]
+        return self._compute_metrics(self._detect(frame), image_w, image_h)
+    
+    def analyze_frame_with_visualization(self, frame):
+        """Analyze frame and draw all metrics on it (demo / preview)"""
+        image_h, image_w = frame.shape[:2]
+        results = self._detect(frame)
+        metrics = self._compute_metrics(results, image_w, image_h)
+        
+        print(f"[VisionService] Frame: {image_w}x{image_h}, Face detected: {results.face_landmarks is not None}, Pose detected: {results.pose_landmarks is not None}")
+        
+        # Return both annotated frame and metrics
+        return self.draw_annotations(frame, results, metrics), metrics
+    
+    def draw_annotations(self, frame, results, metrics):
+        """Draw landmarks, status indicators, the metrics panel and feedback onto the frame (in place)"""
+        image_h, image_w = frame.shape[:2]
+        presence = metrics["presence"]
+        eye_contact = metrics["eye_contact"]
+        confidence_score = metrics["confidence_score"]
+        slouch_angle = metrics["posture"]["slouch_angle"]
+        is_good_posture = metrics["posture"]["is_good"]
+        head_pose = metrics["head_pose"]
+        feedback_messages = metrics["feedback"]
+        overall = metrics["overall"]
+        
+        # Draw face mesh if detected
+        if results.face_landmarks:
+            self.mp_drawing.draw_landmarks(
+                frame,
+                results.face_landmarks,
+                self.mp_holistic.FACEMESH_CONTOURS,
+                landmark_drawing_spec=None,
+                connection_drawing_spec=self.mp_drawing_styles.get_default_face_mesh_contours_style()
+            )
+        
+        # Draw pose if detected
+        if results.pose_landmarks:
+            self.mp_drawing.draw_landmarks(
+                frame,
+                results.pose_landmarks,
+                self.mp_holistic.POSE_CONNECTIONS,
+                landmark_drawing_spec=self.mp_drawing_styles.get_default_pose_landmarks_style()
+            )
+        
         # === DRAW ALL METRICS ON FRAME ===
         
         # Header background
@@ -260,20 +376,7 @@ class VisionService:
             cv2.putText(frame, msg, (10, feedback_y + 40 + i * 25),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
         
-        # Return both annotated frame and metrics
-        return frame, {
-            "presence": presence,
-            "eye_contact": eye_contact,
-            "confidence_score": confidence_score,
-            "posture": {
-                "slouch_angle": slouch_angle,
-                "is_good": is_good_posture
-            },
-            "head_pose": head_pose,
-            "feedback": feedback_messages,
-            "overall": overall,
-            "timestamp": now
-        }
+        return frame
     
     def process_base64_frame(self, base64_image):
         """Process base64 image and return metrics (for API)"""
@@ -282,19 +385,43 @@ class VisionService:
                 base64_image = base64_image.split("base64,")[1]
             
             img_bytes = base64.b64decode(base64_image)
-            nparr = np.frombuffer(img_bytes, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            return self.process_encoded_frame(img_bytes)
+            
+        except Exception as e:
+            return {"error": str(e)}
+    
+    def process_encoded_frame(self, image_bytes):
+        """
+        Process an encoded (JPEG/PNG) frame and return metrics (for the binary API).
+        The request body is decoded in place - np.frombuffer is a view, not a copy.
+        """
+        try:
+            nparr = np.frombuffer(image_bytes, np.uint8)
+            frame = cv2.imdecode(nparr, self._decode_flag(image_bytes))
             
             if frame is None:
                 return {"error": "Failed to decode image"}
             
-            # Get metrics without visualization (for API response)
-            _, metrics = self.analyze_frame_with_visualization(frame)
-            return metrics
+            # Metrics only - overlays are for the demo / preview
+            return self.analyze_frame(frame)
             
         except Exception as e:
             return {"error": str(e)}
     
+    def _decode_flag(self, data):
+        """
+        imdecode flag that decodes a JPEG straight to about the inference width, picked from the frame's own
+        header (the shared static tracker sees clients at every resolution). Other formats decode at full size.
+        """
+        if self.inference_width:
+            source_width = jpeg_width(data)
+            for factor, flag in REDUCED_DECODE_FLAGS:
+                if source_width // factor >= self.inference_width:
+                    return flag
+        return cv2.IMREAD_COLOR
+    
     def close(self):
         """Cleanup resources"""
-        self.holistic.close()
+        for graph in (self.holistic, self.face_mesh, self.pose):
+            if graph is not None:
+                graph.close()
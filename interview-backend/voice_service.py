@@ -1,5 +1,6 @@
+import math
 import os
-from typing import Dict
+from typing import Dict, Optional
 from dotenv import load_dotenv
 from fastapi import HTTPException
 
@@ -31,13 +32,15 @@ class VoiceService:
     def list_voices(self) -> Dict[str, str]:
         return self.available_voices
 
-    def text_to_speech(self, text: str, voice: str = "rachel") -> bytes:
+    def text_to_speech(self, text: str, voice: str = "rachel", timeout: Optional[float] = None) -> bytes:
+        """`timeout` (seconds, e.g. the request's remaining budget) bounds the ElevenLabs HTTP request."""
         # Trim overly long text to save free-tier characters
         if len(text) > 1200:
             text = text[:1200] + "..."
 
         # Map name to ID if needed
         voice_id = self.available_voices.get(voice, voice)
+        request_options = {"timeout_in_seconds": max(1, math.ceil(timeout))} if timeout is not None else None
         try:
             # Stream bytes and join
             stream = self.client.text_to_speech.convert(
@@ -45,6 +48,7 @@ class VoiceService:
                 model_id="eleven_multilingual_v2",
                 text=text,
                 output_format="mp3_44100_128",
+                request_options=request_options,
             )
             # SDK yields bytes chunks; some versions yield memoryviews
             chunks: list[bytes] = []